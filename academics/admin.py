@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.shortcuts import redirect
+
 from .models import (
     AcademicYear, 
     Term, 
@@ -6,7 +8,27 @@ from .models import (
     Subject, 
     Class,
     TeachingAssignment,
+    GradeWeightScheme,
+    FinalMark,
 )
+from .final_marks import compute_final_marks
+from core.jobs import enqueue
+from students.tasks import build_report_card_archive
+
+
+def report_card_download(request, years, classes=None, filename='report_cards.zip'):
+    """
+    Queues the zip of report card PDFs for the active enrollments of the
+    given years (and classes), and sends the admin to its progress page.
+    """
+    job = enqueue(
+        build_report_card_archive,
+        academic_year_ids=[year.pk for year in years],
+        class_ids=[c.pk for c in classes] if classes is not None else None,
+        filename=filename,
+        created_by=request.user,
+    )
+    return redirect('job_wait', pk=job.pk)
 
 
 @admin.register(AcademicYear)
@@ -15,6 +37,13 @@ class AcademicYearAdmin(admin.ModelAdmin):
     list_filter = ['is_current']
     search_fields = ['name']
     ordering = ['-start_date']
+    actions = ['download_report_cards']
+
+    @admin.action(description="Download report cards for the selected years")
+    def download_report_cards(self, request, queryset):
+        years = list(queryset)
+        name = years[0].name if len(years) == 1 else 'years'
+        return report_card_download(request, years, filename=f"report_cards_{name}.zip")
 
 
 @admin.register(Term)
@@ -47,10 +76,19 @@ class ClassAdmin(admin.ModelAdmin):
     search_fields = ['name']
     filter_horizontal = ['subjects']  # Better UI for ManyToMany
     ordering = ['academic_year', 'name']
+    actions = ['download_report_cards']
     
     def current_enrollment(self, obj):
         return obj.current_enrollment
     current_enrollment.short_description = 'Enrolled'
+
+    @admin.action(description="Download report cards for the selected classes")
+    def download_report_cards(self, request, queryset):
+        classes = list(queryset.select_related('academic_year'))
+        years = {c.academic_year_id: c.academic_year for c in classes}.values()
+        name = classes[0].name if len(classes) == 1 else 'classes'
+        return report_card_download(request, years, classes=classes, filename=f"report_cards_{name}.zip")
+
 @admin.register(TeachingAssignment)
 class TeachingAssignmentAdmin(admin.ModelAdmin):
     """
@@ -143,4 +181,38 @@ class TeachingAssignmentAdmin(admin.ModelAdmin):
             'subject',
             'class_assigned',
             'academic_year'
-        )
\ No newline at end of file
+        ).with_student_counts()
+
+
+@admin.register(GradeWeightScheme)
+class GradeWeightSchemeAdmin(admin.ModelAdmin):
+    list_display = [
+        'subject', 'class_assigned', 'academic_year',
+        'quiz_weight', 'assignment_weight', 'midterm_weight', 'final_weight',
+    ]
+    list_filter = ['academic_year', 'subject']
+    search_fields = ['subject__name', 'class_assigned__name']
+    ordering = ['academic_year', 'subject', 'class_assigned']
+    actions = ['recompute_final_marks']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('subject', 'class_assigned', 'academic_year')
+
+    @admin.action(description="Recompute final marks for the selected schemes' years")
+    def recompute_final_marks(self, request, queryset):
+        written = sum(
+            compute_final_marks(year_id)
+            for year_id in set(queryset.values_list('academic_year_id', flat=True))
+        )
+        self.message_user(request, f"Wrote {written} final mark(s).")
+
+
+@admin.register(FinalMark)
+class FinalMarkAdmin(admin.ModelAdmin):
+    list_display = ['student', 'subject', 'academic_year', 'final_percentage', 'weight_covered', 'computed_at']
+    list_filter = ['academic_year', 'subject']
+    search_fields = ['student__username', 'student__first_name', 'student__last_name']
+    readonly_fields = ['student', 'subject', 'academic_year', 'scheme', 'final_percentage', 'weight_covered', 'computed_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('student', 'subject', 'academic_year')
@@ -0,0 +1,106 @@
+# academics/final_marks.py
+"""
+Batch computation of weighted final marks.
+
+For one academic year:
+  1. the year's weight schemes and each student's active class are read,
+  2. one aggregate query over Grade returns, per (student, subject), the
+     average percentage of each exam type (conditional AVGs, terms
+     pooled),
+  3. each aggregate row is weighted with the scheme for the student's
+     class, or the subject's default scheme,
+  4. the year's FinalMark rows are replaced in one transaction.
+
+The database does the work over grades. Python only touches one row per
+(student, subject).
+
+Exam types without grades yet are left out and the remaining weights
+are rescaled. The mark stays meaningful mid-year and weight_covered
+records how much of the scheme it stands on.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Q
+
+from .models import FinalMark, Grade, GradeWeightScheme
+from students.dashboard import invalidate_student_dashboards
+from students.models import Enrollment
+
+
+def exam_type_averages(academic_year_id, subject_ids):
+    """
+    One query: {'student_id', 'subject_id', <exam_type>: avg % or None, ...}
+    per (student, subject) with grades in the year.
+    """
+    return (
+        Grade.objects
+        .filter(academic_year_id=academic_year_id, subject_id__in=subject_ids)
+        .values('student_id', 'subject_id')
+        .annotate(**{
+            exam_type: Avg(Grade.percentage_expression(), filter=Q(exam_type=exam_type))
+            for exam_type in GradeWeightScheme.WEIGHT_FIELDS
+        })
+        .order_by()
+    )
+
+
+def weighted_mark(averages, weights):
+    """
+    (final_percentage, weight_covered) from {exam_type: avg or None} and
+    {exam_type: weight}, or None if no weighted exam type has grades.
+    """
+    covered = sum(weight for exam_type, weight in weights.items() if averages.get(exam_type) is not None)
+    if not covered:
+        return None
+    total = sum(
+        weight * averages[exam_type]
+        for exam_type, weight in weights.items()
+        if averages.get(exam_type) is not None
+    )
+    return round(total / covered, 1), round(covered * 100 / sum(weights.values()))
+
+
+def compute_final_marks(academic_year_id):
+    """
+    Recomputes every final mark of one academic year.
+    Four queries plus the write, whatever the number of grades.
+    Returns the number of final marks written.
+    """
+    schemes = {
+        (scheme.subject_id, scheme.class_assigned_id): scheme
+        for scheme in GradeWeightScheme.objects.filter(academic_year_id=academic_year_id)
+    }
+    class_of = dict(
+        Enrollment.objects
+        .filter(academic_year_id=academic_year_id, status='active')
+        .values_list('student_id', 'class_assigned_id')
+    )
+
+    marks = []
+    if schemes:
+        for row in exam_type_averages(academic_year_id, {subject_id for subject_id, _ in schemes}):
+            scheme = (
+                schemes.get((row['subject_id'], class_of.get(row['student_id'])))
+                or schemes.get((row['subject_id'], None))
+            )
+            if scheme is None:
+                continue
+            result = weighted_mark(row, scheme.weights)
+            if result is None:
+                continue
+            final_percentage, weight_covered = result
+            marks.append(FinalMark(
+                student_id=row['student_id'],
+                subject_id=row['subject_id'],
+                academic_year_id=academic_year_id,
+                scheme=scheme,
+                final_percentage=Decimal(str(final_percentage)),
+                weight_covered=weight_covered,
+            ))
+
+    with transaction.atomic():
+        FinalMark.objects.filter(academic_year_id=academic_year_id).delete()
+        FinalMark.objects.bulk_create(marks, batch_size=500)
+        invalidate_student_dashboards(set(class_of) | {mark.student_id for mark in marks})
+    return len(marks)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import AcademicYear
+from academics.final_marks import compute_final_marks
+
+
+class Command(BaseCommand):
+    help = "Compute weighted final marks from grades and the grade weight schemes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help="Academic year name, e.g. 2024-2025 (default: the current year)")
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all()
+        if options['year']:
+            years = years.filter(name=options['year'])
+        else:
+            years = years.filter(is_current=True)
+        year = years.first()
+        if year is None:
+            raise CommandError(
+                f"No academic year named {options['year']!r}." if options['year']
+                else "No current academic year."
+            )
+
+        written = compute_final_marks(year.id)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} final mark(s) for {year.name}."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import AcademicYear
+from academics.summaries import rebuild_grade_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-student grade summaries from raw grades."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help="Only this academic year (name, e.g. 2024-2025)")
+
+    def handle(self, *args, **options):
+        year_id = None
+        if options['year']:
+            try:
+                year_id = AcademicYear.objects.get(name=options['year']).id
+            except AcademicYear.DoesNotExist:
+                raise CommandError(f"No academic year named {options['year']!r}.")
+
+        written = rebuild_grade_summaries(academic_year_id=year_id)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} grade summary row(s)."))
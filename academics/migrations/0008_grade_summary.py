@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    Grade = apps.get_model('academics', 'Grade')
+    GradeSummary = apps.get_model('academics', 'GradeSummary')
+
+    totals = {}
+    rows = Grade.objects.values_list(
+        'student_id', 'subject_id', 'academic_year_id', 'term_id',
+        'exam_type', 'score', 'max_score', 'updated_at',
+    ).iterator(chunk_size=2000)
+    for student_id, subject_id, year_id, term_id, exam_type, score, max_score, graded_at in rows:
+        pct = round(float(score) / float(max_score) * 100, 1) if max_score > 0 else 0
+        entry = totals.setdefault((student_id, subject_id, year_id, term_id), {
+            'count': 0, 'sum': 0.0, 'min': pct, 'max': pct, 'latest': None,
+        })
+        entry['count'] += 1
+        entry['sum'] += pct
+        entry['min'] = min(entry['min'], pct)
+        entry['max'] = max(entry['max'], pct)
+        if entry['latest'] is None or graded_at >= entry['latest'][0]:
+            entry['latest'] = (graded_at, exam_type, score, max_score)
+
+    GradeSummary.objects.bulk_create([
+        GradeSummary(
+            student_id=student_id, subject_id=subject_id,
+            academic_year_id=year_id, term_id=term_id,
+            grade_count=entry['count'],
+            percentage_sum=Decimal(str(round(entry['sum'], 1))),
+            min_percentage=Decimal(str(entry['min'])),
+            max_percentage=Decimal(str(entry['max'])),
+            latest_graded_at=entry['latest'][0],
+            latest_exam_type=entry['latest'][1],
+            latest_score=entry['latest'][2],
+            latest_max_score=entry['latest'][3],
+        )
+        for (student_id, subject_id, year_id, term_id), entry in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_timetableslot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.DecimalField(decimal_places=1, default=0, max_digits=9)),
+                ('min_percentage', models.DecimalField(decimal_places=1, max_digits=5)),
+                ('max_percentage', models.DecimalField(decimal_places=1, max_digits=5)),
+                ('latest_exam_type', models.CharField(choices=[('quiz', 'Quiz'), ('assignment', 'Assignment'), ('midterm', 'Midterm'), ('final', 'Final Exam')], max_length=20)),
+                ('latest_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('latest_max_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('latest_graded_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='academics.academicyear')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='academics.subject')),
+                ('term', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='academics.term')),
+            ],
+            options={
+                'verbose_name': 'Grade Summary',
+                'verbose_name_plural': 'Grade Summaries',
+                'indexes': [models.Index(fields=['student', 'academic_year'], name='academics_g_student_d3f8ee_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject', 'academic_year', 'term'), name='unique_grade_summary_per_term'), models.UniqueConstraint(condition=models.Q(('term__isnull', True)), fields=('student', 'subject', 'academic_year'), name='unique_grade_summary_without_term')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:13
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0008_grade_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeWeightScheme',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quiz_weight', models.PositiveSmallIntegerField(default=0)),
+                ('assignment_weight', models.PositiveSmallIntegerField(default=0)),
+                ('midterm_weight', models.PositiveSmallIntegerField(default=0)),
+                ('final_weight', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weight_schemes', to='academics.academicyear')),
+                ('class_assigned', models.ForeignKey(blank=True, help_text='Optional — leave empty to apply to every class taking the subject', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='weight_schemes', to='academics.class')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weight_schemes', to='academics.subject')),
+            ],
+            options={
+                'verbose_name': 'Grade Weight Scheme',
+                'verbose_name_plural': 'Grade Weight Schemes',
+                'ordering': ['academic_year', 'subject', 'class_assigned'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FinalMark',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('final_percentage', models.DecimalField(decimal_places=1, max_digits=5)),
+                ('weight_covered', models.PositiveSmallIntegerField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_marks', to='academics.academicyear')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_marks', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_marks', to='academics.subject')),
+                ('scheme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_marks', to='academics.gradeweightscheme')),
+            ],
+            options={
+                'verbose_name': 'Final Mark',
+                'verbose_name_plural': 'Final Marks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gradeweightscheme',
+            constraint=models.UniqueConstraint(fields=('subject', 'academic_year', 'class_assigned'), name='unique_weight_scheme_per_class'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradeweightscheme',
+            constraint=models.UniqueConstraint(condition=models.Q(('class_assigned__isnull', True)), fields=('subject', 'academic_year'), name='unique_default_weight_scheme'),
+        ),
+        migrations.AddIndex(
+            model_name='finalmark',
+            index=models.Index(fields=['student', 'academic_year'], name='academics_f_student_f27456_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='finalmark',
+            unique_together={('student', 'subject', 'academic_year')},
+        ),
+    ]
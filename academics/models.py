@@ -18,6 +18,7 @@ Design Philosophy:
 """
 
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
 from django.core.exceptions import ValidationError
 import uuid
 from accounts.models import CustomUser
@@ -271,6 +272,34 @@ class Class(models.Model):
         """Check if class has reached capacity"""
         return self.current_enrollment >= self.capacity
 
+class TeachingAssignmentQuerySet(models.QuerySet):
+
+    def with_student_counts(self):
+        """
+        Annotates active_student_count: active enrollments in the
+        assignment's class and year, from one correlated COUNT subquery
+        in the same SELECT. student_count reads it instead of running
+        its own COUNT per row.
+        """
+        from students.models import Enrollment
+
+        counts = (
+            Enrollment.objects
+            .filter(
+                class_assigned=models.OuterRef('class_assigned'),
+                academic_year=models.OuterRef('academic_year'),
+                status='active',
+            )
+            .order_by()
+            .values('class_assigned')
+            .annotate(n=models.Count('pk'))
+            .values('n')
+        )
+        return self.annotate(active_student_count=Coalesce(
+            models.Subquery(counts, output_field=models.IntegerField()), 0,
+        ))
+
+
 class TeachingAssignment(models.Model):
     """
     Teaching Assignment — Connects Teacher to Subject and Class per Academic Year
@@ -336,6 +365,8 @@ class TeachingAssignment(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TeachingAssignmentQuerySet.as_manager()
     
     class Meta:
         ordering = ['academic_year', 'class_assigned', 'subject']
@@ -418,6 +449,9 @@ class TeachingAssignment(models.Model):
     @property
     def student_count(self):
         """Get count of students in this assignment"""
+        if hasattr(self, 'active_student_count'):
+            # Annotated by TeachingAssignment.objects.with_student_counts()
+            return self.active_student_count
         return self.enrolled_students.count()
     
 class Grade(models.Model):
@@ -490,19 +524,260 @@ class Grade(models.Model):
 
     @property
     def percentage(self):
-        if self.max_score > 0:
-            return round(float(self.score) / float(self.max_score) * 100, 1)
-        return 0
+        return self.compute_percentage(self.score, self.max_score)
 
     @property
     def letter_grade(self):
-        p = self.percentage
+        return self.letter_for(self.percentage)
+
+    # Shared with code that reads raw values() rows (exports, gradebook)
+    # so it never has to build Grade objects just to get these.
+    @staticmethod
+    def compute_percentage(score, max_score):
+        if max_score > 0:
+            return round(float(score) / float(max_score) * 100, 1)
+        return 0
+
+    @staticmethod
+    def percentage_expression():
+        """compute_percentage() as a query expression, for aggregates in SQL."""
+        return models.Case(
+            models.When(
+                max_score__gt=0,
+                then=Cast('score', models.FloatField()) * 100
+                / Cast('max_score', models.FloatField()),
+            ),
+            default=models.Value(0.0),
+            output_field=models.FloatField(),
+        )
+
+    @staticmethod
+    def letter_for(p):
         if p >= 90: return 'A'
         if p >= 80: return 'B'
         if p >= 70: return 'C'
         if p >= 60: return 'D'
         return 'F'
 
+class GradeSummary(models.Model):
+    """
+    Pre-aggregated grades per student per subject per year per term.
+
+    WHY: Dashboards and report cards used to read every Grade row and
+    work out percentages one by one. One row here holds what they show:
+    how many assessments, the average/lowest/highest percentage and the
+    most recent score.
+
+    Maintained by academics/summaries.py, in the same transaction as the
+    grade write. Rebuild with `python manage.py rebuild_grade_summaries`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    student = models.ForeignKey(
+        'accounts.CustomUser',
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+    )
+    subject = models.ForeignKey(
+        'Subject',
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+    )
+    academic_year = models.ForeignKey(
+        'AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='grade_summaries',
+    )
+    term = models.ForeignKey(
+        'Term',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grade_summaries',
+    )
+    grade_count        = models.PositiveIntegerField(default=0)
+    percentage_sum     = models.DecimalField(max_digits=9, decimal_places=1, default=0)
+    min_percentage     = models.DecimalField(max_digits=5, decimal_places=1)
+    max_percentage     = models.DecimalField(max_digits=5, decimal_places=1)
+    latest_exam_type   = models.CharField(max_length=20, choices=Grade.EXAM_TYPE_CHOICES)
+    latest_score       = models.DecimalField(max_digits=5, decimal_places=2)
+    latest_max_score   = models.DecimalField(max_digits=5, decimal_places=2)
+    latest_graded_at   = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # term is nullable and NULLs never collide in a unique index,
+            # so term-less rows get their own constraint
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'academic_year', 'term'],
+                name='unique_grade_summary_per_term',
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'academic_year'],
+                condition=models.Q(term__isnull=True),
+                name='unique_grade_summary_without_term',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'academic_year']),
+        ]
+        verbose_name = "Grade Summary"
+        verbose_name_plural = "Grade Summaries"
+
+    def __str__(self):
+        return f"{self.student} — {self.subject} — {self.average}%"
+
+    @property
+    def average(self):
+        if not self.grade_count:
+            return 0
+        return round(float(self.percentage_sum) / self.grade_count, 1)
+
+    @property
+    def letter_grade(self):
+        return Grade.letter_for(self.average)
+
+    @property
+    def latest_percentage(self):
+        return Grade.compute_percentage(self.latest_score, self.latest_max_score)
+
+
+class GradeWeightScheme(models.Model):
+    """
+    How much each exam type counts towards a subject's final mark in one
+    academic year, e.g. quizzes 10, assignments 20, midterm 30, final 40.
+
+    A scheme without a class is the subject's default. A scheme for one
+    class overrides it for students enrolled in that class. Weights are
+    percentages and must add up to 100.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    subject = models.ForeignKey(
+        'Subject',
+        on_delete=models.CASCADE,
+        related_name='weight_schemes',
+    )
+    academic_year = models.ForeignKey(
+        'AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='weight_schemes',
+    )
+    class_assigned = models.ForeignKey(
+        'Class',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='weight_schemes',
+        help_text="Optional — leave empty to apply to every class taking the subject",
+    )
+    quiz_weight       = models.PositiveSmallIntegerField(default=0)
+    assignment_weight = models.PositiveSmallIntegerField(default=0)
+    midterm_weight    = models.PositiveSmallIntegerField(default=0)
+    final_weight      = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # exam_type → weight field, in Grade.EXAM_TYPE_CHOICES order
+    WEIGHT_FIELDS = {value: f'{value}_weight' for value, _ in Grade.EXAM_TYPE_CHOICES}
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['subject', 'academic_year', 'class_assigned'],
+                name='unique_weight_scheme_per_class',
+            ),
+            models.UniqueConstraint(
+                fields=['subject', 'academic_year'],
+                condition=models.Q(class_assigned__isnull=True),
+                name='unique_default_weight_scheme',
+            ),
+        ]
+        ordering = ['academic_year', 'subject', 'class_assigned']
+        verbose_name = "Grade Weight Scheme"
+        verbose_name_plural = "Grade Weight Schemes"
+
+    def __str__(self):
+        scope = self.class_assigned.name if self.class_assigned_id else "all classes"
+        return f"{self.subject.name} ({scope}, {self.academic_year.name})"
+
+    @property
+    def weights(self):
+        """{exam_type: weight} for the exam types that count."""
+        return {
+            exam_type: getattr(self, field)
+            for exam_type, field in self.WEIGHT_FIELDS.items()
+            if getattr(self, field)
+        }
+
+    def clean(self):
+        if self.class_assigned_id and self.class_assigned.academic_year_id != self.academic_year_id:
+            raise ValidationError("The class belongs to a different academic year.")
+        if sum(self.weights.values()) != 100:
+            raise ValidationError("The weights must add up to 100.")
+
+
+class FinalMark(models.Model):
+    """
+    Weighted final mark per student per subject per academic year.
+
+    Written in batches by academics/final_marks.py from the grades and
+    the weight schemes. It is a stored result: recompute with
+    `python manage.py compute_final_marks` after grading, or from the
+    weight scheme admin.
+
+    weight_covered is the share of the scheme's weight that had grades.
+    Below 100 the mark is provisional: it is weighted over the exam
+    types graded so far.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    student = models.ForeignKey(
+        'accounts.CustomUser',
+        on_delete=models.CASCADE,
+        related_name='final_marks',
+    )
+    subject = models.ForeignKey(
+        'Subject',
+        on_delete=models.CASCADE,
+        related_name='final_marks',
+    )
+    academic_year = models.ForeignKey(
+        'AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='final_marks',
+    )
+    scheme = models.ForeignKey(
+        'GradeWeightScheme',
+        on_delete=models.CASCADE,
+        related_name='final_marks',
+    )
+    final_percentage = models.DecimalField(max_digits=5, decimal_places=1)
+    weight_covered   = models.PositiveSmallIntegerField()
+    computed_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [['student', 'subject', 'academic_year']]
+        indexes = [
+            models.Index(fields=['student', 'academic_year']),
+        ]
+        verbose_name = "Final Mark"
+        verbose_name_plural = "Final Marks"
+
+    def __str__(self):
+        return f"{self.student} — {self.subject} — {self.final_percentage}%"
+
+    @property
+    def letter_grade(self):
+        return Grade.letter_for(self.final_percentage)
+
+    @property
+    def is_provisional(self):
+        return self.weight_covered < 100
+
+
 class TimetableSlot(models.Model):
     DAY_CHOICES = [
         ('monday',    'Monday'),
@@ -0,0 +1,152 @@
+# academics/ranking.py
+"""
+Class and school rankings from the grade summaries.
+
+For one academic year, optionally narrowed to a class and/or a term,
+every student gets:
+  - per subject: average percentage, dense rank, percentile
+  - overall:     average over all their assessments, dense rank, percentile
+
+Rank 1 is the best average, and equal averages share a rank. Percentile
+is the share of ranked students whose average is at or below the
+student's (cume_dist), so the top student is 100.
+
+Ranks come from window functions (DENSE_RANK / CUME_DIST) when the
+database supports them, with a sort in Python as the fallback. Either
+way the input is the GradeSummary table, not raw grades. Results are
+cached under the year's grade data version, so any grade write makes the
+next read recompute.
+"""
+from bisect import bisect_right
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import GradeSummary
+from .summaries import grades_data_version
+
+
+RANKING_CACHE_TIMEOUT = 60 * 60
+
+
+def _scoped(academic_year_id, class_id=None, term_id=None):
+    qs = GradeSummary.objects.filter(academic_year_id=academic_year_id)
+    if class_id:
+        qs = qs.filter(
+            student__enrollments__class_assigned_id=class_id,
+            student__enrollments__academic_year_id=academic_year_id,
+            student__enrollments__status='active',
+        )
+    if term_id:
+        qs = qs.filter(term_id=term_id)
+    return qs.order_by()
+
+
+def _average():
+    # Summed across terms when no term is given, so a year ranking is
+    # weighted by assessment like a single term's
+    return Cast(Sum('percentage_sum'), FloatField()) / Cast(Sum('grade_count'), FloatField())
+
+
+def _entry(average, rank, cume_dist):
+    return {
+        'average': round(average, 1),
+        'rank': rank,
+        'percentile': round(cume_dist * 100, 1),
+    }
+
+
+def _averages(qs, group_by):
+    fields = [group_by, 'student_id'] if group_by else ['student_id']
+    return qs.values(*fields).annotate(average=_average())
+
+
+def _rank_with_window(qs, group_by):
+    """
+    [(group_value, student_id, entry), ...] ranked in SQL.
+    group_by: a field to partition by, or None for one ranking.
+
+    The window runs over the grouped averages as a derived table. Django
+    would put a window over an aggregate into the GROUP BY.
+    """
+    sql, params = _averages(qs, group_by).query.sql_with_params()
+    qn = connection.ops.quote_name
+    partition = f"PARTITION BY {qn(group_by)} " if group_by else ''
+    group_column = qn(group_by) if group_by else 'NULL'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {group_column}, {qn('student_id')}, average, "
+            f"DENSE_RANK() OVER ({partition}ORDER BY average DESC), "
+            f"CUME_DIST() OVER ({partition}ORDER BY average) "
+            f"FROM ({sql}) averages",
+            params,
+        )
+        rows = cursor.fetchall()
+    # Raw cursors return ids as the backend stores them
+    to_python = GradeSummary._meta.get_field('student').target_field.to_python
+    group_to_python = (
+        GradeSummary._meta.get_field(group_by.removesuffix('_id')).target_field.to_python
+        if group_by else (lambda value: value)
+    )
+    return [
+        (group_to_python(group), to_python(student_id), _entry(average, rank, cume))
+        for group, student_id, average, rank, cume in rows
+    ]
+
+
+def _rank_in_python(qs, group_by):
+    """Same output as _rank_with_window(), ranking by sorting each group."""
+    groups = {}
+    for row in _averages(qs, group_by):
+        groups.setdefault(row.get(group_by), []).append((row['student_id'], row['average']))
+
+    ranked = []
+    for group, members in groups.items():
+        ascending = sorted(avg for _, avg in members)
+        dense = {avg: i for i, avg in enumerate(sorted(set(ascending), reverse=True), start=1)}
+        size = len(ascending)
+        for student_id, avg in members:
+            ranked.append((group, student_id, _entry(avg, dense[avg], bisect_right(ascending, avg) / size)))
+    return ranked
+
+
+def compute_rankings(academic_year_id, class_id=None, term_id=None, use_window=None):
+    """
+    Uncached ranking, two queries: one for per-subject ranks, one for
+    overall ranks.
+
+    Returns {
+        'size':     number of ranked students,
+        'overall':  {student_id: {'average', 'rank', 'percentile'}},
+        'subjects': {subject_id: {student_id: {...}}, ...},
+    }
+    """
+    if use_window is None:
+        use_window = connection.features.supports_over_clause
+    rank = _rank_with_window if use_window else _rank_in_python
+    qs = _scoped(academic_year_id, class_id, term_id)
+
+    subjects = {}
+    for subject_id, student_id, entry in rank(qs, 'subject_id'):
+        subjects.setdefault(subject_id, {})[student_id] = entry
+    overall = {student_id: entry for _, student_id, entry in rank(qs, None)}
+
+    return {'size': len(overall), 'overall': overall, 'subjects': subjects}
+
+
+def get_rankings(academic_year_id, class_id=None, term_id=None):
+    """
+    Cached compute_rankings(). The key carries the year's grade data
+    version, so stale entries are never read. They just age out.
+    """
+    key = (
+        f"grade-rankings:{academic_year_id}:{class_id or 'school'}:{term_id or 'year'}:"
+        f"{grades_data_version(academic_year_id)}"
+    )
+    rankings = cache.get(key)
+    if rankings is None:
+        rankings = compute_rankings(academic_year_id, class_id, term_id)
+        cache.set(key, rankings, RANKING_CACHE_TIMEOUT)
+    return rankings
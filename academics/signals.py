@@ -0,0 +1,43 @@
+# academics/signals.py
+"""
+Keeps GradeSummary in step with single-row grade writes (Django admin
+edits, shell fixes, deletes).
+
+The grade-sheet write in teachers/services.py uses bulk statements that
+do not fire these signals. It refreshes the summaries itself, once per
+sheet.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Grade, Term
+from .summaries import refresh_grade_summaries, rebuild_grade_summaries
+
+
+@receiver(pre_save, sender=Grade)
+def grade_about_to_change(sender, instance, **kwargs):
+    # An edit can move a grade to another student/subject/term. Remember
+    # where it was so that summary is refreshed too.
+    instance._summary_key_before = None
+    if not instance._state.adding:
+        instance._summary_key_before = (
+            Grade.objects
+            .filter(pk=instance.pk)
+            .values_list('student_id', 'subject_id', 'academic_year_id', 'term_id')
+            .first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    current = (instance.student_id, instance.subject_id, instance.academic_year_id, instance.term_id)
+    before = getattr(instance, '_summary_key_before', None)
+    for student_id, subject_id, academic_year_id, term_id in {current, before} - {None}:
+        refresh_grade_summaries(subject_id, academic_year_id, term_id, [student_id])
+
+
+@receiver(post_delete, sender=Term)
+def term_deleted(sender, instance, **kwargs):
+    # Its grades were moved to "no term" by SET_NULL in bulk, so the
+    # year's term-less summaries are out of date
+    rebuild_grade_summaries(academic_year_id=instance.academic_year_id)
@@ -0,0 +1,123 @@
+# academics/summaries.py
+"""
+Maintenance of the GradeSummary table.
+
+Every grade write path calls refresh_grade_summaries() for the students
+it touched, inside the same transaction. The refresh re-reads just those
+students' grades for one (subject, year, term), which is bounded by the
+number of assessments, and replaces their summary rows.
+rebuild_grade_summaries() recomputes everything from raw grades and is
+what the management command runs.
+
+Percentages go through Grade.compute_percentage so the summaries always
+agree with Grade.percentage.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Grade, GradeSummary
+
+
+GRADE_FIELDS = (
+    'student_id', 'subject_id', 'academic_year_id', 'term_id',
+    'exam_type', 'score', 'max_score', 'updated_at',
+)
+
+
+def summarize_grades(rows):
+    """
+    Folds raw grade rows (values_list over GRADE_FIELDS, any order) into
+    unsaved GradeSummary objects, one per (student, subject, year, term).
+    """
+    totals = {}
+    for student_id, subject_id, year_id, term_id, exam_type, score, max_score, graded_at in rows:
+        pct = Grade.compute_percentage(score, max_score)
+        key = (student_id, subject_id, year_id, term_id)
+        entry = totals.get(key)
+        if entry is None:
+            totals[key] = entry = {
+                'count': 0, 'sum': 0.0, 'min': pct, 'max': pct, 'latest': None,
+            }
+        entry['count'] += 1
+        entry['sum'] += pct
+        entry['min'] = min(entry['min'], pct)
+        entry['max'] = max(entry['max'], pct)
+        if entry['latest'] is None or graded_at >= entry['latest'][0]:
+            entry['latest'] = (graded_at, exam_type, score, max_score)
+
+    summaries = []
+    for (student_id, subject_id, year_id, term_id), entry in totals.items():
+        graded_at, exam_type, score, max_score = entry['latest']
+        summaries.append(GradeSummary(
+            student_id=student_id,
+            subject_id=subject_id,
+            academic_year_id=year_id,
+            term_id=term_id,
+            grade_count=entry['count'],
+            percentage_sum=Decimal(str(round(entry['sum'], 1))),
+            min_percentage=Decimal(str(entry['min'])),
+            max_percentage=Decimal(str(entry['max'])),
+            latest_exam_type=exam_type,
+            latest_score=score,
+            latest_max_score=max_score,
+            latest_graded_at=graded_at,
+        ))
+    return summaries
+
+
+def refresh_grade_summaries(subject_id, academic_year_id, term_id, student_ids):
+    """
+    Recomputes the summaries of the given students for one
+    (subject, year, term). Three queries whatever the number of students:
+    read their grades, delete their old summaries, insert the new ones.
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return 0
+    key = dict(subject_id=subject_id, academic_year_id=academic_year_id, term_id=term_id)
+    with transaction.atomic():
+        summaries = summarize_grades(
+            Grade.objects
+            .filter(**key, student_id__in=student_ids)
+            .values_list(*GRADE_FIELDS)
+        )
+        GradeSummary.objects.filter(**key, student_id__in=student_ids).delete()
+        GradeSummary.objects.bulk_create(summaries)
+    return len(summaries)
+
+
+def rebuild_grade_summaries(academic_year_id=None):
+    """
+    Recomputes the summaries from raw grades in one streamed pass,
+    optionally for a single academic year. Returns the number of summary
+    rows written.
+    """
+    grades = Grade.objects.all()
+    existing = GradeSummary.objects.all()
+    if academic_year_id:
+        grades = grades.filter(academic_year_id=academic_year_id)
+        existing = existing.filter(academic_year_id=academic_year_id)
+
+    summaries = summarize_grades(
+        grades.values_list(*GRADE_FIELDS).order_by().iterator(chunk_size=2000)
+    )
+    with transaction.atomic():
+        existing.delete()
+        GradeSummary.objects.bulk_create(summaries, batch_size=500)
+    return len(summaries)
+
+
+def grades_data_version(academic_year_id):
+    """
+    A string that changes whenever any grade summary in the year is
+    written or removed. Used in cache keys for data derived from grades.
+    One aggregate query, read from the database so every worker process
+    sees the same version.
+    """
+    stats = GradeSummary.objects.filter(academic_year_id=academic_year_id).aggregate(
+        n=Count('id'), latest=Max('updated_at'),
+    )
+    latest = stats['latest'].timestamp() if stats['latest'] else 0
+    return f"{stats['n']}.{latest}"
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Notification = apps.get_model('core', 'Notification')
+    CustomUser.objects.update(unread_notification_count=Coalesce(
+        Subquery(
+            Notification.objects
+            .filter(recipient=OuterRef('pk'), is_read=False)
+            .order_by()
+            .values('recipient')
+            .annotate(n=Count('id'))
+            .values('n')
+        ),
+        Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_customuser_options_customuser_is_admin'),
+        ('core', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_customuser_unread_notification_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetCode',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('code_hash', models.CharField(max_length=128)),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='password_reset_code', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
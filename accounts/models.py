@@ -27,9 +27,28 @@ class CustomUser(AbstractUser):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     is_member_of_this_school = models.BooleanField(default=False)
     rejection_reason = models.TextField(null=True, blank=True)
+    # NOTIFICATIONS
+    # Unread Notification rows, kept in step by Notification.send/bulk_send
+    # and the mark-read methods so the nav badge needs no query.
+    # Repair with `python manage.py reconcile_unread_counts --repair`.
+    unread_notification_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.username
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        A full save of an existing user leaves unread_notification_count
+        out of its UPDATE: the value loaded with the row may be stale, and
+        writing it back would lose notifications sent since. The counter
+        is only changed by its own relative UPDATEs (core/notifications.py).
+
+        Only the UPDATE is narrowed. Explicit update_fields are honoured
+        as given, and a save that finds no row still inserts it.
+        """
+        if update_fields is None:
+            values = [value for value in values if value[0].attname != 'unread_notification_count']
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
     
     # HELPER METHODS
     @property
@@ -61,4 +80,19 @@ class CustomUser(AbstractUser):
     
     class Meta:
         verbose_name = "User"
-        verbose_name_plural = "Users"
\ No newline at end of file
+        verbose_name_plural = "Users"
+
+
+class PasswordResetCode(models.Model):
+    """
+    The pending password-reset code of one user, written by the
+    send_password_reset_code task (accounts/tasks.py). Only a hash is
+    stored: the code itself exists in the email alone.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='password_reset_code')
+    code_hash = models.CharField(max_length=128)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Reset code for {self.user}"
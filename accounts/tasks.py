@@ -0,0 +1,44 @@
+# accounts/tasks.py
+"""
+Background tasks for accounts (see core/jobs.py).
+"""
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from core.jobs import job
+from .models import CustomUser, PasswordResetCode
+
+RESET_CODE_LIFETIME = timedelta(minutes=5)
+
+
+@job(max_attempts=5)
+def send_password_reset_code(user_id):
+    """
+    Mails a new reset code to the user and stores its hash, replacing
+    any earlier code. The code is made here, so it never appears in the
+    job's kwargs. A retry mails a fresh code.
+    """
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        # Deleted before the job ran
+        return {'sent': 0}
+    code = f"{secrets.randbelow(90000) + 10000}"
+    PasswordResetCode.objects.update_or_create(
+        user=user,
+        defaults={
+            'code_hash': make_password(code),
+            'expires_at': timezone.now() + RESET_CODE_LIFETIME,
+        },
+    )
+    send_mail(
+        'Password Reset Code',
+        f'Your reset code is: {code}',
+        'noreply@yourdomain.com',
+        [user.email],
+        fail_silently=False,
+    )
+    return {'sent': 1}
@@ -7,6 +7,7 @@ Tests for the Accounts app — covering:
       method guard, permission guard, JSON validation,
       single approve, single reject, bulk actions,
       role assignment, idempotency, unknown user handling
+  - Approval and password-reset emails sent by the job worker
 
 Run with:
     python manage.py test accounts
@@ -632,4 +633,88 @@ class IdempotencyTests(TestCase):
         })
 
         # Only p1 was actually processed
-        self.assertEqual(response.json()["count"], 1)
\ No newline at end of file
+        self.assertEqual(response.json()["count"], 1)
+
+# ─────────────────────────────────────────────────────────────
+# 7. EMAILS — SENT BY THE BACKGROUND WORKER
+# ─────────────────────────────────────────────────────────────
+
+class BackgroundEmailTests(TestCase):
+    """
+    Approval emails and reset codes leave the request: the view queues
+    a job and a worker sends them.
+    """
+
+    def setUp(self):
+        from core.jobs import worker_seen
+        worker_seen("test-worker")
+
+    def test_approval_email_is_queued_then_sent(self):
+        from django.core import mail
+        from core.jobs import run_pending_jobs
+
+        admin = make_user("mail_admin", role="staff")
+        pending = make_user("mail_pending")
+        self.client.force_login(admin)
+        response = post_json(self.client, reverse("update_user_status"), {
+            "action": "approve",
+            "users": [{"id": str(pending.id), "role": "student"}],
+        })
+        self.assertEqual(response.json()["status"], "success")
+        self.assertEqual(len(mail.outbox), 0)
+
+        run_pending_jobs()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["mail_pending@example.com"])
+
+    def test_reset_code_is_made_by_the_worker_and_never_stored(self):
+        """The job only carries the user id; the database only a hash."""
+        import re
+        from django.core import mail
+        from core.jobs import run_pending_jobs
+        from core.models import Job
+        from accounts.models import PasswordResetCode
+
+        user = make_user("forgetful", approved=True)
+        response = self.client.post(reverse("forgot_password"), {"email": "forgetful@example.com"})
+        self.assertRedirects(response, reverse("verify_code"))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().kwargs, {"user_id": str(user.id)})
+
+        run_pending_jobs()
+        code = re.search(r"\d{5}", mail.outbox[0].body).group()
+        reset = PasswordResetCode.objects.get(user=user)
+        self.assertNotIn(code, reset.code_hash)
+        self.assertNotIn(code, str(Job.objects.get().kwargs))
+        self.assertNotIn(code, str(dict(self.client.session)))
+
+        self.client.post(reverse("verify_code"), {"code": "00000"})
+        self.assertFalse(self.client.session.get("code_verified"))
+        response = self.client.post(reverse("verify_code"), {"code": code})
+        self.assertRedirects(response, reverse("reset_password"), fetch_redirect_response=False)
+        self.assertFalse(PasswordResetCode.objects.exists())
+
+    def test_expired_reset_code_is_refused(self):
+        import re
+        from datetime import timedelta
+        from django.core import mail
+        from django.utils import timezone
+        from core.jobs import run_pending_jobs
+        from accounts.models import PasswordResetCode
+
+        make_user("slowpoke", approved=True)
+        self.client.post(reverse("forgot_password"), {"email": "slowpoke@example.com"})
+        run_pending_jobs()
+        code = re.search(r"\d{5}", mail.outbox[0].body).group()
+        PasswordResetCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.client.post(reverse("verify_code"), {"code": code})
+        self.assertRedirects(response, reverse("forgot_password"))
+        self.assertFalse(self.client.session.get("code_verified"))
+
+    def test_unknown_email_queues_nothing(self):
+        from core.models import Job
+
+        response = self.client.post(reverse("forgot_password"), {"email": "nobody@example.com"})
+        self.assertRedirects(response, reverse("verify_code"))
+        self.assertFalse(Job.objects.exists())
@@ -3,13 +3,17 @@ from django.contrib.auth import authenticate, login as auth_login, logout as aut
 from django.contrib import messages
 from django.contrib.auth import get_user_model, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
+from django.contrib.auth.hashers import check_password
 from django.db import transaction
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
-import random
-import time
+from django.utils import timezone
+
+from core.jobs import enqueue
+from core.stats import invalidate_admin_dashboard_stats
+from .models import PasswordResetCode
+from .tasks import send_password_reset_code
 
 User = get_user_model()
 
@@ -73,6 +77,7 @@ def register(request):
             # elif user_role == 'admin':
             #     user.is_staff = True
             user.save()
+            invalidate_admin_dashboard_stats()
         messages.success(request, "Your registration request has been sent. Please wait for admin approval.")
         return redirect("waiting_approval")
     return render(request, "accounts/register.html")
@@ -128,42 +133,34 @@ def waiting_approval(request):
 def forgot_password(request):
     if request.method == "POST":
         email = request.POST.get("email")
-        try:
-            user = User.objects.get(email=email)
-            code = str(random.randint(10000, 99999))
-
-            request.session['reset_email'] = email
-            request.session['reset_code'] = code
-            request.session['reset_expires'] = time.time() + 180  # 5 minutes
-            send_mail(
-                'Password Reset Code',
-                f'Your reset code is: {code}',
-                'noreply@yourdomain.com',
-                [email],
-                fail_silently=False,
-            )
-
-        except User.DoesNotExist:
-            # We do nothing here, but still redirect to 'verify_code' 
-            # so attackers don't know if the email exists.
-            pass
+        request.session['reset_email'] = email
+        user = User.objects.filter(email=email).first()
+        if user is not None:
+            # The task makes the code, stores its hash and mails it, so
+            # the code is never in the job's kwargs. A worker runs it, or
+            # this request when none is running
+            enqueue(send_password_reset_code, user_id=str(user.id), inline_without_worker=True)
+        # Redirect either way so attackers don't know if the email exists.
         messages.info(request, "If an account exists with that email, a code has been sent.")
         return redirect('verify_code')
     return render(request, 'accounts/forgot_password.html')
 
 def verify_code(request):
     if request.method == "POST":
-        input_code = request.POST.get("code")
-        stored_code = request.session.get('reset_code')
-        expires_at = request.session.get('reset_expires', 0)
+        input_code = request.POST.get("code") or ''
+        reset = PasswordResetCode.objects.filter(
+            user__email=request.session.get('reset_email'),
+        ).first()
 
         # 2. Check if the code is expired
-        if time.time() > expires_at:
+        if reset is not None and reset.expires_at < timezone.now():
+            reset.delete()
             messages.error(request, "The code has expired. Please request a new one.")
             return redirect('forgot_password')
 
         # 3. Check if the code is correct
-        if stored_code and input_code == stored_code:
+        if reset is not None and check_password(input_code, reset.code_hash):
+            reset.delete()
             request.session['code_verified'] = True
             return redirect('reset_password')
         else:
@@ -199,7 +196,7 @@ def reset_password(request):
                 user.save()
 
             # 3. Clean up the session so these keys can't be reused
-            keys_to_delete = ['reset_code', 'reset_email', 'reset_expires', 'code_verified']
+            keys_to_delete = ['reset_email', 'code_verified']
             for key in keys_to_delete:
                 if key in request.session:
                     del request.session[key]
@@ -1,3 +1,38 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .jobs import task_name
+from .models import Job
+from .tasks import send_emails
+
+# Tasks whose kwargs hold message text, not shown in the admin
+REDACTED_TASKS = {task_name(send_emails)}
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'max_attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'dedup_key']
+    exclude = ['output', 'output_file', 'kwargs']
+    readonly_fields = [
+        'task', 'shown_kwargs', 'dedup_key', 'status', 'attempts', 'max_attempts', 'run_after',
+        'locked_by', 'locked_at', 'result', 'error', 'created_by', 'created_at', 'finished_at',
+    ]
+    actions = ['retry_jobs']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('output').select_related('created_by')
+
+    @admin.display(description="Kwargs")
+    def shown_kwargs(self, obj):
+        if obj.task in REDACTED_TASKS:
+            return "(hidden: email contents)"
+        return obj.kwargs
+
+    @admin.action(description="Retry the selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now(), error='', finished_at=None,
+        )
+        self.message_user(request, f"Queued {retried} job(s) again.")
@@ -3,11 +3,9 @@
 def unread_notifications(request):
     """
     Injects unread_count into every template automatically.
-    Used by the nav badge.
+    Used by the nav badge. Read from the user's denormalized counter
+    (see core/notifications.py), so it costs no query.
     """
     if request.user.is_authenticated:
-        count = request.user.notifications.filter(
-            is_read=False
-        ).count()
-        return {'unread_notifications_count': count}
-    return {'unread_notifications_count': 0}
\ No newline at end of file
+        return {'unread_notifications_count': request.user.unread_notification_count}
+    return {'unread_notifications_count': 0}
@@ -0,0 +1,66 @@
+# core/home.py
+"""
+The home page's school-wide figures, and the whole page for anonymous
+visitors, cached under one version.
+
+home_stats() holds what is the same for every visitor: member student
+and teacher counts, the current year and its class count, and today's
+attendance. It is cached under the current home version, for
+HOME_CACHE_TIMEOUT seconds at most, so today's attendance is never
+more than that behind.
+
+Anonymous visitors all see the same page, so it is rendered once per
+version and served from the cache (see core.views.home). The receivers
+in core/signals.py start a new version when a user, class, academic
+year or announcement is written or deleted, which drops the figures
+and the cached page together. The version lives in the shared cache
+(settings.CACHES), so every web process moves to it at once.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.models import CustomUser
+from academics.models import AcademicYear, Class
+from teachers.analytics import get_today_attendance_summary
+
+HOME_CACHE_TIMEOUT = 60
+HOME_VERSION_KEY = 'home-version'
+
+
+def home_version():
+    return cache.get_or_set(HOME_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def build_home_stats():
+    """The uncached figures."""
+    current_year = AcademicYear.objects.filter(is_current=True).first()
+    today_summary = get_today_attendance_summary()
+    return {
+        'total_students':   CustomUser.objects.filter(is_student=True, is_member_of_this_school=True).count(),
+        'total_teachers':   CustomUser.objects.filter(is_teacher=True, is_member_of_this_school=True).count(),
+        'total_classes':    Class.objects.filter(academic_year=current_year).count() if current_year else 0,
+        'current_year':     current_year,
+        'today_percentage': today_summary['percentage'],
+        'today_total':      today_summary['total'],
+    }
+
+
+def home_stats():
+    """The cached figures, built on a miss."""
+    key = f"home-stats:{home_version()}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_home_stats()
+        cache.set(key, stats, HOME_CACHE_TIMEOUT)
+    return stats
+
+
+def home_page_cache_key():
+    return f"home-page:{home_version()}"
+
+
+def invalidate_home():
+    """A new version once the current transaction commits: cached figures and page are ignored."""
+    transaction.on_commit(lambda: cache.set(HOME_VERSION_KEY, uuid.uuid4().hex, None))
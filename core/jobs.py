@@ -0,0 +1,269 @@
+# core/jobs.py
+"""
+A small job queue kept in the database, so slow work (PDFs, emails,
+notification fan-out) leaves the request and needs nothing but the
+configured database.
+
+  1. A task is a plain function marked with @job. Its arguments must be
+     JSON-serialisable.
+  2. enqueue(task, **kwargs) stores a Job row and returns it.
+  3. `python manage.py runworker` claims queued jobs and runs them in a
+     thread pool. A failed job is retried with exponential backoff, up
+     to the task's max_attempts. While a job runs, the worker refreshes
+     its locked_at every JOB_HEARTBEAT, however long the job takes. A
+     job whose locked_at is older than JOB_TIMEOUT was left by a worker
+     that died, and is queued again.
+
+A task returns a JSON-serialisable value, which is stored in
+Job.result. When it returns a dict with an 'output' key, that file goes
+to the job instead, and the rest of the dict stays in result.
+'content_type' and 'filename' there are used when the file is
+downloaded. Bytes (a single PDF) are kept in Job.output. A django File
+(an archive of any size, written to a temporary file) is saved to
+default_storage and only its name is kept, in Job.output_file; the file
+is deleted with the job.
+
+Claiming a job is one conditional UPDATE (queued → running). Two
+workers cannot both win it. On PostgreSQL, SELECT … FOR UPDATE SKIP
+LOCKED picks the candidates, so workers do not contend for the same
+rows.
+
+With JOBS_RUN_INLINE = True, enqueue() runs the job straight away in
+the calling process. Use it in development without a worker, and in
+tests.
+
+A running worker marks itself seen in the cache every JOB_HEARTBEAT,
+even when idle (worker_seen). When none has been seen for WORKER_TIMEOUT,
+worker_running() is False: job_status reports queued jobs as stalled
+instead of leaving the waiting page to spin, and enqueue(...,
+inline_without_worker=True) runs small tasks in the request instead.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_TIMEOUT = timedelta(minutes=10)      # no heartbeat for this long → worker presumed dead
+JOB_HEARTBEAT = timedelta(minutes=1)     # how often a worker refreshes locked_at of its running jobs
+JOB_RETRY_DELAY = timedelta(seconds=30)  # doubled after each failed attempt
+JOB_RETENTION = timedelta(days=7)        # finished jobs are pruned after this
+WORKER_TIMEOUT = timedelta(minutes=3)    # no worker seen for this long → none is running
+WORKER_SEEN_KEY = 'jobs-worker-seen'
+
+
+def job(max_attempts=3):
+    """Marks a function as a task that enqueue() accepts."""
+    def decorator(func):
+        func.is_job = True
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def task_name(task):
+    return f"{task.__module__}.{task.__name__}"
+
+
+def enqueue(task, *, created_by=None, dedup_key='', delay=None, inline_without_worker=False, **kwargs):
+    """
+    Queues task(**kwargs) and returns the Job.
+
+    dedup_key: while a job with this key is queued, running or
+               succeeded, it is returned instead of a new one.
+    delay:     a timedelta to wait before the first run.
+    inline_without_worker:
+               run it in this process, as JOBS_RUN_INLINE does, when no
+               worker is running. For tasks quick enough for a request.
+    """
+    if not getattr(task, 'is_job', False):
+        raise ValueError(f"{task!r} is not a @job task")
+    if dedup_key:
+        existing = (
+            Job.objects
+            .filter(dedup_key=dedup_key)
+            .exclude(status=Job.FAILED)
+            .order_by('-created_at')
+            .first()
+        )
+        if existing:
+            return existing
+    new_job = Job.objects.create(
+        task=task_name(task),
+        kwargs=kwargs,
+        dedup_key=dedup_key,
+        max_attempts=task.max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+        created_by=created_by,
+    )
+    run_inline = getattr(settings, 'JOBS_RUN_INLINE', False) or (inline_without_worker and not worker_running())
+    if run_inline and not delay:
+        Job.objects.filter(pk=new_job.pk).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, locked_by='inline', locked_at=timezone.now(),
+        )
+        new_job.refresh_from_db()
+        run_job(new_job)
+    return new_job
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Marks up to `limit` due jobs as running for this worker and returns
+    them, oldest first.
+    """
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).order_by('run_after', 'created_at')
+    claim = dict(status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(pk__in=ids).update(**claim)
+    else:
+        ids = []
+        for pk in due.values_list('id', flat=True)[:limit * 2]:
+            # Lost to another worker if it is no longer queued
+            if Job.objects.filter(pk=pk, status=Job.QUEUED).update(**claim):
+                ids.append(pk)
+            if len(ids) == limit:
+                break
+    return sorted(Job.objects.filter(pk__in=ids), key=lambda j: (j.run_after, j.created_at))
+
+
+def run_job(claimed):
+    """
+    Runs one claimed (running) job and records the outcome: succeeded,
+    queued again for a retry, or failed for good.
+    """
+    try:
+        task = import_string(claimed.task)
+        if not getattr(task, 'is_job', False):
+            raise ValueError(f"{claimed.task} is not a @job task")
+    except (ImportError, ValueError) as e:
+        # Retrying cannot help
+        _finish(claimed, Job.FAILED, error=str(e))
+        return claimed
+
+    output, output_file = None, ''
+    try:
+        # A failed attempt leaves no partial writes behind for the retry
+        with transaction.atomic():
+            result = task(**claimed.kwargs)
+        if isinstance(result, dict) and 'output' in result:
+            result = dict(result)
+            output = result.pop('output')
+            if isinstance(output, File):
+                output_file = _store_output(claimed, output, result.get('filename'))
+                output = None
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(f"Job {claimed.pk} ({claimed.task}) failed, attempt {claimed.attempts}: {error}")
+        if claimed.attempts < claimed.max_attempts:
+            retry_at = timezone.now() + JOB_RETRY_DELAY * 2 ** (claimed.attempts - 1)
+            _finish(claimed, Job.QUEUED, error=error, run_after=retry_at, finished_at=None)
+        else:
+            _finish(claimed, Job.FAILED, error=error)
+        return claimed
+
+    _finish(claimed, Job.SUCCEEDED, result=result, output=output, output_file=output_file, error='')
+    return claimed
+
+
+def _store_output(claimed, file, filename=None):
+    """Saves a job's File output to default_storage and returns its name."""
+    try:
+        file.seek(0)
+        return default_storage.save(f"job_output/{claimed.pk}/{filename or 'output'}", file)
+    finally:
+        file.close()
+
+
+def _finish(claimed, status, **fields):
+    fields = {'finished_at': timezone.now(), 'locked_by': '', 'locked_at': None, **fields}
+    Job.objects.filter(pk=claimed.pk).update(status=status, **fields)
+    claimed.status = status
+    for name, value in fields.items():
+        setattr(claimed, name, value)
+
+
+def run_claimed(claimed):
+    """run_job() for a worker thread, with its own database connection."""
+    close_old_connections()
+    try:
+        return run_job(claimed)
+    finally:
+        close_old_connections()
+
+
+def heartbeat(worker_id, job_ids):
+    """Marks these running jobs of this worker as still alive. Returns the number touched."""
+    if not job_ids:
+        return 0
+    return Job.objects.filter(pk__in=job_ids, status=Job.RUNNING, locked_by=worker_id).update(
+        locked_at=timezone.now(),
+    )
+
+
+def worker_seen(worker_id):
+    """Records that this worker is alive. Called by runworker every JOB_HEARTBEAT."""
+    cache.set(WORKER_SEEN_KEY, worker_id, WORKER_TIMEOUT.total_seconds())
+
+
+def worker_running():
+    """True when some worker has been seen within WORKER_TIMEOUT."""
+    return cache.get(WORKER_SEEN_KEY) is not None
+
+
+def requeue_stale_jobs(timeout=JOB_TIMEOUT):
+    """
+    Running jobs without a heartbeat for `timeout` were left by a worker
+    that died. They are queued again, or failed if out of attempts.
+    Returns the number recovered.
+    """
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=timezone.now() - timeout)
+    error = "Worker stopped before the job finished."
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error=error, locked_by='', locked_at=None, finished_at=timezone.now(),
+    )
+    queued = stale.update(status=Job.QUEUED, error=error, locked_by='', locked_at=None)
+    return failed + queued
+
+
+def prune_jobs(older_than=JOB_RETENTION):
+    """
+    Deletes finished jobs older than `older_than`, and their files in
+    storage. Returns the number of jobs deleted.
+    """
+    expired = Job.objects.filter(
+        status__in=[Job.SUCCEEDED, Job.FAILED],
+        finished_at__lt=timezone.now() - older_than,
+    )
+    files = list(expired.exclude(output_file='').values_list('output_file', flat=True))
+    deleted, _ = expired.delete()
+    for name in files:
+        default_storage.delete(name)
+    return deleted
+
+
+def run_pending_jobs(worker_id='inline'):
+    """Runs every due job in this process, one at a time, until none is left. Returns the count."""
+    done = 0
+    while True:
+        claimed = claim_jobs(worker_id, 1)
+        if not claimed:
+            return done
+        run_job(claimed[0])
+        done += 1
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from core.notifications import find_stale_unread_counts, recount_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Check each user's unread notification counter against their notifications and optionally repair it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help="Recount every user that is out of step")
+
+    def handle(self, *args, **options):
+        stale_ids = []
+        for user_id, username, stored, expected in find_stale_unread_counts():
+            stale_ids.append(user_id)
+            self.stdout.write(f"{username}: stored {stored} expected {expected}")
+
+        if not stale_ids:
+            self.stdout.write(self.style.SUCCESS("All unread notification counters are consistent."))
+            return
+
+        if options['repair']:
+            repaired = recount_unread_counts(CustomUser.objects.filter(id__in=stale_ids))
+            self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} user(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(stale_ids)} user(s) out of step. Run again with --repair to fix."
+            ))
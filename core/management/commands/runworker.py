@@ -0,0 +1,108 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from core.jobs import (
+    JOB_HEARTBEAT, claim_jobs, heartbeat, prune_jobs, requeue_stale_jobs, run_claimed, worker_seen,
+)
+
+HOUSEKEEPING_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (see core/jobs.py). Stops cleanly on SIGINT/SIGTERM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Jobs run at once, in threads (default: 4)")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due, instead of waiting")
+        parser.add_argument('--worker-id', default=f"{socket.gethostname()}:{os.getpid()}")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker_id = options['worker_id']
+        self.stopping = False
+        previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        self.stdout.write(f"Worker {worker_id} started, concurrency {concurrency}.")
+
+        running = {}   # future → job id
+        ran = 0
+        last_housekeeping = 0
+        last_heartbeat = time.monotonic()
+        last_seen = None
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                while not self.stopping:
+                    last_seen = self.mark_seen(worker_id, last_seen)
+                    if time.monotonic() - last_housekeeping > HOUSEKEEPING_INTERVAL:
+                        recovered, pruned = requeue_stale_jobs(), prune_jobs()
+                        if recovered or pruned:
+                            self.stdout.write(f"Requeued {recovered} stale job(s), pruned {pruned} old job(s).")
+                        last_housekeeping = time.monotonic()
+
+                    for job in claim_jobs(worker_id, concurrency - len(running)):
+                        running[pool.submit(run_claimed, job)] = job.pk
+                    if not running:
+                        if options['burst']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    ran += self.collect(done, running)
+                    last_heartbeat = self.beat(worker_id, running, last_heartbeat)
+
+                # Let the jobs in hand finish, still beating so they are not taken for dead
+                while running:
+                    done, _ = wait(running, timeout=options['poll_interval'])
+                    ran += self.collect(done, running)
+                    last_heartbeat = self.beat(worker_id, running, last_heartbeat)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        self.stdout.write(f"Worker {worker_id} stopped after {ran} job(s).")
+
+    def collect(self, done, running):
+        """Reports finished jobs and drops them from `running`. Returns how many."""
+        for future in done:
+            del running[future]
+            try:
+                job = future.result()
+            except Exception as e:
+                # Recording the outcome failed; requeue_stale_jobs picks it up
+                self.stderr.write(f"Job bookkeeping failed: {e}")
+                continue
+            self.stdout.write(f"{job.status:>9}  {job.task}  {job.pk}")
+        return len(done)
+
+    def beat(self, worker_id, running, last_heartbeat):
+        """Refreshes locked_at of the running jobs every JOB_HEARTBEAT."""
+        if running and time.monotonic() - last_heartbeat >= JOB_HEARTBEAT.total_seconds():
+            try:
+                heartbeat(worker_id, list(running.values()))
+            except DatabaseError as e:
+                # e.g. SQLite busy with a job's own write; try again next beat
+                self.stderr.write(f"Heartbeat failed: {e}")
+                return last_heartbeat
+            return time.monotonic()
+        return last_heartbeat
+
+    def mark_seen(self, worker_id, last_seen):
+        """Tells the web processes a worker is running, every JOB_HEARTBEAT, busy or idle."""
+        if last_seen is None or time.monotonic() - last_seen >= JOB_HEARTBEAT.total_seconds():
+            try:
+                worker_seen(worker_id)
+            except DatabaseError as e:
+                self.stderr.write(f"Marking the worker seen failed: {e}")
+                return last_seen
+            return time.monotonic()
+        return last_seen
+
+    def stop(self, signum, frame):
+        self.stdout.write("Stopping after the running jobs finish…")
+        self.stopping = True
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='output_file',
+            field=models.FileField(blank=True, default='', help_text='A large file produced by the job, kept in storage rather than in the row', max_length=255, upload_to='job_output/'),
+        ),
+    ]
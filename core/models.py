@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 import uuid
@@ -47,6 +48,20 @@ class Announcement(models.Model):
     def short_body(self):
         return self.body[:120] + '...' if len(self.body) > 120 else self.body
 
+    def recipients(self):
+        """Active users in the target audience, except the poster."""
+        from accounts.models import CustomUser
+        audience = {
+            'all':      {'is_member_of_this_school': True},
+            'students': {'is_student': True, 'is_member_of_this_school': True},
+            'teachers': {'is_teacher': True, 'is_member_of_this_school': True},
+            'parents':  {'is_parent': True, 'is_member_of_this_school': True},
+            'staff':    {'is_staff': True},
+        }
+        if self.target not in audience:
+            return CustomUser.objects.none()
+        return CustomUser.objects.filter(is_active=True, **audience[self.target]).exclude(pk=self.posted_by_id)
+
 class Notification(models.Model):
     TYPE_CHOICES = [
         ('attendance',    'Attendance'),
@@ -81,9 +96,101 @@ class Notification(models.Model):
         Central factory method — always use this to create notifications.
         Keeps all creation logic in one place.
         """
-        return cls.objects.create(
+        from .notifications import bump_unread_counts
+        notification = cls.objects.create(
             recipient=recipient,
             title=title,
             body=body,
             notif_type=notif_type,
-        )
\ No newline at end of file
+        )
+        bump_unread_counts([recipient.pk])
+        return notification
+
+    @classmethod
+    def bulk_send(cls, notifications, batch_size=None):
+        """send() for many unsaved notifications: one bulk_create, plus the unread counters."""
+        from .notifications import bump_unread_counts
+        notifications = cls.objects.bulk_create(notifications, batch_size=batch_size)
+        bump_unread_counts(notification.recipient_id for notification in notifications)
+        return notifications
+
+    def mark_read(self):
+        """Marks this notification read, once: a repeat does not touch the counter."""
+        from .notifications import bump_unread_counts
+        if Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True):
+            bump_unread_counts([self.recipient_id], by=-1)
+        self.is_read = True
+
+    @classmethod
+    def mark_all_read(cls, user):
+        """Marks every unread notification of the user read. Returns how many were."""
+        from .notifications import bump_unread_counts
+        marked = user.notifications.filter(is_read=False).update(is_read=True)
+        if marked:
+            # Subtract what was marked rather than zeroing: a notification
+            # sent meanwhile stays counted
+            bump_unread_counts([user.pk], by=-marked)
+        user.unread_notification_count = max(user.unread_notification_count - marked, 0)
+        return marked
+
+
+class Job(models.Model):
+    """
+    One unit of background work, queued in the database and run by
+    `python manage.py runworker` (see core/jobs.py).
+    """
+    QUEUED    = 'queued'
+    RUNNING   = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED    = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED,    'Queued'),
+        (RUNNING,   'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED,    'Failed'),
+    ]
+
+    id           = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task         = models.CharField(max_length=200, help_text="Dotted path of the @job function")
+    kwargs       = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    dedup_key    = models.CharField(
+        max_length=200, blank=True, default='', db_index=True,
+        help_text="Jobs sharing a key are enqueued once while one is pending or succeeded",
+    )
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts     = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after    = models.DateTimeField(default=timezone.now)
+    locked_by    = models.CharField(max_length=100, blank=True, default='')
+    locked_at    = models.DateTimeField(null=True, blank=True)
+    result       = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    output       = models.BinaryField(null=True, blank=True, help_text="File produced by the job, e.g. a PDF")
+    output_file  = models.FileField(
+        upload_to='job_output/', max_length=255, blank=True, default='',
+        help_text="A large file produced by the job, kept in storage rather than in the row",
+    )
+    error        = models.TextField(blank=True, default='')
+    created_by   = models.ForeignKey(
+        'accounts.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+    )
+    created_at   = models.DateTimeField(auto_now_add=True)
+    finished_at  = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
@@ -0,0 +1,75 @@
+# core/notifications.py
+"""
+The per-user unread notification counter
+(CustomUser.unread_notification_count), read by the nav badge context
+processor instead of a COUNT on every render.
+
+Every write goes through Notification:
+
+  Notification.send / bulk_send    → +1 per notification
+  notification.mark_read()          → -1 if it was unread
+  Notification.mark_all_read(user)  → minus the number marked
+
+Each change is one UPDATE relative to the stored value, so concurrent
+writers do not lose each other's changes. Anything that bypasses these
+(deleting notifications, raw updates) leaves the counter out of step
+until `python manage.py reconcile_unread_counts --repair`.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from accounts.models import CustomUser
+from .models import Notification
+
+
+def bump_unread_counts(recipient_ids, by=1):
+    """
+    Adds `by` to the counter once per id (an id listed twice gets
+    2 * by). Recipients are grouped by amount, so a fan-out to every
+    user costs one UPDATE per 1000 recipients.
+    """
+    by_amount = {}
+    for recipient_id, times in Counter(recipient_ids).items():
+        by_amount.setdefault(times * by, []).append(recipient_id)
+    for amount, ids in by_amount.items():
+        for start in range(0, len(ids), 1000):
+            CustomUser.objects.filter(pk__in=ids[start:start + 1000]).update(
+                unread_notification_count=Greatest(F('unread_notification_count') + amount, 0),
+            )
+
+
+def _expected_unread_count():
+    return Coalesce(
+        Subquery(
+            Notification.objects
+            .filter(recipient=OuterRef('pk'), is_read=False)
+            .order_by()
+            .values('recipient')
+            .annotate(n=Count('pk'))
+            .values('n')
+        ),
+        Value(0),
+    )
+
+
+def find_stale_unread_counts(users=None):
+    """Yields (user_id, username, stored, expected) for every user whose counter is wrong."""
+    if users is None:
+        users = CustomUser.objects.all()
+    rows = (
+        users
+        .annotate(expected=_expected_unread_count())
+        .filter(~Q(unread_notification_count=F('expected')))
+        .values_list('id', 'username', 'unread_notification_count', 'expected')
+        .order_by()
+    )
+    yield from rows.iterator(chunk_size=1000)
+
+
+def recount_unread_counts(users=None):
+    """Sets the counter from the Notification rows, in one UPDATE. Returns the number of users."""
+    if users is None:
+        users = CustomUser.objects.all()
+    return users.update(unread_notification_count=_expected_unread_count())
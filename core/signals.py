@@ -0,0 +1,26 @@
+# core/signals.py
+"""
+Starts a new home page version (core/home.py) when something the home
+page shows is written or deleted: a user (the member counts), a class,
+an academic year or an announcement.
+
+Logins only touch last_login, which the page does not show, so they
+leave the cache alone.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .home import invalidate_home
+from .models import Announcement
+from accounts.models import CustomUser
+from academics.models import AcademicYear, Class
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Class)
+@receiver([post_save, post_delete], sender=AcademicYear)
+@receiver([post_save, post_delete], sender=Announcement)
+def home_data_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_home()
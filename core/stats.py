@@ -0,0 +1,127 @@
+# core/stats.py
+"""
+The admin dashboard's figures, computed together and cached.
+
+user_counts() reads every headline count (pending registrations by
+role, school totals) from one conditional-aggregate query over
+CustomUser. admin_dashboard_stats() adds the pending table, the
+attendance charts and summaries and the grade distribution, and keeps
+the whole payload for ADMIN_DASHBOARD_CACHE_TIMEOUT seconds (settings,
+default 60), so an admin refreshing the page all day mostly hits the
+cache.
+
+Approving or rejecting users, and new registrations, drop the payload
+straight away (invalidate_admin_dashboard_stats). The cache is shared
+by every process (settings.CACHES), so the drop reaches all web
+workers, not only the one that handled the approval. Attendance marked
+since it was cached shows up when it expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from accounts.models import CustomUser
+from academics.models import AcademicYear
+from teachers.analytics import (
+    get_last_7_days_attendance,
+    get_today_attendance_summary,
+    get_last_7_days_teacher_attendance,
+    get_today_teacher_attendance_summary,
+)
+from teachers.grade_analytics import get_grade_distribution
+
+ADMIN_STATS_KEY = 'admin-dashboard-stats'
+
+
+def user_counts():
+    """
+    {'pending_count', 'pending_students', 'pending_teachers',
+     'total_students', 'total_teachers'} in one query.
+    """
+    pending = Q(is_member_of_this_school=False) & ~Q(status='rejected')
+    member = Q(is_member_of_this_school=True)
+    return CustomUser.objects.aggregate(
+        pending_count=Count('pk', filter=pending),
+        pending_students=Count('pk', filter=pending & Q(is_student=True)),
+        pending_teachers=Count('pk', filter=pending & Q(is_teacher=True)),
+        total_students=Count('pk', filter=member & Q(is_student=True)),
+        total_teachers=Count('pk', filter=member & Q(is_teacher=True)),
+    )
+
+
+def pending_users_table():
+    """Pending registrations as JSON-ready dicts for the search/sort table."""
+    pending_users_list = list(
+        CustomUser.objects
+        .filter(is_member_of_this_school=False).exclude(status='rejected')
+        .order_by('-date_joined')
+        .values(
+            'id', 'username', 'email', 'phone_number', 'date_joined',
+            'first_name', 'last_name', 'is_student', 'is_teacher',
+        )
+    )
+    # Convert UUIDs and Dates to strings for JSON compatibility
+    for user in pending_users_list:
+        user['id'] = str(user['id'])
+        user['date_joined'] = user['date_joined'].strftime('%Y-%m-%dT%H:%M:%S')
+        user['full_name'] = f"{user['first_name']} {user['last_name']}".strip() or user['username']
+        if user['is_student']:
+            user['role'] = 'student'
+        elif user['is_teacher']:
+            user['role'] = 'teacher'
+        else:
+            user['role'] = 'student'  # safe default
+    return pending_users_list
+
+
+def build_admin_dashboard_stats():
+    """The uncached admin dashboard context."""
+    student_chart   = get_last_7_days_attendance()
+    teacher_chart   = get_last_7_days_teacher_attendance()
+    student_today   = get_today_attendance_summary()
+    teacher_today   = get_today_teacher_attendance_summary()
+    current_year_id = AcademicYear.objects.filter(is_current=True).values_list('id', flat=True).first()
+
+    return {
+        # Pending registrations and school totals
+        **user_counts(),
+        # Student chart (last 7 days)
+        'attendance_chart_labels':  student_chart['labels'],
+        'attendance_chart_present': student_chart['present'],
+        'attendance_chart_absent':  student_chart['absent'],
+        # Teacher chart (last 7 days)
+        'teacher_chart_labels':  teacher_chart['labels'],
+        'teacher_chart_present': teacher_chart['present'],
+        'teacher_chart_absent':  teacher_chart['absent'],
+        # Student today summary
+        'today_present':    student_today['present'],
+        'today_absent':     student_today['absent'],
+        'today_total':      student_today['total'],
+        'today_percentage': student_today['percentage'],
+        # Teacher today summary
+        'teacher_today_present':    teacher_today['present'],
+        'teacher_today_absent':     teacher_today['absent'],
+        'teacher_today_recorded':   teacher_today['total_recorded'],
+        'teacher_today_total':      teacher_today['total_teachers'],
+        'teacher_today_not_marked': teacher_today['not_marked'],
+        'teacher_today_percentage': teacher_today['percentage'],
+        # Grade distribution (current year, all subjects)
+        'grade_chart': get_grade_distribution(current_year_id) if current_year_id else None,
+        # Pending users for JS table
+        'pending_users_json': pending_users_table(),
+    }
+
+
+def admin_dashboard_stats():
+    """The cached admin dashboard context, built on a miss."""
+    stats = cache.get(ADMIN_STATS_KEY)
+    if stats is None:
+        stats = build_admin_dashboard_stats()
+        cache.set(ADMIN_STATS_KEY, stats, getattr(settings, 'ADMIN_DASHBOARD_CACHE_TIMEOUT', 60))
+    return stats
+
+
+def invalidate_admin_dashboard_stats():
+    """Drops the cached payload once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(ADMIN_STATS_KEY))
@@ -0,0 +1,38 @@
+# core/tasks.py
+"""
+Background tasks for announcements and email (see core/jobs.py).
+"""
+from django.core.mail import send_mass_mail
+
+from .jobs import job
+from .models import Announcement, Notification
+
+
+@job(max_attempts=5)
+def send_emails(messages):
+    """
+    messages: [subject, body, from_email, [recipient, ...]] lists, as
+    send_mass_mail() takes them. Sent over one SMTP connection.
+    """
+    sent = send_mass_mail([tuple(message) for message in messages], fail_silently=False)
+    return {'sent': sent}
+
+
+@job()
+def fan_out_announcement(announcement_id):
+    """One notification per recipient of a new announcement."""
+    announcement = Announcement.objects.filter(pk=announcement_id).first()
+    if announcement is None:
+        # Deleted before the job ran
+        return {'sent': 0}
+    notifications = [
+        Notification(
+            recipient_id=recipient_id,
+            title=f"New announcement: {announcement.title}",
+            body=announcement.short_body,
+            notif_type='announcement',
+        )
+        for recipient_id in announcement.recipients().values_list('id', flat=True).iterator()
+    ]
+    Notification.bulk_send(notifications, batch_size=1000)
+    return {'sent': len(notifications)}
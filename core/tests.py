@@ -1,3 +1,496 @@
-from django.test import TestCase
+"""
+core/tests.py
 
-# Create your tests here.
+Tests for the Core app — covering:
+  - The background job queue: enqueue, claiming, retries, stale jobs
+  - The runworker command
+  - Job status polling and file download
+  - Announcement notification fan-out
+  - Cached admin dashboard statistics
+  - Cached home page figures and anonymous home page
+  - Denormalized unread notification counters
+
+Run with:
+    python manage.py test core
+"""
+
+import tempfile
+from datetime import timedelta
+from itertools import count as _count
+
+from django.core.cache import cache
+from django.core.files import File
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from core.jobs import (
+    claim_jobs, enqueue, heartbeat, job, prune_jobs, requeue_stale_jobs, run_job, run_pending_jobs,
+    worker_running, worker_seen,
+)
+from core.models import Announcement, Job, Notification
+from core.home import home_stats
+from core.stats import admin_dashboard_stats, user_counts
+
+_seq = _count(1)
+
+
+# ─────────────────────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────────────────────
+
+def make_user(username, **flags):
+    seq = next(_seq)
+    user = CustomUser.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="testpass123",
+        phone_number=f"06{seq:09d}",
+        national_id=f"66{seq:09d}",
+    )
+    user.is_active = True
+    user.is_member_of_this_school = True
+    user.status = "approved"
+    for attr, val in flags.items():
+        setattr(user, attr, val)
+    user.save()
+    return user
+
+
+def app_queries(ctx):
+    """Captured queries other than reads and writes of the database cache."""
+    return [q["sql"] for q in ctx.captured_queries if "django_cache" not in q["sql"]]
+
+
+# Tasks used by the tests. They live at module level so a worker can
+# import them by their dotted path, like any other task.
+_calls = []
+
+
+@job()
+def record_call(value):
+    _calls.append(value)
+    return {'value': value, 'output': b'file-bytes', 'content_type': 'text/plain', 'filename': 'out.txt'}
+
+
+@job()
+def write_big_file():
+    file = File(tempfile.TemporaryFile(), name='big.bin')
+    file.write(b'big-file-bytes')
+    return {'output': file, 'content_type': 'application/octet-stream', 'filename': 'big.bin'}
+
+
+@job(max_attempts=2)
+def always_fails():
+    raise RuntimeError("boom")
+
+
+def not_a_task():
+    pass
+
+
+# ─────────────────────────────────────────────────────────────
+# 1. JOB QUEUE
+# ─────────────────────────────────────────────────────────────
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        _calls.clear()
+
+    def test_enqueued_job_waits_for_a_worker(self):
+        queued = enqueue(record_call, value=1)
+        self.assertEqual(queued.status, Job.QUEUED)
+        self.assertEqual(_calls, [])
+
+        self.assertEqual(run_pending_jobs(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(_calls, [1])
+        self.assertEqual(queued.status, Job.SUCCEEDED)
+        self.assertEqual(queued.attempts, 1)
+        # The file is kept apart from the JSON result
+        self.assertEqual(queued.result, {'value': 1, 'content_type': 'text/plain', 'filename': 'out.txt'})
+        self.assertEqual(bytes(queued.output), b'file-bytes')
+
+    def test_only_job_functions_can_be_enqueued(self):
+        with self.assertRaises(ValueError):
+            enqueue(not_a_task)
+
+    def test_dedup_key_returns_the_pending_job(self):
+        first = enqueue(record_call, value=1, dedup_key="same")
+        self.assertEqual(enqueue(record_call, value=2, dedup_key="same"), first)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_delayed_job_is_not_claimed_early(self):
+        enqueue(record_call, value=1, delay=timedelta(minutes=5))
+        self.assertEqual(claim_jobs("w1", 5), [])
+
+    def test_a_job_is_claimed_once(self):
+        enqueue(record_call, value=1)
+        enqueue(record_call, value=2)
+        first = claim_jobs("w1", 1)
+        second = claim_jobs("w2", 5)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first[0].pk, second[0].pk)
+        self.assertEqual(claim_jobs("w3", 5), [])
+
+    def test_failed_job_is_retried_with_backoff_then_fails(self):
+        failing = enqueue(always_fails)
+        with self.assertLogs("core.jobs", level="WARNING"):
+            run_pending_jobs()
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, Job.QUEUED)
+        self.assertEqual(failing.attempts, 1)
+        self.assertGreater(failing.run_after, timezone.now())
+        self.assertIn("RuntimeError: boom", failing.error)
+
+        Job.objects.filter(pk=failing.pk).update(run_after=timezone.now())
+        with self.assertLogs("core.jobs", level="WARNING"):
+            run_pending_jobs()
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, Job.FAILED)
+        self.assertEqual(failing.attempts, 2)
+
+    def test_unknown_task_fails_without_retry(self):
+        broken = Job.objects.create(task="core.tests.not_a_task", status=Job.RUNNING, attempts=1)
+        run_job(broken)
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, Job.FAILED)
+
+    def test_heartbeat_keeps_a_long_job_from_being_requeued(self):
+        long_job = enqueue(record_call, value=1)
+        claim_jobs("busy-worker", 1)
+        Job.objects.filter(pk=long_job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(heartbeat("other-worker", [long_job.pk]), 0)   # not its job
+        self.assertEqual(heartbeat("busy-worker", [long_job.pk]), 1)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        long_job.refresh_from_db()
+        self.assertEqual(long_job.status, Job.RUNNING)
+
+    def test_admin_hides_email_job_kwargs(self):
+        from django.contrib.admin.sites import site
+        from core.tasks import send_emails
+
+        job_admin = site._registry[Job]
+        email_job = enqueue(send_emails, messages=[["Subject", "Secret body", "a@example.com", ["b@example.com"]]])
+        self.assertNotIn("Secret body", str(job_admin.shown_kwargs(email_job)))
+        self.assertEqual(job_admin.shown_kwargs(enqueue(record_call, value=1)), {"value": 1})
+
+    def test_job_left_by_a_dead_worker_is_queued_again(self):
+        stale = enqueue(record_call, value=1)
+        claim_jobs("dead-worker", 1)
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Job.QUEUED)
+
+
+class RunWorkerTests(TransactionTestCase):
+    """
+    The worker runs jobs in threads, each with its own database
+    connection, so the jobs must be committed first.
+    """
+
+    def setUp(self):
+        _calls.clear()
+        # The database cache table is not flushed between these tests
+        self.addCleanup(cache.clear)
+
+    def test_runworker_burst_runs_every_due_job(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        for value in range(3):
+            enqueue(record_call, value=value)
+        out = StringIO()
+        call_command("runworker", burst=True, concurrency=2, stdout=out)
+        self.assertEqual(sorted(_calls), [0, 1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), 3)
+        self.assertIn("stopped after 3 job(s)", out.getvalue())
+        # Web processes can tell a worker is running
+        self.assertTrue(worker_running())
+
+
+# ─────────────────────────────────────────────────────────────
+# 2. JOB STATUS ENDPOINTS
+# ─────────────────────────────────────────────────────────────
+
+class JobEndpointTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user("job_owner")
+        self.job = enqueue(record_call, value=1, created_by=self.owner)
+
+    def test_owner_polls_status_then_downloads(self):
+        self.client.force_login(self.owner)
+        data = self.client.get(reverse("job_status", args=[self.job.pk])).json()
+        self.assertEqual(data["job"]["status"], Job.QUEUED)
+        self.assertIsNone(data["job"]["output_url"])
+        self.assertEqual(self.client.get(reverse("job_output", args=[self.job.pk])).status_code, 404)
+
+        run_pending_jobs()
+        data = self.client.get(reverse("job_status", args=[self.job.pk])).json()
+        self.assertEqual(data["job"]["status"], Job.SUCCEEDED)
+        response = self.client.get(data["job"]["output_url"])
+        self.assertEqual(response.content, b"file-bytes")
+        self.assertEqual(response["Content-Type"], "text/plain")
+
+    def test_large_output_is_kept_in_storage_and_pruned_with_the_job(self):
+        from django.core.files.storage import default_storage
+
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            big = enqueue(write_big_file, created_by=self.owner)
+            run_pending_jobs()
+            big.refresh_from_db()
+            self.assertIsNone(big.output)
+            self.assertTrue(default_storage.exists(big.output_file.name))
+
+            self.client.force_login(self.owner)
+            data = self.client.get(reverse("job_status", args=[big.pk])).json()
+            response = self.client.get(data["job"]["output_url"])
+            self.assertEqual(b"".join(response.streaming_content), b"big-file-bytes")
+            self.assertIn('filename="big.bin"', response["Content-Disposition"])
+            response.close()
+
+            Job.objects.filter(pk=big.pk).update(finished_at=timezone.now() - timedelta(days=30))
+            prune_jobs()
+            self.assertFalse(Job.objects.filter(pk=big.pk).exists())
+            self.assertFalse(default_storage.exists(big.output_file.name))
+
+    def test_queued_job_is_reported_stalled_without_a_worker(self):
+        self.client.force_login(self.owner)
+        with self.assertLogs("core.views", "ERROR"):
+            data = self.client.get(reverse("job_status", args=[self.job.pk])).json()
+        self.assertTrue(data["job"]["stalled"])
+        self.assertEqual(data["job"]["error"], "No worker is running to start this job.")
+
+        worker_seen("w1")
+        data = self.client.get(reverse("job_status", args=[self.job.pk])).json()
+        self.assertFalse(data["job"]["stalled"])
+        self.assertIsNone(data["job"]["error"])
+
+    def test_small_tasks_run_inline_without_a_worker(self):
+        ran = enqueue(record_call, value=2, inline_without_worker=True)
+        self.assertEqual(ran.status, Job.SUCCEEDED)
+
+        worker_seen("w1")
+        queued = enqueue(record_call, value=3, inline_without_worker=True)
+        self.assertEqual(queued.status, Job.QUEUED)
+
+    def test_other_users_cannot_see_the_job(self):
+        self.client.force_login(make_user("someone_else"))
+        self.assertEqual(self.client.get(reverse("job_status", args=[self.job.pk])).status_code, 404)
+
+    def test_wait_page_ignores_offsite_next(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse("job_wait", args=[self.job.pk]), {"next": "https://evil.example/"})
+        self.assertEqual(response.context["next_url"], reverse("job_output", args=[self.job.pk]))
+
+
+# ─────────────────────────────────────────────────────────────
+# 3. ANNOUNCEMENT FAN-OUT
+# ─────────────────────────────────────────────────────────────
+
+class AnnouncementFanOutTests(TestCase):
+
+    def setUp(self):
+        self.staff = make_user("poster", is_staff=True)
+        self.student = make_user("reader", is_student=True)
+        self.teacher = make_user("teacher", is_teacher=True)
+        worker_seen("test-worker")
+
+    def test_notifications_are_written_by_the_worker(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse("announcement_create"), {
+            "title": "Sports day", "body": "Friday.", "target": "students",
+        })
+        self.assertRedirects(response, reverse("announcement_list"))
+        self.assertFalse(Notification.objects.exists())
+
+        run_pending_jobs()
+        self.assertEqual(
+            list(Notification.objects.values_list("recipient__username", flat=True)),
+            ["reader"],
+        )
+
+    def test_everyone_except_the_poster(self):
+        announcement = Announcement.objects.create(title="Hi", body="All", target="all", posted_by=self.staff)
+        self.assertEqual(
+            sorted(announcement.recipients().values_list("username", flat=True)),
+            ["reader", "teacher"],
+        )
+
+
+# ─────────────────────────────────────────────────────────────
+# 4. ADMIN DASHBOARD STATISTICS
+# ─────────────────────────────────────────────────────────────
+
+class AdminDashboardStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = make_user("stats_admin", is_staff=True)
+        make_user("member_student", is_student=True)
+        make_user("member_teacher", is_teacher=True)
+        self.pending = make_user("pending_student", is_student=True, is_member_of_this_school=False, status="pending")
+        make_user("pending_teacher", is_teacher=True, is_member_of_this_school=False, status="pending")
+        make_user("turned_away", is_student=True, is_member_of_this_school=False, status="rejected")
+
+    def test_headline_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = user_counts()
+        self.assertEqual(counts, {
+            "pending_count": 2, "pending_students": 1, "pending_teachers": 1,
+            "total_students": 1, "total_teachers": 1,
+        })
+
+    def test_refresh_is_served_from_cache(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.context["pending_count"], 2)
+        self.assertEqual(
+            sorted(u["username"] for u in response.context["pending_users_json"]),
+            ["pending_student", "pending_teacher"],
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            admin_dashboard_stats()
+        self.assertEqual(app_queries(ctx), [])
+
+    def test_approval_drops_the_cached_stats(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse("admin_dashboard"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("update_user_status"),
+                data={"action": "approve", "users": [{"id": str(self.pending.id), "role": "student"}]},
+                content_type="application/json",
+            )
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.context["pending_count"], 1)
+        self.assertEqual(response.context["total_students"], 2)
+
+
+# ─────────────────────────────────────────────────────────────
+# 5. HOME PAGE CACHE
+# ─────────────────────────────────────────────────────────────
+
+class HomePageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = make_user("home_admin", is_staff=True)
+        make_user("home_student", is_student=True)
+
+    def test_anonymous_page_is_served_from_the_cache(self):
+        first = self.client.get(reverse("home"))
+        self.assertEqual(first.context["total_students"], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(reverse("home"))
+        # The version and the page, both from the cache.
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(app_queries(ctx), [])
+        self.assertEqual(second.content, first.content)
+        self.assertIn("Cookie", second["Vary"])
+        self.assertIn("max-age=", second["Cache-Control"])
+
+    def test_new_announcement_replaces_the_cached_page(self):
+        self.client.get(reverse("home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(title="Open day", body="Saturday", target="all", posted_by=self.staff)
+        self.assertContains(self.client.get(reverse("home")), "Open day")
+
+    def test_logged_in_users_get_their_own_page_with_cached_figures(self):
+        self.client.get(reverse("home"))
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "home_admin")
+        self.assertIn("Cookie", response["Vary"])
+        with CaptureQueriesContext(connection) as ctx:
+            home_stats()
+        self.assertEqual(app_queries(ctx), [])
+
+
+# ─────────────────────────────────────────────────────────────
+# 6. UNREAD NOTIFICATION COUNTER
+# ─────────────────────────────────────────────────────────────
+
+class UnreadNotificationCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user("badge_user")
+        self.other = make_user("badge_other")
+
+    def unread(self, user):
+        user.refresh_from_db(fields=["unread_notification_count"])
+        return user.unread_notification_count
+
+    def test_counter_follows_sends_and_reads(self):
+        first = Notification.send(self.user, "One", "Body")
+        Notification.bulk_send([
+            Notification(recipient=self.user, title="Two", body="Body"),
+            Notification(recipient=self.user, title="Three", body="Body"),
+            Notification(recipient=self.other, title="Two", body="Body"),
+        ])
+        self.assertEqual((self.unread(self.user), self.unread(self.other)), (3, 1))
+
+        first.mark_read()
+        first.mark_read()   # already read: no double decrement
+        self.assertEqual(self.unread(self.user), 2)
+
+        self.assertEqual(Notification.mark_all_read(self.user), 2)
+        self.assertEqual(self.unread(self.user), 0)
+
+    def test_saving_a_stale_user_keeps_the_count(self):
+        stale = CustomUser.objects.get(pk=self.user.pk)
+        Notification.send(self.user, "One", "Body")
+        stale.first_name = "Edited"
+        stale.save()
+        self.assertEqual(self.unread(self.user), 1)
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).first_name, "Edited")
+
+    def test_saving_a_deleted_user_inserts_it_again(self):
+        stale = CustomUser.objects.get(pk=self.user.pk)
+        CustomUser.objects.filter(pk=self.user.pk).delete()
+        stale.save()
+        self.assertTrue(CustomUser.objects.filter(pk=self.user.pk).exists())
+
+    def test_explicit_update_fields_can_write_the_count(self):
+        Notification.send(self.user, "One", "Body")
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.unread_notification_count = 0
+        user.save(update_fields=["unread_notification_count"])
+        self.assertEqual(self.unread(self.user), 0)
+
+    def test_nav_badge_costs_no_query(self):
+        from django.test import RequestFactory
+        from core.context_processors import unread_notifications
+
+        Notification.send(self.user, "One", "Body")
+        request = RequestFactory().get("/")
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            context = unread_notifications(request)
+        self.assertEqual(context["unread_notifications_count"], 1)
+
+    def test_notification_page_clears_the_badge(self):
+        Notification.send(self.user, "One", "Body")
+        self.client.force_login(self.user)
+        self.client.get(reverse("notification_list"))
+        self.assertEqual(self.client.get(reverse("home")).context["unread_notifications_count"], 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        Notification.objects.create(recipient=self.user, title="Raw", body="Bypasses send()")
+        out = StringIO()
+        call_command("reconcile_unread_counts", stdout=out)
+        self.assertIn("badge_user: stored 0 expected 1", out.getvalue())
+        self.assertEqual(self.unread(self.user), 0)
+
+        call_command("reconcile_unread_counts", repair=True, stdout=StringIO())
+        self.assertEqual(self.unread(self.user), 1)
@@ -14,4 +14,8 @@ urlpatterns = [
     path('notifications/', views.notification_list, name='notification_list'),
     path('notifications/mark-all-read/', views.notifications_mark_all_read, name='notifications_mark_all_read'),
     path('notifications/<uuid:pk>/read/', views.notification_mark_read, name='notification_mark_read'),
+    # Background jobs
+    path('jobs/<uuid:pk>/', views.job_status, name='job_status'),
+    path('jobs/<uuid:pk>/wait/', views.job_wait, name='job_wait'),
+    path('jobs/<uuid:pk>/output/', views.job_output, name='job_output'),
 ]
\ No newline at end of file
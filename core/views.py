@@ -1,48 +1,62 @@
 import json
 import uuid
 import logging
-from django.http import JsonResponse
+import os
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.db import transaction
 from django.db.models import Q
-from django.core.mail import send_mass_mail
 from datetime import timedelta
 from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
 from django.contrib import messages
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.cache import patch_response_headers, patch_vary_headers
 # Local import
 from accounts.models import CustomUser
-from academics.models import AcademicYear, Class
-from core.models import Announcement, Notification
+from core.jobs import enqueue, worker_running
+from core.models import Announcement, Job, Notification
+from core.tasks import fan_out_announcement, send_emails
 from teachers.models import Attendance
-from teachers.analytics import get_last_7_days_attendance, get_today_attendance_summary, get_last_7_days_teacher_attendance, get_today_teacher_attendance_summary
+from core.home import HOME_CACHE_TIMEOUT, home_page_cache_key, home_stats
+from core.stats import admin_dashboard_stats, invalidate_admin_dashboard_stats
 
 
 def home(request):
-    total_students = CustomUser.objects.filter(is_student=True, is_member_of_this_school=True).count()
-    total_teachers = CustomUser.objects.filter(is_teacher=True, is_member_of_this_school=True).count()
-    try:
-        current_year = AcademicYear.objects.get(is_current=True)
-    except AcademicYear.DoesNotExist:
-        current_year = None
-    total_classes = 0
-    if current_year:
-        total_classes = Class.objects.filter(
-            academic_year=current_year
-        ).count()
-    today_summary = get_today_attendance_summary()
-    announcements = _get_announcements_for_user(request.user, limit=5)
+    """
+    School-wide figures come from home_stats(). Anonymous visitors get
+    the whole page from the cache, unless a flash message is waiting
+    for them.
+    """
+    anonymous = not request.user.is_authenticated and not get_messages(request)
+    if anonymous:
+        content = cache.get(home_page_cache_key())
+        if content is not None:
+            return _public_home_response(HttpResponse(content))
+
     context = {
-        'total_students':   total_students,
-        'total_teachers':   total_teachers,
-        'total_classes':    total_classes,
-        'current_year':     current_year,
-        'today_percentage': today_summary['percentage'],
-        'today_total':      today_summary['total'],
-        'announcements':    announcements,
+        **home_stats(),
+        'announcements': _get_announcements_for_user(request.user, limit=5),
     }
-    return render(request, 'pages/home.html', context)
+    response = render(request, 'pages/home.html', context)
+    if anonymous:
+        cache.set(home_page_cache_key(), response.content, HOME_CACHE_TIMEOUT)
+        return _public_home_response(response)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _public_home_response(response):
+    # The same for every anonymous visitor; Vary keeps it from being
+    # served to a logged-in one by a shared cache
+    patch_response_headers(response, HOME_CACHE_TIMEOUT)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
 
 @login_required(login_url='login')
 def admin_dashboard(request):
@@ -51,72 +65,8 @@ def admin_dashboard(request):
         messages.error(request, 'You do not have permission to access the admin dashboard.')
         return render(request, 'pages/home.html', {})
 
-    # --- Pending users ---
-    pending_users_queryset = CustomUser.objects.filter(
-    is_member_of_this_school=False).exclude(status='rejected').order_by('-date_joined')
-
-    # Prepare data for JS (Search/Sort functionality)
-    # We convert the queryset to a list of dictionaries
-    pending_users_list = list(pending_users_queryset.values(
-    'id',
-    'username',
-    'email',
-    'phone_number',
-    'date_joined',
-    'first_name',
-    'last_name',
-    'is_student',
-    'is_teacher',))
-    # Convert UUIDs and Dates to strings for JSON compatibility
-    for user in pending_users_list:
-        user['id'] = str(user['id'])
-        user['date_joined'] = user['date_joined'].strftime('%Y-%m-%dT%H:%M:%S')
-        user['full_name'] = f"{user['first_name']} {user['last_name']}".strip() or user['username']
-        if user['is_student']:
-            user['role'] = 'student'
-        elif user['is_teacher']:
-            user['role'] = 'teacher'
-        else:
-            user['role'] = 'student'  # safe default
-    
-    # --- Analytics ---
-
-    student_chart   = get_last_7_days_attendance()
-    teacher_chart   = get_last_7_days_teacher_attendance()
-    student_today   = get_today_attendance_summary()
-    teacher_today   = get_today_teacher_attendance_summary()
-
-    context = { 
-        # Pending registrations
-        "pending_count": pending_users_queryset.count(),
-        "pending_students": pending_users_queryset.filter(is_student=True).count(),
-        "pending_teachers": pending_users_queryset.filter(is_teacher=True).count(),
-        # School totals
-        "total_students": CustomUser.objects.filter(is_student=True, is_member_of_this_school=True).count(),
-        "total_teachers": CustomUser.objects.filter(is_teacher=True, is_member_of_this_school=True).count(),
-        # Student chart (last 7 days)
-        'attendance_chart_labels':  student_chart['labels'],
-        'attendance_chart_present': student_chart['present'],
-        'attendance_chart_absent':  student_chart['absent'],
-        # Teacher chart (last 7 days)
-        'teacher_chart_labels': teacher_chart['labels'],
-        'teacher_chart_present': teacher_chart['present'],
-        'teacher_chart_absent': teacher_chart['absent'],
-        # Student today summary
-        'today_present': student_today['present'],
-        'today_absent': student_today['absent'],
-        'today_total': student_today['total'],
-        'today_percentage': student_today['percentage'],
-        # Teacher today summary
-        'teacher_today_present': teacher_today['present'],
-        'teacher_today_absent': teacher_today['absent'],
-        'teacher_today_recorded':   teacher_today['total_recorded'],
-        'teacher_today_total': teacher_today['total_teachers'],
-        'teacher_today_not_marked': teacher_today['not_marked'],
-        'teacher_today_percentage': teacher_today['percentage'],
-        # Pending users for JS table
-        "pending_users_json": pending_users_list,
-    }
+    # Counts, charts and the pending table, cached (see core/stats.py)
+    context = admin_dashboard_stats()
     return render(request, 'pages/admin_dashboard.html', context)
 
 logger = logging.getLogger(__name__)
@@ -312,19 +262,15 @@ def process_pending_registrations(request):
                 except ValueError as ve:
                     logger.error(f"Validation error: {ve}")
                     raise  # Re-raise to trigger transaction rollback
+
+            if processed_count:
+                invalidate_admin_dashboard_stats()
         
-        # 8. Send emails (outside transaction to avoid rollback on email failure)
+        # 8. Send emails from a worker, after the commit (a mail server
+        #    outage is retried there, and never blocks the approval), or
+        #    here when no worker is running
         if email_messages:
-            try:
-                send_mass_mail(email_messages, fail_silently=False)
-            except Exception as e:
-                logger.error(f"Email sending failed: {e}")
-                # Users were still processed successfully
-                return JsonResponse({
-                    'status': 'partial_success',
-                    'message': f'{processed_count} user(s) processed, but emails failed to send',
-                    'count': processed_count
-                })
+            enqueue(send_emails, messages=email_messages, created_by=request.user, inline_without_worker=True)
         
         # 9. Success response
         return JsonResponse({
@@ -407,40 +353,12 @@ def announcement_create(request):
                 is_pinned=is_pinned,
                 posted_by=request.user,
             )
-            # Determine recipients
-            if target == 'all':
-                recipients = CustomUser.objects.filter(
-                    is_member_of_this_school=True, is_active=True
-                )
-            elif target == 'students':
-                recipients = CustomUser.objects.filter(
-                    is_student=True, is_member_of_this_school=True, is_active=True
-                )
-            elif target == 'teachers':
-                recipients = CustomUser.objects.filter(
-                    is_teacher=True, is_member_of_this_school=True, is_active=True
-                )
-            elif target == 'parents':
-                recipients = CustomUser.objects.filter(
-                    is_parent=True, is_member_of_this_school=True, is_active=True
-                )
-            elif target == 'staff':
-                recipients = CustomUser.objects.filter(
-                    is_staff=True, is_active=True
-                )
-            else:
-                recipients = CustomUser.objects.none()
-            # Bulk create — one notification per recipient
-            Notification.objects.bulk_create([
-                Notification(
-                    recipient=user,
-                    title=f"New announcement: {title}",
-                    body=ann.short_body,
-                    notif_type='announcement',
-                )
-                for user in recipients
-                if user != request.user  # don't notify the poster
-            ])
+            # One notification per recipient, written by a worker (or
+            # here when none is running)
+            enqueue(
+                fan_out_announcement, announcement_id=str(ann.id), created_by=request.user,
+                inline_without_worker=True,
+            )
 
             messages.success(request, f'Announcement "{title}" posted.')
             return redirect('announcement_list')
@@ -479,7 +397,7 @@ def announcement_toggle_pin(request, pk):
 def notification_list(request):
     notifications = request.user.notifications.all()[:50]
     # Mark all as read when the user opens the page
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    Notification.mark_all_read(request.user)
     return render(request, 'pages/notification_list.html', {
         'notifications': notifications,
     })
@@ -490,14 +408,87 @@ def notification_mark_read(request, pk):
         request.user.notifications, pk=pk
     )
     if request.method == 'POST':
-        notif.is_read = True
-        notif.save()
+        notif.mark_read()
     return redirect('notification_list')
 
 @login_required(login_url='login')
 def notifications_mark_all_read(request):
     if request.method == 'POST':
-        request.user.notifications.filter(
-            is_read=False
-        ).update(is_read=True)
-    return redirect('notification_list')
\ No newline at end of file
+        Notification.mark_all_read(request.user)
+    return redirect('notification_list')
+
+def _job_for(request, pk):
+    """A job the user may see: their own, or any for staff."""
+    jobs = Job.objects.all()
+    if not (request.user.is_staff or request.user.is_superuser):
+        jobs = jobs.filter(created_by=request.user)
+    return get_object_or_404(jobs.defer('output'), pk=pk)
+
+@login_required(login_url='login')
+def job_status(request, pk):
+    """
+    JSON status of a background job, for polling. A due job still queued
+    while no worker is running is reported as stalled, so the waiting
+    page can say so rather than spin.
+    """
+    job = _job_for(request, pk)
+    has_output = bool(job.output_file) or Job.objects.filter(pk=job.pk, output__isnull=False).exists()
+    stalled = job.status == Job.QUEUED and job.run_after <= timezone.now() and not worker_running()
+    if stalled:
+        logger.error(f"Job {job.pk} ({job.task}) is waiting, but no worker is running.")
+    return JsonResponse({
+        'status': 'success',
+        'job': {
+            'id': str(job.id),
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'finished': job.is_finished,
+            'result': job.result,
+            'output_url': reverse('job_output', args=[job.pk]) if has_output else None,
+            'stalled': stalled,
+            # The traceback stays in the admin
+            'error': (
+                'The job failed.' if job.status == Job.FAILED
+                else 'No worker is running to start this job.' if stalled
+                else None
+            ),
+        },
+    })
+
+@login_required(login_url='login')
+def job_wait(request, pk):
+    """
+    Waiting page for a background job: polls job_status, then goes to
+    ?next= (or the job's file) once it has finished.
+    """
+    job = _job_for(request, pk)
+    next_url = request.GET.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = ''
+    return render(request, 'pages/job_wait.html', {
+        'job': job,
+        'next_url': next_url or reverse('job_output', args=[job.pk]),
+    })
+
+@login_required(login_url='login')
+def job_output(request, pk):
+    """The file a finished job produced."""
+    job = _job_for(request, pk)
+    result = job.result if isinstance(job.result, dict) else {}
+    content_type = result.get('content_type', 'application/octet-stream')
+    if job.status == Job.SUCCEEDED and job.output_file:
+        # Streamed from storage, never loaded whole
+        return FileResponse(
+            job.output_file.open('rb'),
+            as_attachment=True,
+            filename=result.get('filename') or os.path.basename(job.output_file.name),
+            content_type=content_type,
+        )
+    output = Job.objects.filter(pk=job.pk, status=Job.SUCCEEDED).values_list('output', flat=True).first()
+    if output is None:
+        raise Http404('No file for this job.')
+    response = HttpResponse(bytes(output), content_type=content_type)
+    if result.get('filename'):
+        response['Content-Disposition'] = f'attachment; filename="{result["filename"]}"'
+    return response
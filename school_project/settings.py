@@ -108,6 +108,33 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Kept in the database so every web process and the worker share one
+# cache: an invalidation made by one is seen by all. Create the table
+# with `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+# Range-partition the attendance table by academic year (PostgreSQL only,
+# ignored on SQLite). See teachers/partitioning.py.
+ATTENDANCE_PARTITIONING = os.getenv('ATTENDANCE_PARTITIONING') == 'True'
+
+# Background jobs (core/jobs.py) are run by `python manage.py runworker`.
+# True runs them inside the request instead, for development without a
+# worker.
+JOBS_RUN_INLINE = os.getenv('JOBS_RUN_INLINE') == 'True'
+
+# Seconds the admin dashboard's counts and charts are cached for. See
+# core/stats.py.
+ADMIN_DASHBOARD_CACHE_TIMEOUT = int(os.getenv('ADMIN_DASHBOARD_CACHE_TIMEOUT', 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
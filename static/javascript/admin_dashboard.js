@@ -711,4 +711,63 @@ if (teacherChartEl) {
             }
         }
     });
-}
\ No newline at end of file
+}
+
+// E. GRADE DISTRIBUTION CHART
+const gradeChartEl = document.getElementById('gradeDistributionChart');
+
+if (gradeChartEl) {
+    const gradeLabels = JSON.parse(document.getElementById('grade-labels').textContent);
+    const gradeCounts = JSON.parse(document.getElementById('grade-counts').textContent);
+
+    new Chart(gradeChartEl, {
+        type: 'bar',
+        data: {
+            labels: gradeLabels,
+            datasets: [
+                {
+                    label: 'Grades',
+                    data: gradeCounts,
+                    backgroundColor: 'rgba(31,103,242,0.2)',
+                    borderColor: 'rgb(31,103,242)',
+                    borderWidth: 2,
+                    borderRadius: 4
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false }
+            },
+            scales: {
+                x: {
+                    title: {
+                        display: true,
+                        text: 'Percentage',
+                        color: document.documentElement.classList.contains('dark')
+                            ? '#9ca3af'
+                            : '#6b7280'
+                    },
+                    ticks: {
+                        color: document.documentElement.classList.contains('dark')
+                            ? '#9ca3af'
+                            : '#6b7280'
+                    },
+                    grid: { color: 'rgba(156,163,175,0.1)' }
+                },
+                y: {
+                    beginAtZero: true,
+                    ticks: {
+                        precision: 0,
+                        color: document.documentElement.classList.contains('dark')
+                            ? '#9ca3af'
+                            : '#6b7280'
+                    },
+                    grid: { color: 'rgba(156,163,175,0.1)' }
+                }
+            }
+        }
+    });
+}
@@ -0,0 +1,216 @@
+# students/dashboard.py
+"""
+The student dashboard's per-student data, built once and cached, and the
+parent dashboard's per-child data, loaded in bulk.
+
+A snapshot holds everything on the dashboard that comes from the
+student's enrollment: class, subjects, teachers, attendance, grades,
+final marks and timetable. It is cached per student and dropped by the
+receivers in students/signals.py when any of that changes:
+
+  Attendance, Grade, Enrollment   → that student
+  TimetableSlot, TeachingAssignment,
+  a class's subjects              → every student in the class
+  AcademicYear                    → everyone (the current year moved)
+
+The bulk grade and attendance writes do not fire signals, so they call
+invalidate_student_dashboards() themselves.
+
+A warm dashboard load reads the snapshot from the cache and only queries
+what is not per-student: announcements and unread notifications.
+
+The cache is the shared database cache (settings.CACHES), so an
+invalidation made by one web process is seen by every other one.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from academics.models import AcademicYear, FinalMark, GradeSummary, TeachingAssignment, TimetableSlot
+from teachers.models import Attendance
+from .models import Enrollment, ParentStudent
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+GENERATION_KEY = 'student-dashboard-generation'
+
+
+class StudentDashboardSnapshot:
+    """
+    current_year:      AcademicYear or None
+    enrollment:        the active Enrollment, or None
+    subjects, teachers, recent_attendance, grade_summaries, final_marks: lists
+    timetable:         {day: [TimetableSlot, ...]} for DAYS
+    """
+
+    def __init__(self, current_year=None, enrollment=None, subjects=(), teachers=(),
+                 recent_attendance=(), grade_summaries=(), final_marks=(), timetable=None):
+        self.current_year = current_year
+        self.enrollment = enrollment
+        self.subjects = list(subjects)
+        self.teachers = list(teachers)
+        self.recent_attendance = list(recent_attendance)
+        self.grade_summaries = list(grade_summaries)
+        self.final_marks = list(final_marks)
+        self.timetable = timetable or {}
+
+    def context(self):
+        """Template context. Today's status is worked out now, not when cached."""
+        enrollment = self.enrollment
+        return {
+            'current_year':       self.current_year,
+            'enrollment':         enrollment,
+            'subjects':           self.subjects,
+            'teachers':           self.teachers,
+            'attendance_summary': enrollment.attendance_summary if enrollment else None,
+            'recent_attendance':  self.recent_attendance,
+            'grade_summaries':    self.grade_summaries,
+            'final_marks':        self.final_marks,
+            'timetable':          self.timetable,
+            'days':               DAYS,
+            'today_status':       enrollment.today_attendance_status if enrollment else None,
+        }
+
+
+def build_student_dashboard(student):
+    """A fresh snapshot: eight queries when enrolled, at most two otherwise."""
+    current_year = AcademicYear.objects.filter(is_current=True).first()
+    if current_year is None:
+        return StudentDashboardSnapshot()
+    enrollment = (
+        Enrollment.objects
+        .filter(student=student, academic_year=current_year, status='active')
+        .select_related('class_assigned', 'academic_year')
+        .first()
+    )
+    if enrollment is None:
+        return StudentDashboardSnapshot(current_year)
+
+    assigned_class = enrollment.class_assigned
+    timetable = {day: [] for day in DAYS}
+    for slot in (
+        TimetableSlot.objects
+        .filter(class_assigned=assigned_class, academic_year=current_year)
+        .select_related('subject', 'teacher')
+        .order_by('day', 'start_time')
+    ):
+        timetable[slot.day].append(slot)
+
+    return StudentDashboardSnapshot(
+        current_year,
+        enrollment,
+        # Subjects come directly from the class M2M
+        subjects=assigned_class.subjects.select_related('department'),
+        # Who teaches what in this class this year
+        teachers=(
+            TeachingAssignment.objects
+            .filter(class_assigned=assigned_class, academic_year=current_year)
+            .select_related('teacher', 'subject')
+            .order_by('subject__name')
+        ),
+        # Last 10 records for the history table
+        recent_attendance=(
+            Attendance.objects
+            .filter(student=student, class_assigned=assigned_class, academic_year=current_year)
+            .order_by('-date')[:10]
+        ),
+        # One pre-aggregated row per subject per term
+        grade_summaries=(
+            GradeSummary.objects
+            .filter(student=student, academic_year=current_year)
+            .select_related('subject', 'term')
+            .order_by('subject__name', 'term__start_date')
+        ),
+        # Weighted final marks, as last computed
+        final_marks=(
+            FinalMark.objects
+            .filter(student=student, academic_year=current_year)
+            .select_related('subject')
+            .order_by('subject__name')
+        ),
+        timetable=timetable,
+    )
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def dashboard_cache_key(student_id, generation=None):
+    return f"student-dashboard:{generation or _generation()}:{student_id}"
+
+
+def get_student_dashboard(student):
+    """The cached snapshot, built on a miss."""
+    key = dashboard_cache_key(student.id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_student_dashboard(student)
+        cache.set(key, snapshot, DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_student_dashboards(student_ids):
+    """Drops these students' snapshots once the current transaction commits."""
+    student_ids = list(student_ids)
+
+    def drop():
+        generation = _generation()
+        cache.delete_many([dashboard_cache_key(student_id, generation) for student_id in student_ids])
+    transaction.on_commit(drop)
+
+
+def invalidate_class_dashboards(class_id):
+    """Drops the snapshots of every student enrolled in the class."""
+    invalidate_student_dashboards(
+        Enrollment.objects.filter(class_assigned_id=class_id).values_list('student_id', flat=True)
+    )
+
+
+def invalidate_all_dashboards():
+    """A new generation: every snapshot cached so far is ignored."""
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
+
+
+def parent_children_data(parent, current_year):
+    """
+    One entry per linked child, for the parent dashboard:
+    {'student', 'enrollment', 'attendance_summary', 'today_status', 'grade_summaries'}
+
+    Three queries however many children: the links, every child's
+    current enrollment, and every child's grade summaries. Attendance
+    totals and today's status come from the enrollment counters.
+    """
+    links = list(ParentStudent.objects.filter(parent=parent).select_related('student'))
+    student_ids = [link.student_id for link in links]
+    enrollments = {}
+    summaries = {}
+    if current_year and student_ids:
+        enrollments = {
+            enrollment.student_id: enrollment
+            for enrollment in (
+                Enrollment.objects
+                .filter(student_id__in=student_ids, academic_year=current_year, status='active')
+                .select_related('class_assigned')
+            )
+        }
+        for summary in (
+            GradeSummary.objects
+            .filter(student_id__in=list(enrollments), academic_year=current_year)
+            .select_related('subject', 'term')
+            .order_by('subject__name', 'term__start_date')
+        ):
+            summaries.setdefault(summary.student_id, []).append(summary)
+
+    children_data = []
+    for link in links:
+        enrollment = enrollments.get(link.student_id)
+        children_data.append({
+            'student':            link.student,
+            'enrollment':         enrollment,
+            'attendance_summary': enrollment.attendance_summary if enrollment else None,
+            'today_status':       enrollment.today_attendance_status if enrollment else None,
+            'grade_summaries':    summaries.get(link.student_id, []),
+        })
+    return children_data
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import AcademicYear, Class
+from students.report_cards import build_report_cards, report_card_enrollments, write_report_card_archive
+
+
+class Command(BaseCommand):
+    help = "Generate report card PDFs for a class, a year group or a whole academic year, as one zip file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help="Academic year name, e.g. 2024-2025 (default: the current year)")
+        parser.add_argument(
+            '--class', dest='classes', action='append', metavar='NAME',
+            help="Only this class (repeat for several)",
+        )
+        parser.add_argument(
+            '--level', metavar='PREFIX',
+            help='Only classes whose name starts with PREFIX, e.g. "Grade 10"',
+        )
+        parser.add_argument('--output', help="Zip file to write (default: report_cards_<year>.zip)")
+        parser.add_argument('--workers', type=int, help="Rendering processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all()
+        year = (
+            years.filter(name=options['year']) if options['year'] else years.filter(is_current=True)
+        ).first()
+        if year is None:
+            raise CommandError(
+                f"No academic year named {options['year']!r}." if options['year']
+                else "No current academic year."
+            )
+
+        classes = None
+        if options['classes']:
+            classes = list(Class.objects.filter(academic_year=year, name__in=options['classes']))
+            missing = set(options['classes']) - {c.name for c in classes}
+            if missing:
+                raise CommandError(f"No class named {', '.join(sorted(missing))} in {year.name}.")
+
+        started = time.monotonic()
+        cards = build_report_cards(
+            report_card_enrollments(year, classes=classes, class_prefix=options['level']),
+            year,
+        )
+        if not cards:
+            raise CommandError("No active enrollments match.")
+        self.stdout.write(f"Loaded {len(cards)} report card(s) in {time.monotonic() - started:.1f}s.")
+
+        step = max(1, len(cards) // 20)
+
+        def progress(done, total):
+            if done % step == 0 or done == total:
+                self.stdout.write(f"  {done}/{total} rendered")
+
+        output = options['output'] or f"report_cards_{year.name}.zip"
+        written = write_report_card_archive(cards, output, workers=options['workers'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} report card(s) to {output} in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Enrollment = apps.get_model('students', 'Enrollment')
+    Attendance = apps.get_model('teachers', 'Attendance')
+
+    scoped = Attendance.objects.filter(
+        student=OuterRef('student'),
+        class_assigned=OuterRef('class_assigned'),
+        academic_year=OuterRef('academic_year'),
+    )
+
+    def count(status):
+        return Coalesce(
+            Subquery(
+                scoped.filter(status=status).order_by()
+                .values('student').annotate(n=Count('id')).values('n')
+            ),
+            Value(0),
+        )
+
+    latest = scoped.order_by('-date')
+    Enrollment.objects.update(
+        attendance_present=count('present'),
+        attendance_absent=count('absent'),
+        last_attendance_date=Subquery(latest.values('date')[:1]),
+        last_attendance_status=Coalesce(Subquery(latest.values('status')[:1]), Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_parentstudent'),
+        ('teachers', '0004_attendance_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='attendance_absent',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='attendance_present',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_attendance_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_attendance_status',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,7 @@ Students inherit subjects from their assigned class.
 # Django imports
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import uuid
 
 # Local imports
@@ -84,6 +85,15 @@ class Enrollment(models.Model):
         help_text="Current enrollment status"
     )
 
+    # Denormalized attendance counters for this enrollment's class + year.
+    # Maintained by teachers/rollups.py on every Attendance write so the
+    # dashboards read one row instead of counting the whole history.
+    # Verify/repair with: python manage.py verify_attendance_counters
+    attendance_present = models.PositiveIntegerField(default=0, editable=False)
+    attendance_absent = models.PositiveIntegerField(default=0, editable=False)
+    last_attendance_date = models.DateField(null=True, blank=True, editable=False)
+    last_attendance_status = models.CharField(max_length=10, blank=True, default='', editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -166,6 +176,32 @@ class Enrollment(models.Model):
         """Get department (if class is streamed by department)"""
         return self.class_assigned.department
 
+    @property
+    def attendance_total(self):
+        return self.attendance_present + self.attendance_absent
+
+    @property
+    def attendance_summary(self):
+        """
+        Same dict the dashboards and report card used to build from
+        two COUNT queries — now read straight off the counters.
+        """
+        total = self.attendance_total
+        present = self.attendance_present
+        return {
+            'total':      total,
+            'present':    present,
+            'absent':     self.attendance_absent,
+            'percentage': round((present / total) * 100, 1) if total > 0 else 0,
+        }
+
+    @property
+    def today_attendance_status(self):
+        """'present' | 'absent' | None (not marked today)"""
+        if self.last_attendance_date == timezone.localdate():
+            return self.last_attendance_status or None
+        return None
+
 class ParentStudent(models.Model):
     """
     Links a parent account to one or more student accounts.
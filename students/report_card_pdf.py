@@ -0,0 +1,226 @@
+# students/report_card_pdf.py
+"""
+ReportLab rendering of one report card.
+
+Works only on the plain dict built by students.report_cards, and
+imports nothing from Django. That way it can run in a worker process of
+a process pool, which has neither the ORM set up nor a database
+connection.
+"""
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+
+
+GRADE_COLORS = {
+    'A': colors.HexColor('#dcfce7'),
+    'B': colors.HexColor('#dbeafe'),
+    'C': colors.HexColor('#fef9c3'),
+    'D': colors.HexColor('#ffedd5'),
+    'F': colors.HexColor('#fee2e2'),
+}
+
+
+def render_report_card(card):
+    """PDF bytes for one card dict (see students.report_cards.build_report_cards)."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=2 * cm,
+        leftMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+    )
+    styles = getSampleStyleSheet()
+    # Custom styles
+    style_title = ParagraphStyle(
+        'ReportTitle',
+        parent=styles['Title'],
+        fontSize=20,
+        textColor=colors.HexColor('#1f67f2'),
+        spaceAfter=4,
+        alignment=TA_CENTER,
+    )
+    style_subtitle = ParagraphStyle(
+        'ReportSubtitle',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#6b7280'),
+        spaceAfter=2,
+        alignment=TA_CENTER,
+    )
+    style_section = ParagraphStyle(
+        'SectionHeading',
+        parent=styles['Heading2'],
+        fontSize=11,
+        textColor=colors.HexColor('#111827'),
+        spaceBefore=16,
+        spaceAfter=6,
+        borderPad=4,
+    )
+    style_normal = ParagraphStyle(
+        'ReportNormal',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#374151'),
+    )
+    student = card['student']
+    story = []
+    # ── Header ──
+    story.append(Paragraph('EduManager', style_title))
+    story.append(Paragraph('School Management System', style_subtitle))
+    story.append(Paragraph('Student Report Card', style_subtitle))
+    story.append(Spacer(1, 0.3 * cm))
+    story.append(HRFlowable(width='100%', thickness=1, color=colors.HexColor('#1f67f2')))
+    story.append(Spacer(1, 0.4 * cm))
+    # ── Student Info Table ──
+    story.append(Paragraph('Student Information', style_section))
+    info_data = [
+        ['Full Name',      student['name'],                        'Academic Year', card['year']],
+        ['Username',       student['username'],                    'Class',         card['class']],
+        ['Email',          student['email'],                       'Status',        card['status']],
+    ]
+    info_table = Table(info_data, colWidths=[3.5 * cm, 6 * cm, 3.5 * cm, 4 * cm])
+    info_table.setStyle(TableStyle([
+        ('FONTNAME',    (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE',    (0, 0), (-1, -1), 9),
+        ('FONTNAME',    (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME',    (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('TEXTCOLOR',   (0, 0), (0, -1), colors.HexColor('#6b7280')),
+        ('TEXTCOLOR',   (2, 0), (2, -1), colors.HexColor('#6b7280')),
+        ('TEXTCOLOR',   (1, 0), (1, -1), colors.HexColor('#111827')),
+        ('TEXTCOLOR',   (3, 0), (3, -1), colors.HexColor('#111827')),
+        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#f9fafb'), colors.white]),
+        ('GRID',        (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+        ('PADDING',     (0, 0), (-1, -1), 6),
+        ('VALIGN',      (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    story.append(info_table)
+    # ── Grades Table ──
+    story.append(Paragraph('Academic Grades', style_section))
+    grades = card['grades']
+    if grades:
+        grade_header = ['Subject', 'Term', 'Assessments', 'Lowest', 'Highest', 'Average', 'Grade', 'Rank']
+        grade_rows   = [grade_header]
+        for g in grades:
+            grade_rows.append([
+                g['subject'],
+                g['term'] or '—',
+                str(g['count']),
+                f"{g['min']}%",
+                f"{g['max']}%",
+                f"{g['average']}%",
+                g['letter'],
+                g['rank'] or '—',
+            ])
+        grade_table = Table(
+            grade_rows,
+            colWidths=[4 * cm, 2.5 * cm, 2.2 * cm, 1.7 * cm, 1.7 * cm, 1.8 * cm, 1.4 * cm, 1.7 * cm],
+        )
+        grade_style = TableStyle([
+            # Header row
+            ('BACKGROUND',  (0, 0), (-1, 0), colors.HexColor('#1f67f2')),
+            ('TEXTCOLOR',   (0, 0), (-1, 0), colors.white),
+            ('FONTNAME',    (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE',    (0, 0), (-1, 0), 9),
+            ('ALIGN',       (0, 0), (-1, 0), 'CENTER'),
+            # Data rows
+            ('FONTNAME',    (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE',    (0, 1), (-1, -1), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+            ('ALIGN',       (3, 1), (-1, -1), 'CENTER'),
+            ('GRID',        (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+            ('PADDING',     (0, 0), (-1, -1), 6),
+            ('VALIGN',      (0, 0), (-1, -1), 'MIDDLE'),
+        ])
+        # Color each letter grade cell individually
+        for row_idx, g in enumerate(grades, start=1):
+            bg = GRADE_COLORS.get(g['letter'], colors.white)
+            grade_style.add('BACKGROUND', (6, row_idx), (6, row_idx), bg)
+        grade_table.setStyle(grade_style)
+        story.append(grade_table)
+        overall = card['overall_rank']
+        if overall:
+            story.append(Spacer(1, 0.2 * cm))
+            story.append(Paragraph(
+                f"Overall class rank: {overall['rank']} of {overall['size']} "
+                f"({overall['percentile']}th percentile, average {overall['average']}%)",
+                style_normal,
+            ))
+    else:
+        story.append(Paragraph('No grades recorded for this academic year.', style_normal))
+    # ── Final Marks ──
+    if card['final_marks']:
+        story.append(Paragraph('Final Marks', style_section))
+        final_rows = [['Subject', 'Weighting Graded', 'Final Mark', 'Grade']]
+        for mark in card['final_marks']:
+            final_rows.append([
+                mark['subject'],
+                f"{mark['covered']}%" + (' (provisional)' if mark['provisional'] else ''),
+                f"{mark['final']}%",
+                mark['letter'],
+            ])
+        final_table = Table(final_rows, colWidths=[6 * cm, 4.5 * cm, 3.5 * cm, 3 * cm])
+        final_table.setStyle(TableStyle([
+            ('BACKGROUND',  (0, 0), (-1, 0), colors.HexColor('#1f67f2')),
+            ('TEXTCOLOR',   (0, 0), (-1, 0), colors.white),
+            ('FONTNAME',    (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME',    (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE',    (0, 0), (-1, -1), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+            ('ALIGN',       (1, 0), (-1, -1), 'CENTER'),
+            ('GRID',        (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+            ('PADDING',     (0, 0), (-1, -1), 6),
+            ('VALIGN',      (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        story.append(final_table)
+    # ── Attendance Summary ──
+    attendance = card['attendance']
+    story.append(Paragraph('Attendance Summary', style_section))
+    att_data = [
+        ['Total Days Recorded', 'Days Present', 'Days Absent', 'Attendance Rate'],
+        [
+            str(attendance['total']),
+            str(attendance['present']),
+            str(attendance['absent']),
+            f"{attendance['percentage']}%",
+        ],
+    ]
+    att_table = Table(att_data, colWidths=[4.25 * cm] * 4)
+    att_table.setStyle(TableStyle([
+        ('BACKGROUND',  (0, 0), (-1, 0), colors.HexColor('#1f67f2')),
+        ('TEXTCOLOR',   (0, 0), (-1, 0), colors.white),
+        ('FONTNAME',    (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE',    (0, 0), (-1, -1), 9),
+        ('ALIGN',       (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME',    (0, 1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE',    (0, 1), (-1, 1), 14),
+        ('TEXTCOLOR',   (1, 1), (1, 1), colors.HexColor('#16a34a')),
+        ('TEXTCOLOR',   (2, 1), (2, 1), colors.HexColor('#dc2626')),
+        ('GRID',        (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+        ('PADDING',     (0, 0), (-1, -1), 10),
+        ('VALIGN',      (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    story.append(att_table)
+    # ── Footer ──
+    story.append(Spacer(1, 0.5 * cm))
+    story.append(HRFlowable(width='100%', thickness=0.5, color=colors.HexColor('#e5e7eb')))
+    story.append(Spacer(1, 0.2 * cm))
+    story.append(Paragraph(
+        f"Generated on {card['generated_on']} — EduManager School Management System",
+        ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#9ca3af'),
+            alignment=TA_CENTER,
+        )
+    ))
+    doc.build(story)
+    return buffer.getvalue()
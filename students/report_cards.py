@@ -0,0 +1,248 @@
+# students/report_cards.py
+"""
+Report cards in bulk: one PDF per active enrollment, for a class, a
+group of classes or a whole academic year.
+
+  1. build_report_cards() reads everything in a few queries whatever
+     the number of students: the enrollments (with student, class and
+     the attendance counters), every grade summary, and every final
+     mark. Class rankings come from the ranking cache. The result is one
+     plain dict per student.
+  2. write_report_card_archive() renders those dicts in a process pool
+     (ReportLab is CPU-bound and holds the GIL, so threads would not
+     help) and streams the PDFs into a zip file as they finish.
+
+The single-student download in students.views goes through the same
+two steps, without the pool, in a background job (students/tasks.py).
+Its PDF is cached per student and year under a content version (see
+report_card_version), and is rendered again only when something on the
+card has changed.
+"""
+import hashlib
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from academics.models import FinalMark, GradeSummary
+from academics.ranking import get_rankings
+from .models import Enrollment
+from .report_card_pdf import render_report_card
+
+
+def report_card_enrollments(academic_year, classes=None, class_prefix=None):
+    """
+    Active enrollments to print, by class then student name.
+    classes: Class objects or ids to keep; class_prefix: keep classes
+    whose name starts with it (e.g. "Grade 10" for a year group).
+    """
+    qs = Enrollment.objects.filter(academic_year=academic_year, status='active')
+    if classes is not None:
+        qs = qs.filter(class_assigned__in=classes)
+    if class_prefix:
+        qs = qs.filter(class_assigned__name__startswith=class_prefix)
+    return qs.order_by('class_assigned__name', 'student__last_name', 'student__first_name', 'student__username')
+
+
+def build_report_cards(enrollments, academic_year):
+    """
+    One card dict per enrollment, in the same order. Three queries plus
+    the rankings (cached per class and term).
+    """
+    enrollments = list(enrollments.select_related('student', 'class_assigned'))
+    students = [e.student_id for e in enrollments]
+
+    summaries = {}
+    for summary in (
+        GradeSummary.objects
+        .filter(academic_year=academic_year, student_id__in=students)
+        .select_related('subject', 'term')
+        .order_by('subject__name', 'term__start_date')
+    ):
+        summaries.setdefault(summary.student_id, []).append(summary)
+
+    final_marks = {}
+    for mark in (
+        FinalMark.objects
+        .filter(academic_year=academic_year, student_id__in=students)
+        .select_related('subject')
+        .order_by('subject__name')
+    ):
+        final_marks.setdefault(mark.student_id, []).append(mark)
+
+    rankings = {}
+
+    def ranking(class_id, term_id=None):
+        if (class_id, term_id) not in rankings:
+            rankings[(class_id, term_id)] = get_rankings(academic_year.id, class_id, term_id)
+        return rankings[(class_id, term_id)]
+
+    generated_on = timezone.localtime(timezone.now()).strftime('%B %d, %Y at %H:%M')
+    cards = []
+    for enrollment in enrollments:
+        student = enrollment.student
+        class_id = enrollment.class_assigned_id
+
+        grades = []
+        for g in summaries.get(student.id, []):
+            subject_ranks = ranking(class_id, g.term_id)['subjects'].get(g.subject_id, {})
+            rank = subject_ranks.get(student.id)
+            grades.append({
+                'subject': g.subject.name,
+                'term': g.term.name if g.term else '',
+                'count': g.grade_count,
+                'min': g.min_percentage,
+                'max': g.max_percentage,
+                'average': g.average,
+                'letter': g.letter_grade,
+                'rank': f"{rank['rank']} / {len(subject_ranks)}" if rank else '',
+            })
+
+        year_rank = ranking(class_id)
+        overall = year_rank['overall'].get(student.id)
+
+        cards.append({
+            'student': {
+                'name': student.get_full_name() or student.username,
+                'username': student.username,
+                'email': student.email,
+            },
+            'year': academic_year.name,
+            'class': enrollment.class_assigned.name,
+            'status': enrollment.get_status_display(),
+            'grades': grades,
+            'overall_rank': {**overall, 'size': year_rank['size']} if overall else None,
+            'final_marks': [
+                {
+                    'subject': mark.subject.name,
+                    'covered': mark.weight_covered,
+                    'provisional': mark.is_provisional,
+                    'final': mark.final_percentage,
+                    'letter': mark.letter_grade,
+                }
+                for mark in final_marks.get(student.id, [])
+            ],
+            'attendance': enrollment.attendance_summary,
+            'generated_on': generated_on,
+        })
+    return cards
+
+
+def report_card_filename(card):
+    """'Grade 10-A/report_card_jdoe_2024-2025.pdf' inside the archive."""
+    folder = card['class'].replace('/', '-')
+    return f"{folder}/report_card_{card['student']['username']}_{card['year']}.pdf"
+
+
+def write_report_card_archive(cards, output, workers=None, progress=None):
+    """
+    Renders every card and writes the PDFs to a zip archive at `output`
+    (a path or a writable binary file). Returns the number written.
+
+    workers: process count (default: one per CPU). 1 renders in this
+             process, with no pool; so does a daemonic process (e.g. a
+             pool worker), which may not start children.
+    progress: optional callable(done, total), called after each PDF.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = len(cards)
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if workers == 1 or total <= 1 or multiprocessing.current_process().daemon:
+            pdfs = map(render_report_card, cards)
+            _write_all(archive, cards, pdfs, progress)
+        else:
+            # spawn, not fork: a forked child would share this process's
+            # database connection, and could close it on exit.
+            with ProcessPoolExecutor(
+                max_workers=min(workers, total),
+                mp_context=multiprocessing.get_context('spawn'),
+            ) as pool:
+                chunksize = max(1, total // (workers * 4))
+                pdfs = pool.map(render_report_card, cards, chunksize=chunksize)
+                _write_all(archive, cards, pdfs, progress)
+    return total
+
+
+def _write_all(archive, cards, pdfs, progress):
+    total = len(cards)
+    for done, (card, pdf) in enumerate(zip(cards, pdfs), start=1):
+        archive.writestr(report_card_filename(card), pdf)
+        if progress:
+            progress(done, total)
+
+
+REPORT_CARD_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def report_card_version(enrollment):
+    """
+    A short hash that changes whenever anything printed on the
+    enrollment's report card may have changed. Also used as its ETag.
+    Two aggregate queries:
+      - the grade summaries of the whole class. These cover the
+        student's own grades, and the classmates' grades behind the
+        class ranks;
+      - the student's final marks.
+    Both also take the latest change to the subjects (and terms) they
+    name, so renaming one gives a new version. The enrollment row adds
+    the class and year names, the status and the attendance counters.
+    """
+    grades = GradeSummary.objects.filter(
+        academic_year_id=enrollment.academic_year_id,
+        student__enrollments__academic_year_id=enrollment.academic_year_id,
+        student__enrollments__class_assigned_id=enrollment.class_assigned_id,
+        student__enrollments__status='active',
+    ).aggregate(
+        n=Count('id'), latest=Max('updated_at'),
+        subjects=Max('subject__updated_at'), terms=Max('term__updated_at'),
+    )
+    marks = FinalMark.objects.filter(
+        academic_year_id=enrollment.academic_year_id,
+        student_id=enrollment.student_id,
+    ).aggregate(n=Count('id'), latest=Max('computed_at'), subjects=Max('subject__updated_at'))
+    student = enrollment.student
+    parts = (
+        enrollment.pk, enrollment.class_assigned_id, enrollment.status, enrollment.updated_at,
+        enrollment.attendance_present, enrollment.attendance_absent,
+        enrollment.class_assigned.name, enrollment.academic_year.name,
+        student.get_full_name(), student.username, student.email,
+        grades['n'], grades['latest'], grades['subjects'], grades['terms'],
+        marks['n'], marks['latest'], marks['subjects'],
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def report_card_cache_key(student_id, academic_year_id):
+    return f"report-card-pdf:{student_id}:{academic_year_id}"
+
+
+def cached_report_card_pdf(student_id, academic_year_id, version):
+    """The cached PDF bytes if they were rendered at this version, else None."""
+    entry = cache.get(report_card_cache_key(student_id, academic_year_id))
+    if entry and entry['version'] == version:
+        return entry['pdf']
+    return None
+
+
+def cache_report_card_pdf(student_id, academic_year_id, version, pdf):
+    cache.set(
+        report_card_cache_key(student_id, academic_year_id),
+        {'version': version, 'pdf': pdf},
+        REPORT_CARD_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_report_cards(student_ids, academic_year_id):
+    """
+    Drops the cached PDFs of these students for the year, once the
+    current transaction commits. Not needed for correctness (a stale
+    entry fails the version check), but frees it as soon as the data
+    changes.
+    """
+    keys = [report_card_cache_key(student_id, academic_year_id) for student_id in student_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
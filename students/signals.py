@@ -0,0 +1,53 @@
+# students/signals.py
+"""
+Drops a student's cached report card PDF and dashboard snapshot when
+something shown on them is written or deleted:
+
+  - a grade, attendance record or enrollment → that student;
+  - a timetable slot, teaching assignment or class subject list → every
+    student in the class;
+  - an academic year → every dashboard (the current year may have moved).
+
+The bulk grade and attendance writes in teachers/services.py and
+teachers/sync.py do not fire these signals. They invalidate the cards
+and dashboards themselves, once per batch.
+"""
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from .dashboard import invalidate_all_dashboards, invalidate_class_dashboards, invalidate_student_dashboards
+from .models import Enrollment
+from .report_cards import invalidate_report_cards
+from academics.models import AcademicYear, Class, Grade, TeachingAssignment, TimetableSlot
+from teachers.models import Attendance
+
+
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=Enrollment)
+def student_data_changed(sender, instance, **kwargs):
+    invalidate_report_cards([instance.student_id], instance.academic_year_id)
+    invalidate_student_dashboards([instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=TimetableSlot)
+@receiver([post_save, post_delete], sender=TeachingAssignment)
+def class_data_changed(sender, instance, **kwargs):
+    invalidate_class_dashboards(instance.class_assigned_id)
+
+
+@receiver(m2m_changed, sender=Class.subjects.through)
+def class_subjects_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # subject.classes.add(...): instance is the Subject
+        for class_id in pk_set or ():
+            invalidate_class_dashboards(class_id)
+    else:
+        invalidate_class_dashboards(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=AcademicYear)
+def academic_year_changed(sender, instance, **kwargs):
+    invalidate_all_dashboards()
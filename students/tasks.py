@@ -0,0 +1,43 @@
+# students/tasks.py
+"""
+Background tasks for report cards (see core/jobs.py).
+"""
+import tempfile
+
+from django.core.files import File
+
+from academics.models import AcademicYear
+from core.jobs import job
+from .models import Enrollment
+from .report_card_pdf import render_report_card
+from .report_cards import build_report_cards, report_card_enrollments, write_report_card_archive
+
+
+@job()
+def render_report_card_pdf(enrollment_id):
+    """One student's report card PDF."""
+    enrollment = Enrollment.objects.select_related('student', 'academic_year').get(pk=enrollment_id)
+    card = build_report_cards(Enrollment.objects.filter(pk=enrollment_id), enrollment.academic_year)[0]
+    return {
+        'output': render_report_card(card),
+        'content_type': 'application/pdf',
+        'filename': f"report_card_{enrollment.student.username}_{enrollment.academic_year.name}.pdf",
+    }
+
+
+@job(max_attempts=1)
+def build_report_card_archive(academic_year_ids, class_ids=None, filename='report_cards.zip'):
+    """Zip of report card PDFs for the active enrollments of these years (and classes)."""
+    cards = []
+    for year in AcademicYear.objects.filter(pk__in=academic_year_ids).order_by('start_date'):
+        cards += build_report_cards(report_card_enrollments(year, classes=class_ids), year)
+    # Written to disk, not memory: a year of report cards is large. The
+    # job queue saves it to storage and closes it.
+    archive = File(tempfile.TemporaryFile(), name=filename)
+    write_report_card_archive(cards, archive)
+    return {
+        'output': archive,
+        'content_type': 'application/zip',
+        'filename': filename,
+        'report_cards': len(cards),
+    }
@@ -4,22 +4,24 @@ students/tests.py
 Tests for the Students app — covering:
   - Enrollment model business rules
   - ParentStudent linking
-  - Student dashboard view access
+  - Student dashboard view access and snapshot cache
   - Parent dashboard view access
   - Report card PDF access
+  - Batch report card archives
+  - Report card PDF cache and ETags
 
 Run with:
     python manage.py test students
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from itertools import count as _count
 _seq = _count(1)
 
 from accounts.models import CustomUser
-from academics.models import AcademicYear, Class, Subject
+from academics.models import AcademicYear, Class, Subject, Grade
 from students.models import Enrollment, ParentStudent
 
 
@@ -402,6 +404,117 @@ class StudentDashboardViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, cls.name)
 
+    def test_dashboard_shows_grade_summary_per_subject(self):
+        """
+        WHY: The dashboard reads one pre-aggregated row per subject and
+        term instead of every grade, so two quizzes show as one row with
+        their average.
+        """
+        year = make_year()
+        cls = make_class(year)
+        subject = Subject.objects.create(name="Mathematics", code="MTH01")
+        Enrollment.objects.create(student=self.student, class_assigned=cls, academic_year=year)
+        for exam_type, score in (("quiz", 80), ("midterm", 90)):
+            Grade.objects.create(
+                student=self.student, subject=subject, class_assigned=cls,
+                academic_year=year, exam_type=exam_type, score=score, max_score=100,
+            )
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("student_dashboard"))
+        summary, = response.context["grade_summaries"]
+        self.assertEqual((summary.grade_count, summary.average, summary.letter_grade), (2, 85.0, "B"))
+
+
+
+class StudentDashboardSnapshotTests(TestCase):
+    """
+    The per-student part of the dashboard is cached, and dropped when a
+    grade, attendance record, enrollment or class timetable changes.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.year = make_year()
+        self.cls = make_class(self.year)
+        self.subject = Subject.objects.create(name="Mathematics", code="MTH01")
+        self.student = make_approved_student()
+        self.classmate = make_approved_student("student2")
+        for student in (self.student, self.classmate):
+            Enrollment.objects.create(student=student, class_assigned=self.cls, academic_year=self.year)
+        self.client.force_login(self.student)
+        self.url = reverse("student_dashboard")
+
+    def test_warm_load_only_queries_announcements_and_notifications(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        tables = " ".join(q["sql"] for q in queries)
+        for table in ("students_enrollment", "teachers_attendance", "academics_gradesummary",
+                      "academics_timetableslot", "academics_teachingassignment", "academics_academicyear"):
+            self.assertNotIn(table, tables)
+        self.assertIn("core_announcement", tables)
+
+    def test_grade_write_refreshes_that_students_dashboard(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(
+                student=self.student, subject=self.subject, class_assigned=self.cls,
+                academic_year=self.year, exam_type="quiz", score=80, max_score=100,
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["grade_summaries"]), 1)
+
+    def test_attendance_write_refreshes_that_students_dashboard(self):
+        from datetime import date
+        from teachers.models import Attendance
+
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                student=self.student, class_assigned=self.cls, academic_year=self.year,
+                date=date(2024, 9, 2), status="present",
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["recent_attendance"]), 1)
+        self.assertEqual(response.context["attendance_summary"]["present"], 1)
+
+    def test_timetable_change_refreshes_every_classmate(self):
+        from datetime import time
+        from academics.models import TimetableSlot
+
+        self.client.get(self.url)
+        self.client.force_login(self.classmate)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimetableSlot.objects.create(
+                class_assigned=self.cls, subject=self.subject, academic_year=self.year,
+                day="monday", start_time=time(8), end_time=time(9),
+            )
+        for student in (self.student, self.classmate):
+            self.client.force_login(student)
+            response = self.client.get(self.url)
+            self.assertEqual(len(response.context["timetable"]["monday"]), 1)
+
+    def test_other_writes_leave_the_cache_alone(self):
+        from datetime import date
+        from teachers.models import Attendance
+        from students.dashboard import dashboard_cache_key
+        from django.core.cache import cache
+
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                student=self.classmate, class_assigned=self.cls, academic_year=self.year,
+                date=date(2024, 9, 2), status="absent",
+            )
+        self.assertIsNotNone(cache.get(dashboard_cache_key(self.student.id)))
+        self.assertIsNone(cache.get(dashboard_cache_key(self.classmate.id)))
+
 
 # ─────────────────────────────────────────────────────────────
 # 4. PARENT DASHBOARD VIEW — ACCESS CONTROL
@@ -454,11 +567,48 @@ class ParentDashboardViewTests(TestCase):
             response.context["children_data"][0]["student"], self.student
         )
 
+    def test_query_count_does_not_grow_with_children(self):
+        """
+        WHY: Enrollments and grades are loaded for all children at
+        once, so a parent with four children costs the same page as a
+        parent with one.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        year = make_year()
+        cls = make_class(year)
+        subject = Subject.objects.create(name="Mathematics", code="MTH01")
+
+        def add_child(student):
+            ParentStudent.objects.create(parent=self.parent, student=student)
+            Enrollment.objects.create(student=student, class_assigned=cls, academic_year=year)
+            Grade.objects.create(
+                student=student, subject=subject, class_assigned=cls,
+                academic_year=year, exam_type="quiz", score=75, max_score=100,
+            )
+
+        add_child(self.student)
+        self.client.force_login(self.parent)
+        with CaptureQueriesContext(connection) as one_child:
+            self.client.get(reverse("parent_dashboard"))
+        for i in range(3):
+            add_child(make_approved_student(f"sibling{i}"))
+        with CaptureQueriesContext(connection) as four_children:
+            response = self.client.get(reverse("parent_dashboard"))
+
+        self.assertEqual(len(one_child), len(four_children))
+        self.assertEqual(len(response.context["children_data"]), 4)
+        for item in response.context["children_data"]:
+            self.assertEqual(item["enrollment"].class_assigned, cls)
+            self.assertEqual(len(item["grade_summaries"]), 1)
+
 
 # ─────────────────────────────────────────────────────────────
 # 5. REPORT CARD PDF VIEW — ACCESS CONTROL
 # ─────────────────────────────────────────────────────────────
 
+@override_settings(JOBS_RUN_INLINE=True)
 class ReportCardPDFViewTests(TestCase):
 
     def setUp(self):
@@ -501,4 +651,237 @@ class ReportCardPDFViewTests(TestCase):
         self.client.force_login(self.student)
         response = self.client.get(reverse("student_report_card_pdf"))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response["Content-Type"], "application/pdf")
\ No newline at end of file
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+    @override_settings(JOBS_RUN_INLINE=False)
+    def test_pdf_is_rendered_by_the_worker(self):
+        """
+        WHY: Rendering is slow, so the request only queues it; the
+        student waits on a progress page until a worker has run it.
+        """
+        from django.core.cache import cache
+        from core.jobs import run_pending_jobs, worker_seen
+        from core.models import Job
+
+        cache.clear()
+        worker_seen("test-worker")
+        year = make_year()
+        Enrollment.objects.create(student=self.student, class_assigned=make_class(year), academic_year=year)
+        self.client.force_login(self.student)
+        url = reverse("student_report_card_pdf")
+
+        response = self.client.get(url)
+        job = Job.objects.get()
+        self.assertRedirects(response, f"{reverse('job_wait', args=[job.pk])}?next={url}")
+        self.client.get(url)   # a second click does not queue it again
+        self.assertEqual(Job.objects.count(), 1)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+    @override_settings(JOBS_RUN_INLINE=False)
+    def test_pdf_is_rendered_in_the_request_when_no_worker_runs(self):
+        from django.core.cache import cache
+        from core.models import Job
+
+        cache.clear()
+        year = make_year()
+        Enrollment.objects.create(student=self.student, class_assigned=make_class(year), academic_year=year)
+        self.client.force_login(self.student)
+
+        response = self.client.get(reverse("student_report_card_pdf"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"%PDF"))
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+# ─────────────────────────────────────────────────────────────
+# 6. BATCH REPORT CARDS
+# ─────────────────────────────────────────────────────────────
+
+@override_settings(JOBS_RUN_INLINE=True)
+class BatchReportCardTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.cls_a = make_class(self.year, name="Grade 10-A")
+        self.cls_b = make_class(self.year, name="Grade 11-A")
+        self.subject = Subject.objects.create(name="Mathematics", code="MATH")
+        for name, cls, score in [("amy", self.cls_a, 90), ("ben", self.cls_a, 70), ("cal", self.cls_b, 60)]:
+            student = make_approved_student(name)
+            Enrollment.objects.create(student=student, class_assigned=cls, academic_year=self.year)
+            Grade.objects.create(
+                student=student, subject=self.subject, class_assigned=cls,
+                academic_year=self.year, exam_type="final", score=score, max_score=100,
+            )
+
+    def _cards(self, **kwargs):
+        from students.report_cards import build_report_cards, report_card_enrollments
+        return build_report_cards(report_card_enrollments(self.year, **kwargs), self.year)
+
+    def test_cards_carry_grades_and_class_rank(self):
+        cards = self._cards(class_prefix="Grade 10")
+        self.assertEqual([c["student"]["username"] for c in cards], ["amy", "ben"])
+        self.assertEqual(cards[0]["grades"][0]["average"], 90)
+        self.assertEqual(cards[0]["grades"][0]["rank"], "1 / 2")
+        self.assertEqual(cards[1]["overall_rank"]["rank"], 2)
+
+    def test_query_count_does_not_grow_with_students(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.core.cache import cache
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            self._cards(classes=[self.cls_b])
+        for name in ("dan", "eve", "fay"):
+            student = make_approved_student(name)
+            Enrollment.objects.create(student=student, class_assigned=self.cls_b, academic_year=self.year)
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            self._cards(classes=[self.cls_b])
+        self.assertEqual(len(small), len(large))
+
+    def test_archive_holds_one_pdf_per_student(self):
+        import io
+        import zipfile
+        from students.report_cards import write_report_card_archive
+
+        seen = []
+        buffer = io.BytesIO()
+        written = write_report_card_archive(
+            self._cards(), buffer, workers=1, progress=lambda done, total: seen.append((done, total)),
+        )
+        self.assertEqual(written, 3)
+        self.assertEqual(seen[-1], (3, 3))
+        with zipfile.ZipFile(buffer) as archive:
+            names = sorted(archive.namelist())
+            self.assertEqual(names, [
+                "Grade 10-A/report_card_amy_2024-2025.pdf",
+                "Grade 10-A/report_card_ben_2024-2025.pdf",
+                "Grade 11-A/report_card_cal_2024-2025.pdf",
+            ])
+            self.assertTrue(archive.read(names[0]).startswith(b"%PDF"))
+
+    def test_command_renders_in_a_process_pool(self):
+        import os
+        import tempfile
+        import zipfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "cards.zip")
+            out = StringIO()
+            call_command("generate_report_cards", output=output, workers=2, stdout=out)
+            with zipfile.ZipFile(output) as archive:
+                self.assertEqual(len(archive.namelist()), 3)
+        self.assertIn("3/3 rendered", out.getvalue())
+
+    def test_command_rejects_unknown_class(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command("generate_report_cards", classes=["Grade 12-Z"], output="unused.zip")
+
+    def test_class_admin_action_queues_zip(self):
+        import io
+        import tempfile
+        import zipfile
+        from core.models import Job
+
+        admin_user = make_approved_student("root", is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            response = self.client.post(
+                reverse("admin:academics_class_changelist"),
+                {"action": "download_report_cards", "_selected_action": [self.cls_a.pk]},
+            )
+            job = Job.objects.get()
+            self.assertRedirects(response, reverse("job_wait", args=[job.pk]))
+            # The zip is a file in storage, not a blob in the job row
+            self.assertIsNone(job.output)
+            self.assertTrue(job.output_file.name.endswith(".zip"))
+            response = self.client.get(reverse("job_output", args=[job.pk]))
+            self.assertEqual(response["Content-Type"], "application/zip")
+            with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+                self.assertEqual(len(archive.namelist()), 2)
+            response.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# 7. REPORT CARD PDF CACHE
+# ─────────────────────────────────────────────────────────────
+
+@override_settings(JOBS_RUN_INLINE=True)
+class ReportCardCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.year = make_year()
+        self.cls = make_class(self.year)
+        self.subject = Subject.objects.create(name="Mathematics", code="MATH")
+        self.student = make_approved_student("amy")
+        self.classmate = make_approved_student("ben")
+        for student in (self.student, self.classmate):
+            Enrollment.objects.create(student=student, class_assigned=self.cls, academic_year=self.year)
+        self.client.force_login(self.student)
+        self.url = reverse("student_report_card_pdf")
+
+    def _grade(self, student, score):
+        return Grade.objects.create(
+            student=student, subject=self.subject, class_assigned=self.cls,
+            academic_year=self.year, exam_type="quiz", score=score, max_score=100,
+        )
+
+    def test_unchanged_card_is_served_from_cache_and_revalidates(self):
+        from unittest import mock
+        from students import tasks
+
+        with mock.patch.object(tasks, "render_report_card", wraps=tasks.render_report_card) as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+    def test_grade_and_attendance_writes_change_the_version(self):
+        etags = [self.client.get(self.url)["ETag"]]
+        self._grade(self.student, 80)
+        etags.append(self.client.get(self.url)["ETag"])
+        # A classmate's grade can move this student's rank
+        self._grade(self.classmate, 95)
+        etags.append(self.client.get(self.url)["ETag"])
+        Enrollment.objects.filter(student=self.student).update(attendance_present=3)
+        etags.append(self.client.get(self.url)["ETag"])
+        self.assertEqual(len(set(etags)), 4)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual(response.status_code, 200)
+
+    def test_renaming_printed_labels_changes_the_version(self):
+        self._grade(self.student, 80)
+        etags = [self.client.get(self.url)["ETag"]]
+        for obj, name in ((self.subject, "Algebra"), (self.cls, "Grade 10-B"), (self.year, "2024/25")):
+            obj.name = name
+            obj.save()
+            etags.append(self.client.get(self.url)["ETag"])
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_grade_write_drops_cached_pdf(self):
+        from django.core.cache import cache
+        from students.report_cards import report_card_cache_key
+
+        self.client.get(self.url)
+        key = report_card_cache_key(self.student.id, self.year.id)
+        self.assertIsNotNone(cache.get(key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self._grade(self.student, 70)
+        self.assertIsNone(cache.get(key))
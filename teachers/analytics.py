@@ -1,9 +1,14 @@
 # teachers/analytics.py
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 # Local import
-from .models import Attendance, TeacherAttendance
+from .models import (
+    Attendance,
+    TeacherAttendance,
+    AttendanceDailyRollup,
+    TeacherAttendanceDailyRollup,
+)
 from accounts.models import CustomUser
 
 def get_last_7_days_attendance():
@@ -11,8 +16,8 @@ def get_last_7_days_attendance():
     Returns attendance data for the last 7 calendar days
     where at least one record exists.
 
-    Only counts records where student__is_student=True.
-    This guards against any data inconsistency in the Attendance table.
+    Reads AttendanceDailyRollup, which only counts records where
+    student__is_student=True (see teachers/rollups.py).
 
     Why: Charts should only show school days with actual data.
     Showing empty weekends misleads admins.
@@ -28,14 +33,16 @@ def get_last_7_days_attendance():
     today = timezone.localdate()
     seven_days_ago = today - timedelta(days=6)  # inclusive of today = 7 days
 
-    # Single query: group by date, count present and absent
+    # Single query over the daily rollup: at most (days × classes) rows,
+    # independent of how many raw Attendance rows exist.
+    # The is_student guard is applied when the rollup is written.
     records = (
-        Attendance.objects
-        .filter(date__gte=seven_days_ago, date__lte=today, student__is_student=True,)   # Explicit: students only
+        AttendanceDailyRollup.objects
+        .filter(date__gte=seven_days_ago, date__lte=today)
         .values('date')
         .annotate(
-            present_count=Count('id', filter=Q(status=Attendance.STATUS_PRESENT)),
-            absent_count=Count('id', filter=Q(status=Attendance.STATUS_ABSENT)),
+            present_count=Sum('present_count'),
+            absent_count=Sum('absent_count'),
         )
         .order_by('date')
     )
@@ -63,20 +70,20 @@ def get_today_attendance_summary():
     """
     Returns today's school-wide attendance summary.
 
-    Explicitly filters student__is_student=True so teacher or admin
-    records never bleed into the student summary.
+    Reads the rollup, which is already scoped to student__is_student=True,
+    so teacher or admin records never bleed into the student summary.
 
     Why separate from the 7-day query: this runs on every dashboard load,
-    so it should be as tight as possible — one date, two counts.
+    so it should be as tight as possible — one date, one row per class.
     """
     today = timezone.localdate()
 
     result = (
-        Attendance.objects
-        .filter(date=today, student__is_student=True,) # Explicit: students only
+        AttendanceDailyRollup.objects
+        .filter(date=today)
         .aggregate(
-            present=Count('id', filter=Q(status=Attendance.STATUS_PRESENT)),
-            absent=Count('id', filter=Q(status=Attendance.STATUS_ABSENT)),
+            present=Sum('present_count'),
+            absent=Sum('absent_count'),
         )
     )
 
@@ -95,24 +102,20 @@ def get_last_7_days_teacher_attendance():
     """
     Teacher attendance for the last 7 calendar days.
  
-    Uses TeacherAttendance — a dedicated model separate from the student
-    Attendance model. Returns the same dict structure so the frontend
+    Uses TeacherAttendanceDailyRollup — one row per day, so this reads
+    at most 7 rows. Returns the same dict structure so the frontend
     chart code in admin_dashboard.js does not need to change.
     """
     today = timezone.localdate()
     seven_days_ago = today - timedelta(days=6)
  
     records = (
-        TeacherAttendance.objects
+        TeacherAttendanceDailyRollup.objects
         .filter(
             date__gte=seven_days_ago,
             date__lte=today,
         )
-        .values('date')
-        .annotate(
-            present_count=Count('id', filter=Q(status=TeacherAttendance.STATUS_PRESENT)),
-            absent_count=Count('id', filter=Q(status=TeacherAttendance.STATUS_ABSENT)),
-        )
+        .values('date', 'present_count', 'absent_count')
         .order_by('date')
     )
  
@@ -196,18 +199,16 @@ def get_filtered_attendance(
 def get_today_teacher_attendance_summary():
     today = timezone.localdate()
 
-    # Query 1 — what has been recorded today
-    result = (
-        TeacherAttendance.objects
+    # Query 1 — what has been recorded today (one rollup row at most)
+    rollup = (
+        TeacherAttendanceDailyRollup.objects
         .filter(date=today)
-        .aggregate(
-            present=Count('id', filter=Q(status=TeacherAttendance.STATUS_PRESENT)),
-            absent=Count('id', filter=Q(status=TeacherAttendance.STATUS_ABSENT)),
-        )
-    )
+        .values('present_count', 'absent_count')
+        .first()
+    ) or {}
 
-    present = result['present'] or 0
-    absent = result['absent'] or 0
+    present = rollup.get('present_count') or 0
+    absent = rollup.get('absent_count') or 0
     total_recorded = present + absent
 
     # Query 2 — total active teachers in the school
@@ -0,0 +1,119 @@
+# teachers/exports.py
+"""
+Streaming CSV / NDJSON exports for attendance and grades.
+
+Rows are pulled with values_list().iterator(chunk_size=...) so the
+database cursor is read in chunks and no model instances are built.
+The response is a StreamingHttpResponse — the first bytes go out as
+soon as the first chunk arrives and memory stays flat however many
+rows are exported.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from academics.models import Grade
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000   # rows fetched from the DB per round trip
+LINES_PER_WRITE = 500      # rows joined per chunk sent to the client
+
+ATTENDANCE_EXPORT_COLUMNS = [
+    ('date',       'date'),
+    ('username',   'student__username'),
+    ('first_name', 'student__first_name'),
+    ('last_name',  'student__last_name'),
+    ('email',      'student__email'),
+    ('class',      'class_assigned__name'),
+    ('status',     'status'),
+    ('marked_by',  'marked_by__username'),
+]
+
+GRADE_EXPORT_COLUMNS = [
+    ('username',   'student__username'),
+    ('first_name', 'student__first_name'),
+    ('last_name',  'student__last_name'),
+    ('class',      'class_assigned__name'),
+    ('subject',    'subject__name'),
+    ('exam_type',  'exam_type'),
+    ('term',       'term__name'),
+    ('score',      'score'),
+    ('max_score',  'max_score'),
+]
+# Computed per row from score/max_score, no extra query
+GRADE_EXTRA_COLUMNS = ['percentage', 'letter_grade']
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+
+def _batched(lines, size=LINES_PER_WRITE):
+    """Join lines into larger chunks so the WSGI server does fewer writes."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def streaming_export(filename, header, rows, fmt='csv'):
+    """
+    Wraps a row iterator in a StreamingHttpResponse.
+    filename is given without extension.
+    """
+    if fmt == 'ndjson':
+        lines = _ndjson_lines(header, rows)
+        content_type = 'application/x-ndjson'
+    else:
+        fmt = 'csv'
+        lines = _csv_lines(header, rows)
+        content_type = 'text/csv'
+
+    response = StreamingHttpResponse(_batched(lines), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def attendance_export_rows(qs):
+    """Yields one tuple per Attendance row in ATTENDANCE_EXPORT_COLUMNS order."""
+    lookups = [lookup for _, lookup in ATTENDANCE_EXPORT_COLUMNS]
+    return qs.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def grade_export_rows(qs):
+    """
+    Yields one tuple per Grade row, with percentage and letter grade
+    appended — computed from the raw values, not from Grade instances.
+    """
+    lookups = [lookup for _, lookup in GRADE_EXPORT_COLUMNS]
+    for row in qs.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        pct = Grade.compute_percentage(row[-2], row[-1])
+        yield row + (pct, Grade.letter_for(pct))
+
+
+def attendance_export_header():
+    return [name for name, _ in ATTENDANCE_EXPORT_COLUMNS]
+
+
+def grade_export_header():
+    return [name for name, _ in GRADE_EXPORT_COLUMNS] + GRADE_EXTRA_COLUMNS
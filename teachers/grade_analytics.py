@@ -0,0 +1,154 @@
+# teachers/grade_analytics.py
+"""
+Grade distribution analytics for department heads and the admin
+dashboard.
+
+Everything is computed by the database in one grouped query per chart.
+Each grade's percentage is put into a 10-point bucket by a FLOOR()
+expression. The query groups by bucket (and by class for comparisons)
+and returns the count, the sum and the sum of squares for each group.
+Mean and standard deviation are rebuilt from those sums, so no grade
+row is ever loaded into Python.
+
+Results are cached under the year's grade data version (see
+academics.summaries.grades_data_version), so a new or edited grade
+makes the next read recompute.
+
+Returned dicts follow the admin dashboard's Chart.js shape: a 'labels'
+list plus one list per series.
+"""
+from math import sqrt
+
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, IntegerField, Sum, Value
+from django.db.models.functions import Floor, Least
+
+from academics.models import Class, Grade
+from academics.summaries import grades_data_version
+
+
+BUCKET_WIDTH = 10
+BUCKET_COUNT = 10   # 0–9, 10–19, …, 90–100 (100% joins the top bucket)
+BUCKET_LABELS = [
+    f"{i * BUCKET_WIDTH}–{i * BUCKET_WIDTH + BUCKET_WIDTH - 1}" for i in range(BUCKET_COUNT - 1)
+] + [f"{(BUCKET_COUNT - 1) * BUCKET_WIDTH}–100"]
+
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+
+def _bucketed(academic_year_id, group_by=(), **filters):
+    """
+    One grouped query: count, sum and sum of squares of the percentage,
+    per bucket (and per group_by field).
+    """
+    filters = {key: value for key, value in filters.items() if value}
+    return (
+        Grade.objects
+        .filter(academic_year_id=academic_year_id, **filters)
+        .annotate(pct=Grade.percentage_expression())
+        .annotate(bucket=Least(
+            Floor(F('pct') / BUCKET_WIDTH, output_field=IntegerField()),
+            Value(BUCKET_COUNT - 1),
+            output_field=IntegerField(),
+        ))
+        .values(*group_by, 'bucket')
+        .annotate(
+            n=Count('id'),
+            total=Sum('pct', output_field=FloatField()),
+            squares=Sum(F('pct') * F('pct'), output_field=FloatField()),
+        )
+        .order_by()
+    )
+
+
+def _summarise(groups):
+    """
+    {'counts', 'count', 'mean', 'stddev'} from bucket rows of one group.
+    The standard deviation is the population one.
+    """
+    counts = [0] * BUCKET_COUNT
+    n = total = squares = 0
+    for row in groups:
+        counts[int(row['bucket'])] += row['n']
+        n += row['n']
+        total += row['total'] or 0
+        squares += row['squares'] or 0
+    if not n:
+        return {'counts': counts, 'count': 0, 'mean': None, 'stddev': None}
+    mean = total / n
+    variance = max(squares / n - mean * mean, 0)   # clamp float noise
+    return {'counts': counts, 'count': n, 'mean': round(mean, 1), 'stddev': round(sqrt(variance), 1)}
+
+
+def _cached(key, compute, academic_year_id):
+    key = f"{key}:{grades_data_version(academic_year_id)}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+def get_grade_distribution(academic_year_id, subject_id=None, class_id=None, term_id=None):
+    """
+    Histogram of grade percentages for a year, optionally narrowed to a
+    subject, class and/or term.
+
+    Returns:
+    {
+        'labels': ['0–9', '10–19', ..., '90–100'],
+        'counts': [0, 1, ...],
+        'count':  total grades,
+        'mean':   82.4 or None,
+        'stddev': 9.1 or None,
+    }
+    """
+    def compute():
+        summary = _summarise(_bucketed(
+            academic_year_id,
+            subject_id=subject_id, class_assigned_id=class_id, term_id=term_id,
+        ))
+        return {'labels': BUCKET_LABELS, **summary}
+
+    return _cached(
+        f"grade-distribution:{academic_year_id}:{subject_id}:{class_id}:{term_id}",
+        compute, academic_year_id,
+    )
+
+
+def get_subject_comparison(academic_year_id, subject_id, term_id=None):
+    """
+    The same subject across the parallel classes that have grades in
+    it, one query for all classes.
+
+    Returns:
+    {
+        'labels':  ['Grade 10-A', 'Grade 10-B', ...],   # classes, by name
+        'mean':    [78.2, 81.0, ...],
+        'stddev':  [8.4, 6.1, ...],
+        'count':   [30, 28, ...],
+        'buckets': ['0–9', ..., '90–100'],
+        'distributions': [[...counts per bucket...], ...],   # one per class
+    }
+    """
+    def compute():
+        by_class = {}
+        for row in _bucketed(academic_year_id, ('class_assigned_id',),
+                             subject_id=subject_id, term_id=term_id):
+            by_class.setdefault(row['class_assigned_id'], []).append(row)
+        names = dict(Class.objects.filter(id__in=by_class).values_list('id', 'name'))
+        class_ids = sorted(by_class, key=lambda class_id: names.get(class_id, ''))
+        summaries = [_summarise(by_class[class_id]) for class_id in class_ids]
+        return {
+            'labels': [names.get(class_id, '') for class_id in class_ids],
+            'mean': [s['mean'] for s in summaries],
+            'stddev': [s['stddev'] for s in summaries],
+            'count': [s['count'] for s in summaries],
+            'buckets': BUCKET_LABELS,
+            'distributions': [s['counts'] for s in summaries],
+        }
+
+    return _cached(
+        f"grade-comparison:{academic_year_id}:{subject_id}:{term_id}",
+        compute, academic_year_id,
+    )
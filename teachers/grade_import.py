@@ -0,0 +1,110 @@
+# teachers/grade_import.py
+"""
+CSV import for one grade sheet (assignment + exam type + term).
+
+The upload is read one line at a time through csv.reader and never
+loaded whole. Rows are matched to students on the active roster by
+username or email, through one dict built from the roster the view has
+already loaded, so matching costs no queries. Scores go through
+parse_grade_sheet(), the same check as the on-screen sheet.
+
+Unlike the on-screen sheet, a bad row does not block the others. Valid
+rows are returned for record_grades() to write in one transaction, and
+every rejected row is reported with its line number and the reason.
+"""
+import csv
+import io
+
+from .services import parse_grade_sheet
+
+
+MAX_IMPORT_BYTES = 1024 * 1024
+STUDENT_COLUMNS = ('username', 'email', 'student')   # first non-blank one per row is used
+SCORE_COLUMN = 'score'
+TEMPLATE_HEADER = ['username', 'email', 'name', SCORE_COLUMN]
+
+
+class GradeImportError(ValueError):
+    """The file as a whole cannot be used. Nothing is imported."""
+
+
+def _row_error(line, student, score, error):
+    return {'line': line, 'student': student, 'score': score, 'error': error}
+
+
+def read_grade_csv(upload, students, raw_max_score):
+    """
+    Reads an uploaded CSV against the class roster.
+
+    upload:   an UploadedFile
+    students: the active roster, already loaded
+
+    Returns {'rows', 'max_score', 'errors', 'skipped'}:
+      rows:    [(student, Decimal score), ...] ready for record_grades()
+      errors:  [{'line', 'student', 'score', 'error'}, ...] by line
+      skipped: rows with a blank score, left untouched like a blank cell
+    Raises GradeImportError for an unreadable file, a missing column or
+    an invalid max score.
+    """
+    if upload.size > MAX_IMPORT_BYTES:
+        raise GradeImportError(f"The file is larger than {MAX_IMPORT_BYTES // 1024} KB.")
+
+    lookup = {}
+    for student in students:
+        lookup[student.username.lower()] = student
+        if student.email:
+            lookup[student.email.lower()] = student
+
+    reader = csv.reader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    raw_scores, lines, errors = {}, {}, []
+    try:
+        header = [column.strip().lower() for column in next(reader, [])]
+        student_columns = [header.index(c) for c in STUDENT_COLUMNS if c in header]
+        if not student_columns or SCORE_COLUMN not in header:
+            raise GradeImportError(
+                "The first line must name a username (or email) column and a score column."
+            )
+        score_column = header.index(SCORE_COLUMN)
+        width = max(*student_columns, score_column) + 1
+
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            row = row + [''] * (width - len(row))
+            identifier = next((row[i].strip() for i in student_columns if row[i].strip()), '')
+            raw = row[score_column].strip()
+            student = lookup.get(identifier.lower())
+            if student is None:
+                errors.append(_row_error(reader.line_num, identifier, raw,
+                                         "Not an active student in this class."))
+                continue
+            if student.id in lines:
+                errors.append(_row_error(reader.line_num, identifier, raw,
+                                         f"Student already on line {lines[student.id][0]}."))
+                continue
+            lines[student.id] = (reader.line_num, identifier, raw)
+            raw_scores[student.id] = raw
+    except UnicodeDecodeError:
+        raise GradeImportError("The file is not UTF-8 text.")
+    except csv.Error as e:
+        raise GradeImportError(f"Line {reader.line_num}: {e}")
+
+    rows, max_score, sheet_errors = parse_grade_sheet(students, raw_scores, raw_max_score)
+    if 'max_score' in sheet_errors:
+        raise GradeImportError(sheet_errors.pop('max_score'))
+    for student_id, error in sheet_errors.items():
+        errors.append(_row_error(*lines[student_id], error))
+    errors.sort(key=lambda e: e['line'])
+
+    return {
+        'rows': rows,
+        'max_score': max_score,
+        'errors': errors,
+        'skipped': sum(1 for raw in raw_scores.values() if not raw),
+    }
+
+
+def template_rows(students):
+    """Rows for the downloadable template: the roster with blank scores."""
+    for student in students:
+        yield [student.username, student.email, student.get_full_name(), '']
@@ -0,0 +1,157 @@
+# teachers/gradebook.py
+"""
+Gradebook for one teaching assignment: students as rows, one column per
+(term, exam type) that has any grades.
+
+Fed by one values_list() over the assignment's grades. The score and
+max_score columns are pulled out as flat lists, and percentages and
+letters are computed over those lists in one pass, using the same rules
+as Grade.percentage / Grade.letter_grade. They are then scattered into
+the matrix. No Grade instances are created.
+
+Each row also carries the student's class rank and percentile in the
+subject for the year, read from the cached rankings.
+"""
+from academics.models import Grade, Term
+from academics.ranking import get_rankings
+from accounts.models import CustomUser
+
+
+EXAM_TYPE_ORDER = {value: i for i, (value, _) in enumerate(Grade.EXAM_TYPE_CHOICES)}
+EXAM_TYPE_LABELS = dict(Grade.EXAM_TYPE_CHOICES)
+
+
+def _mean(values):
+    return round(sum(values) / len(values), 1) if values else None
+
+
+class Gradebook:
+    """
+    students: row users, in order
+    columns:  [{'term_id', 'term', 'exam_type', 'label'}, ...]
+    cells:    [[None | {'score', 'max_score', 'percentage', 'letter'}, ...], ...]
+    ranks:    {student_id: {'average', 'rank', 'percentile'}}
+    """
+
+    def __init__(self, students, columns, cells, ranks=None):
+        self.students = students
+        self.columns = columns
+        self.cells = cells
+        self.ranks = ranks or {}
+        self.ranked = len(self.ranks)
+
+        # Row and column averages, over the cells that have a grade
+        by_row = [[c['percentage'] for c in row if c] for row in cells]
+        by_column = [
+            [row[j]['percentage'] for row in cells if row[j]]
+            for j in range(len(columns))
+        ]
+        self.row_averages = [_mean(values) for values in by_row]
+        self.column_averages = [_mean(values) for values in by_column]
+        self.average = _mean([p for values in by_row for p in values])
+
+    def rows(self):
+        """Yields {'student', 'cells', 'average', 'letter', 'rank'} for the template."""
+        for student, cells, average in zip(self.students, self.cells, self.row_averages):
+            yield {
+                'student': student,
+                'cells': cells,
+                'average': average,
+                'letter': Grade.letter_for(average) if average is not None else '',
+                'rank': self.ranks.get(student.id),
+            }
+
+    def csv_header(self):
+        return (
+            ['username', 'name'] + [c['label'] for c in self.columns]
+            + ['average', 'letter_grade', 'rank', 'percentile']
+        )
+
+    def csv_rows(self):
+        for row in self.rows():
+            student = row['student']
+            yield (
+                [student.username, student.get_full_name()]
+                + [cell['percentage'] if cell else '' for cell in row['cells']]
+                + [row['average'] if row['average'] is not None else '', row['letter']]
+                + ([row['rank']['rank'], row['rank']['percentile']] if row['rank'] else ['', ''])
+            )
+
+
+def build_gradebook(assignment):
+    """
+    Three queries: the active roster, the year's terms, and one
+    values_list() over the assignment's grades. The class rankings come
+    from the cache, or cost two more queries when it is cold.
+    """
+    students = list(
+        CustomUser.objects
+        .filter(
+            enrollments__class_assigned=assignment.class_assigned,
+            enrollments__academic_year=assignment.academic_year,
+            enrollments__status='active',
+        )
+        .only('id', 'username', 'first_name', 'last_name')
+        .order_by('last_name', 'first_name', 'username')
+        .distinct()
+    )
+    terms = list(
+        Term.objects
+        .filter(academic_year=assignment.academic_year)
+        .order_by('start_date')
+        .values_list('id', 'name')
+    )
+    raw = list(
+        Grade.objects
+        .filter(
+            subject=assignment.subject,
+            class_assigned=assignment.class_assigned,
+            academic_year=assignment.academic_year,
+        )
+        .values_list('student_id', 'term_id', 'exam_type', 'score', 'max_score')
+    )
+
+    # Columns: term order (term-less grades first), then exam type order
+    term_order = {None: -1, **{term_id: i for i, (term_id, _) in enumerate(terms)}}
+    term_names = dict(terms)
+    keys = sorted(
+        {(term_id, exam_type) for _, term_id, exam_type, _, _ in raw},
+        key=lambda k: (term_order.get(k[0], len(terms)), EXAM_TYPE_ORDER.get(k[1], len(EXAM_TYPE_ORDER))),
+    )
+    columns = [
+        {
+            'term_id': term_id,
+            'term': term_names.get(term_id),
+            'exam_type': exam_type,
+            'label': (
+                f"{term_names[term_id]} · " if term_id in term_names else ''
+            ) + EXAM_TYPE_LABELS.get(exam_type, exam_type),
+        }
+        for term_id, exam_type in keys
+    ]
+    column_index = {key: j for j, key in enumerate(keys)}
+    row_index = {student.id: i for i, student in enumerate(students)}
+
+    # Columnar pass: one list per field, percentages and letters
+    # computed over whole lists
+    scores = [float(r[3]) for r in raw]
+    max_scores = [float(r[4]) for r in raw]
+    percentages = list(map(Grade.compute_percentage, scores, max_scores))
+    letters = list(map(Grade.letter_for, percentages))
+
+    cells = [[None] * len(columns) for _ in students]
+    for (student_id, term_id, exam_type, _, _), score, max_score, pct, letter in zip(
+        raw, scores, max_scores, percentages, letters
+    ):
+        i = row_index.get(student_id)
+        if i is None:
+            continue   # graded earlier but no longer on the active roster
+        cells[i][column_index[(term_id, exam_type)]] = {
+            'score': score,
+            'max_score': max_score,
+            'percentage': pct,
+            'letter': letter,
+        }
+
+    rankings = get_rankings(assignment.academic_year_id, assignment.class_assigned_id)
+    return Gradebook(students, columns, cells, rankings['subjects'].get(assignment.subject_id))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import AcademicYear
+from teachers.partitioning import partitioning_enabled, is_partitioned, detach_year_partition, partition_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Detach an archived academic year's attendance partition, optionally dropping it. "
+        "Daily rollups and enrollment counters for the year are kept and frozen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', help="Academic year name, e.g. 2023-2024")
+        parser.add_argument('--drop', action='store_true', help="Drop the detached table as well")
+
+    def handle(self, *args, **options):
+        if not (partitioning_enabled() and is_partitioned()):
+            raise CommandError("The attendance table is not partitioned.")
+
+        try:
+            year = AcademicYear.objects.get(name=options['year'])
+        except AcademicYear.DoesNotExist:
+            raise CommandError(f"No academic year named {options['year']!r}.")
+        if year.is_current:
+            raise CommandError("Refusing to archive the current academic year.")
+
+        if not detach_year_partition(year, drop=options['drop']):
+            raise CommandError(f"{year} has no attached attendance partition.")
+
+        name = partition_name(year)
+        if options['drop']:
+            self.stdout.write(self.style.SUCCESS(f"Detached and dropped {name}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Detached {name}; it is now a standalone table."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from academics.models import AcademicYear
+from teachers.partitioning import (
+    partitioning_enabled,
+    is_partitioned,
+    convert_to_partitioned,
+    create_year_partition,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the attendance partition for every academic year that lacks one "
+        "(PostgreSQL with ATTENDANCE_PARTITIONING=True only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help="Convert the plain attendance table to a partitioned one first",
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning_enabled():
+            self.stdout.write(self.style.WARNING(
+                "Attendance partitioning is off (needs PostgreSQL and ATTENDANCE_PARTITIONING=True)."
+            ))
+            return
+
+        years = list(AcademicYear.objects.order_by('start_date'))
+
+        if not is_partitioned():
+            if not options['convert']:
+                self.stdout.write(self.style.WARNING(
+                    "The attendance table is not partitioned yet. Run again with --convert."
+                ))
+                return
+            created = convert_to_partitioned(years)
+            self.stdout.write(self.style.SUCCESS(
+                f"Converted the attendance table with {len(created)} year partition(s)."
+            ))
+
+        for year in years:
+            if create_year_partition(year):
+                self.stdout.write(self.style.SUCCESS(f"Created partition for {year}."))
+
+        for name, bounds in list_partitions():
+            self.stdout.write(f"{name}: {bounds}")
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from teachers.sync import SYNC_KEY_RETENTION, prune_sync_keys
+
+
+class Command(BaseCommand):
+    help = "Delete attendance sync idempotency keys older than the retention period. Run it daily, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=SYNC_KEY_RETENTION.days,
+            help=f"Keep keys this many days (default: {SYNC_KEY_RETENTION.days})",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_sync_keys(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} sync key(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from teachers.rollups import rebuild_attendance_rollups, rebuild_teacher_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily student and teacher attendance rollups from raw attendance rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="Only rebuild from this date (YYYY-MM-DD)")
+        parser.add_argument('--to', dest='date_to', help="Only rebuild up to this date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        date_from = self._parse(options['date_from'])
+        date_to = self._parse(options['date_to'])
+
+        students = rebuild_attendance_rollups(date_from, date_to)
+        teachers = rebuild_teacher_attendance_rollups(date_from, date_to)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {students} student and {teachers} teacher rollup row(s)."
+        ))
+
+    def _parse(self, value):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Invalid date: {value}")
+        return parsed
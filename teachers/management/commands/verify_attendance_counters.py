@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from students.models import Enrollment
+from teachers.rollups import find_stale_enrollment_counters, recount_enrollment_counters
+
+
+class Command(BaseCommand):
+    help = "Check the per-enrollment attendance counters against raw attendance and optionally repair them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help="Recount every enrollment that is out of step")
+
+    def handle(self, *args, **options):
+        stale_ids = []
+        for enrollment_id, stored, expected in find_stale_enrollment_counters():
+            stale_ids.append(enrollment_id)
+            self.stdout.write(f"{enrollment_id}: stored {stored} expected {expected}")
+
+        if not stale_ids:
+            self.stdout.write(self.style.SUCCESS("All enrollment attendance counters are consistent."))
+            return
+
+        if options['repair']:
+            repaired = recount_enrollment_counters(Enrollment.objects.filter(id__in=stale_ids))
+            self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} enrollment(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(stale_ids)} enrollment(s) out of step. Run again with --repair to fix."
+            ))
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('teachers', 'Attendance')
+    TeacherAttendance = apps.get_model('teachers', 'TeacherAttendance')
+    AttendanceDailyRollup = apps.get_model('teachers', 'AttendanceDailyRollup')
+    TeacherAttendanceDailyRollup = apps.get_model('teachers', 'TeacherAttendanceDailyRollup')
+
+    counts = dict(
+        present_count=Count('id', filter=Q(status='present')),
+        absent_count=Count('id', filter=Q(status='absent')),
+    )
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(**row)
+        for row in (
+            Attendance.objects
+            .filter(student__is_student=True)
+            .values('date', 'class_assigned_id', 'academic_year_id')
+            .annotate(**counts)
+            .order_by()
+        )
+    ], batch_size=500)
+    TeacherAttendanceDailyRollup.objects.bulk_create([
+        TeacherAttendanceDailyRollup(**row)
+        for row in TeacherAttendance.objects.values('date').annotate(**counts).order_by()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_timetableslot'),
+        ('teachers', '0003_teacherattendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherAttendanceDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Teacher Attendance Daily Rollup',
+                'verbose_name_plural': 'Teacher Attendance Daily Rollups',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(db_index=True)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='academics.academicyear')),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='academics.class')),
+            ],
+            options={
+                'verbose_name': 'Attendance Daily Rollup',
+                'verbose_name_plural': 'Attendance Daily Rollups',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'class_assigned', 'academic_year')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:10
+
+from django.db import migrations
+
+
+def partition_attendance(apps, schema_editor):
+    # Only on PostgreSQL with ATTENDANCE_PARTITIONING=True. SQLite and
+    # unpartitioned PostgreSQL deployments keep the plain table.
+    from teachers.partitioning import partitioning_enabled, is_partitioned, convert_to_partitioned
+
+    conn = schema_editor.connection
+    if not partitioning_enabled(conn) or is_partitioned(conn):
+        return
+    AcademicYear = apps.get_model('academics', 'AcademicYear')
+    convert_to_partitioned(list(AcademicYear.objects.all()), conn)
+
+
+def unpartition_attendance(apps, schema_editor):
+    from teachers.partitioning import is_partitioned, convert_to_plain
+
+    conn = schema_editor.connection
+    if is_partitioned(conn):
+        convert_to_plain(conn)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_timetableslot'),
+        ('teachers', '0004_attendance_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_attendance, unpartition_attendance),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:45
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_timetableslot'),
+        ('teachers', '0005_attendance_partitioning'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSyncKey',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(help_text='Client-generated key of the entry', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Attendance Sync Key',
+                'verbose_name_plural': 'Attendance Sync Keys',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_assigned', 'updated_at'], name='teachers_at_class_a_e37870_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendancesynckey',
+            name='teacher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_sync_keys', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attendancesynckey',
+            unique_together={('teacher', 'key')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0006_attendance_sync'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancesynckey',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
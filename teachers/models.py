@@ -60,6 +60,8 @@ class Attendance(models.Model):
             models.Index(fields=['student', 'date']),
             # Covers: "give me last 7 days school-wide"
             models.Index(fields=['date', 'status']),
+            # Covers: "what changed in these classes since the last sync"
+            models.Index(fields=['class_assigned', 'updated_at']),
         ]
     def __str__(self):
         return f"{self.student} - {self.date} - {self.status}"
@@ -116,4 +118,99 @@ class TeacherAttendance(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.teacher.username} — {self.date} — {self.get_status_display()}"
\ No newline at end of file
+        return f"{self.teacher.username} — {self.date} — {self.get_status_display()}"
+
+class AttendanceDailyRollup(models.Model):
+    """
+    Pre-aggregated student attendance per class per day.
+
+    WHY: Dashboard charts used to re-count raw Attendance rows (joined to
+    CustomUser) on every load. One row here replaces a whole class-day of
+    raw records, so chart cost grows with days shown, not rows stored.
+
+    Kept up to date by teachers.rollups.refresh_attendance_rollup()
+    from every attendance write path. Rebuild with:
+        python manage.py rebuild_attendance_rollups
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    date = models.DateField(db_index=True)
+    class_assigned = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups'
+    )
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups'
+    )
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('date', 'class_assigned', 'academic_year')
+        ordering = ['-date']
+        verbose_name = "Attendance Daily Rollup"
+        verbose_name_plural = "Attendance Daily Rollups"
+
+    def __str__(self):
+        return f"{self.class_assigned} — {self.date} — {self.present_count}/{self.total}"
+
+    @property
+    def total(self):
+        return self.present_count + self.absent_count
+
+
+class TeacherAttendanceDailyRollup(models.Model):
+    """
+    Pre-aggregated teacher attendance per day.
+    Same idea as AttendanceDailyRollup — teachers have no class, so the
+    day is the whole key.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    date = models.DateField(unique=True)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Teacher Attendance Daily Rollup"
+        verbose_name_plural = "Teacher Attendance Daily Rollups"
+
+    def __str__(self):
+        return f"{self.date} — {self.present_count}/{self.total}"
+
+    @property
+    def total(self):
+        return self.present_count + self.absent_count
+
+
+class AttendanceSyncKey(models.Model):
+    """
+    Idempotency key of one attendance entry sent to the sync endpoint.
+
+    WHY: Offline clients retry whole batches. An entry whose key is
+    already stored is skipped, so a late retry cannot overwrite a newer
+    edit or send its notifications a second time.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    teacher = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='attendance_sync_keys'
+    )
+    key = models.CharField(max_length=64, help_text="Client-generated key of the entry")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)   # pruned after SYNC_KEY_RETENTION
+
+    class Meta:
+        unique_together = ('teacher', 'key')
+        verbose_name = "Attendance Sync Key"
+        verbose_name_plural = "Attendance Sync Keys"
+
+    def __str__(self):
+        return f"{self.teacher} — {self.key}"
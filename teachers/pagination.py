@@ -0,0 +1,101 @@
+# teachers/pagination.py
+"""
+Keyset (cursor) pagination for large, date-ordered tables.
+
+Paginator does a COUNT plus OFFSET, so page 200 makes the database
+walk past 10,000 rows first. Here each page continues from the last
+(date, id) seen, which the (date, ...) indexes answer directly — page N
+costs the same as page 1, and no COUNT is needed.
+"""
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+
+def encode_cursor(record):
+    return f"{record.date.isoformat()}_{record.id}"
+
+
+def decode_cursor(value):
+    """Returns (date, uuid) or None for a missing or malformed cursor."""
+    if not value or '_' not in value:
+        return None
+    raw_date, raw_id = value.split('_', 1)
+    try:
+        parsed_date = parse_date(raw_date)
+        parsed_id = uuid.UUID(raw_id)
+    except ValueError:
+        return None
+    if parsed_date is None:
+        return None
+    return parsed_date, parsed_id
+
+
+class KeysetPage:
+    """
+    One page of results plus the cursors needed to move either way.
+    Exposes the attribute names the templates already use
+    (object_list, has_next, has_previous) so it iterates like a Page.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def keyset_paginate(qs, after=None, before=None, per_page=50):
+    """
+    Newest-first pagination on (date, id) — one query per page.
+
+    after:  cursor of the last row of the previous page → older rows
+    before: cursor of the first row of the next page  → newer rows
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+
+    if before:
+        d, pk = before
+        rows = list(
+            qs.filter(Q(date__gt=d) | Q(date=d, id__gt=pk))
+            .order_by('date', 'id')[:per_page + 1]
+        )
+        has_more_newer = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else None,
+            previous_cursor=encode_cursor(rows[0]) if rows and has_more_newer else None,
+        )
+
+    if after:
+        d, pk = after
+        qs = qs.filter(Q(date__lt=d) | Q(date=d, id__lt=pk))
+
+    rows = list(qs.order_by('-date', '-id')[:per_page + 1])
+    has_more_older = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_more_older else None,
+        # Only offer "newer" when we arrived here from a cursor
+        previous_cursor=encode_cursor(rows[0]) if rows and after else None,
+    )
@@ -0,0 +1,256 @@
+# teachers/partitioning.py
+"""
+Optional range partitioning of the Attendance table on PostgreSQL.
+
+Turned on with ATTENDANCE_PARTITIONING=True on a PostgreSQL database.
+The table is split by date into one partition per AcademicYear
+(start_date up to and including end_date). A default partition catches
+any date outside every year, so a missing partition never rejects a
+write.
+
+PostgreSQL requires the partition key in every unique constraint, so
+the partitioned table's primary key is (id, date). Django still treats
+id alone as the primary key. It is a UUID, so it stays unique in
+practice.
+
+On SQLite, or on PostgreSQL with the setting off, nothing here touches
+the database and the table stays a plain table.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from academics.models import AcademicYear
+
+
+TABLE = 'teachers_attendance'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def partitioning_enabled(conn=None):
+    """True when the setting is on and the database is PostgreSQL."""
+    conn = conn or connection
+    return bool(getattr(settings, 'ATTENDANCE_PARTITIONING', False)) and conn.vendor == 'postgresql'
+
+
+def is_partitioned(conn=None):
+    """True when the attendance table is already a partitioned table."""
+    conn = conn or connection
+    if conn.vendor != 'postgresql':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_name(year):
+    """teachers_attendance_y20240701 for a year starting 1 July 2024."""
+    return f'{TABLE}_y{year.start_date:%Y%m%d}'
+
+
+def partition_bounds(year):
+    """(from, to) range bounds. PostgreSQL's upper bound is exclusive."""
+    return year.start_date, year.end_date + timedelta(days=1)
+
+
+def _for_values(year):
+    start, end = partition_bounds(year)
+    # Dates format to plain ISO strings, so they are safe to inline.
+    # DDL does not take bind parameters.
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def list_partitions(conn=None):
+    """[(partition_name, bound_expression), ...] currently attached."""
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            [TABLE],
+        )
+        return cursor.fetchall()
+
+
+def year_partition_sql(year, conn=None):
+    """
+    Statements that add one academic year's partition to an existing
+    partitioned table.
+
+    Rows for those dates may already be in the default partition, for
+    example when marked before the year existed. They are moved across
+    first, otherwise PostgreSQL refuses the attach.
+    """
+    qn = (conn or connection).ops.quote_name
+    name = partition_name(year)
+    start, end = partition_bounds(year)
+    return [
+        f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS)",
+        (
+            f"WITH moved AS ("
+            f"DELETE FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE date >= '{start.isoformat()}' AND date < '{end.isoformat()}' "
+            f"RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved"
+        ),
+        f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} {_for_values(year)}",
+    ]
+
+
+def create_year_partition(year, conn=None):
+    """
+    Adds the partition for one AcademicYear. Returns False if it already
+    exists. A range that overlaps another year raises the database error
+    unchanged.
+    """
+    conn = conn or connection
+    if partition_name(year) in dict(list_partitions(conn)):
+        return False
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        for statement in year_partition_sql(year, conn):
+            cursor.execute(statement)
+    return True
+
+
+def detach_year_partition(year, drop=False, conn=None):
+    """
+    Detaches an archived year's partition from the attendance table.
+    This only changes the catalog, so it takes no time whatever the
+    size of the year.
+
+    The detached table keeps its name, so it can be dumped or
+    re-attached. With drop=True it is removed. The daily rollups and the
+    enrollment counters for that year are left as they are, as the
+    historical summary, and are frozen from then on (archived_year_ids).
+
+    Returns False if the year has no attached partition.
+    """
+    conn = conn or connection
+    name = partition_name(year)
+    if name not in dict(list_partitions(conn)):
+        return False
+    qn = conn.ops.quote_name
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+        if drop:
+            cursor.execute(f"DROP TABLE {qn(name)}")
+    return True
+
+
+def archived_year_ids(conn=None):
+    """
+    Ids of the academic years whose attendance is no longer in the table:
+    on a partitioned table, every year without an attached partition of
+    its own. Empty when the table is not partitioned.
+
+    Once a year's partition is detached, its enrollment counters and
+    daily rollups are the only record of that year left, so recounts and
+    rebuilds skip these years instead of zeroing them.
+    """
+    conn = conn or connection
+    if not (partitioning_enabled(conn) and is_partitioned(conn)):
+        return []
+    attached = dict(list_partitions(conn))
+    return [
+        year.id for year in AcademicYear.objects.only('id', 'start_date')
+        if partition_name(year) not in attached
+    ]
+
+
+# ── Converting the table in place ──
+
+def _capture_definitions(cursor):
+    """
+    Unique/foreign-key constraints and plain indexes of the attendance
+    table, minus the primary key, so that they can be recreated on the
+    rebuilt table.
+    """
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f') ORDER BY contype DESC",
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x "
+        "WHERE x.indrelid = to_regclass(%s) AND NOT x.indisprimary "
+        "AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint c "
+        "  WHERE c.conindid = x.indexrelid AND c.conrelid = x.indrelid"
+        ")",
+        [TABLE],
+    )
+    # Index definitions read off a partitioned table say "ON ONLY".
+    # Strip that so the index is built on every partition, or on the
+    # plain table when converting back.
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    return constraints, indexes
+
+
+def _rebuild(conn, partition_clause, primary_key, after_create=()):
+    """
+    Moves the attendance rows into a freshly created table:
+    rename the old table, create the new one with the same columns, copy
+    the rows, drop the old table, then restore the primary key,
+    constraints and indexes under their original names. Indexes are
+    built once, after the copy, rather than row by row.
+    """
+    qn = conn.ops.quote_name
+    old = f'{TABLE}_old'
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        constraints, indexes = _capture_definitions(cursor)
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(old)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(old)} INCLUDING DEFAULTS) {partition_clause}"
+        )
+        for statement in after_create:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(old)}")
+        cursor.execute(f"DROP TABLE {qn(old)}")
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + '_pkey')} "
+            f"PRIMARY KEY ({', '.join(primary_key)})"
+        )
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+def convert_to_partitioned(years, conn=None):
+    """
+    Turns the plain attendance table into a date-range partitioned one,
+    with one partition per year in `years` plus the default partition.
+
+    Years whose range overlaps an earlier one are skipped. Their rows
+    land in the earlier year's partition or in the default.
+    Returns the names of the partitions created.
+    """
+    conn = conn or connection
+    qn = conn.ops.quote_name
+    statements, created, last_end = [], [], None
+    for year in sorted(years, key=lambda y: y.start_date):
+        start, end = partition_bounds(year)
+        if last_end is not None and start < last_end:
+            continue
+        last_end = end
+        name = partition_name(year)
+        statements.append(f"CREATE TABLE {qn(name)} PARTITION OF {qn(TABLE)} {_for_values(year)}")
+        created.append(name)
+    statements.append(f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT")
+
+    _rebuild(conn, 'PARTITION BY RANGE (date)', ['id', 'date'], statements)
+    return created
+
+
+def convert_to_plain(conn=None):
+    """
+    Reverse of convert_to_partitioned(): folds every attached partition
+    back into one plain table. Detached archive tables are left alone.
+    """
+    _rebuild(conn or connection, '', ['id'])
@@ -0,0 +1,146 @@
+# teachers/register.py
+"""
+Monthly class attendance register: students as rows, school days as
+columns.
+
+Built from two queries — the class roster and one values_list() over the
+month's Attendance rows — and pivoted in Python into two integer bitsets
+per student (bit i set = marked present/absent on column i). No model
+instances are created per cell, and row totals are popcounts.
+"""
+import calendar
+from datetime import date
+
+from django.utils import timezone
+
+from .models import Attendance
+from accounts.models import CustomUser
+
+
+# Register columns are the timetable's school days (Mon–Sat).
+# Any other day that has records is added so nothing is hidden.
+SCHOOL_WEEKDAYS = {0, 1, 2, 3, 4, 5}
+
+MARK_PRESENT = 'P'
+MARK_ABSENT = 'A'
+MARK_NONE = ''
+
+
+def parse_month(value, default=None):
+    """'YYYY-MM' → date(YYYY, MM, 1); falls back to default (or this month)."""
+    try:
+        year, month = (int(part) for part in (value or '').split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        return default or timezone.localdate().replace(day=1)
+
+
+class AttendanceRegister:
+    """
+    Compact register matrix.
+
+    days:     column dates, in order
+    students: row users, in order
+    present / absent: {student_id: int bitset over the day columns}
+    """
+
+    def __init__(self, month, days, students, present, absent):
+        self.month = month
+        self.days = days
+        self.students = students
+        self.present = present
+        self.absent = absent
+
+    def rows(self):
+        """
+        Yields dicts for the template:
+        {'student', 'marks': ['P', 'A', '', ...], 'present', 'absent', 'percentage'}
+        """
+        columns = range(len(self.days))
+        for student in self.students:
+            p_bits = self.present.get(student.id, 0)
+            a_bits = self.absent.get(student.id, 0)
+            present = p_bits.bit_count()
+            absent = a_bits.bit_count()
+            total = present + absent
+            yield {
+                'student': student,
+                'marks': [
+                    MARK_PRESENT if p_bits >> i & 1 else MARK_ABSENT if a_bits >> i & 1 else MARK_NONE
+                    for i in columns
+                ],
+                'present': present,
+                'absent': absent,
+                'percentage': round((present / total) * 100, 1) if total else 0,
+            }
+
+    def day_totals(self):
+        """Present count per column, for the footer row."""
+        totals = [0] * len(self.days)
+        for bits in self.present.values():
+            i = 0
+            while bits:
+                if bits & 1:
+                    totals[i] += 1
+                bits >>= 1
+                i += 1
+        return totals
+
+    def csv_header(self):
+        return ['username', 'name'] + [d.isoformat() for d in self.days] + ['present', 'absent', 'percentage']
+
+    def csv_rows(self):
+        for row in self.rows():
+            student = row['student']
+            yield (
+                [student.username, student.get_full_name()]
+                + row['marks']
+                + [row['present'], row['absent'], row['percentage']]
+            )
+
+
+def build_class_register(class_assigned, academic_year, month):
+    """
+    Builds the register for one class and calendar month.
+    Query 1: the active roster. Query 2: the month's attendance rows.
+    """
+    _, last_day = calendar.monthrange(month.year, month.month)
+    first, last = month.replace(day=1), month.replace(day=last_day)
+
+    students = list(
+        CustomUser.objects
+        .filter(
+            enrollments__class_assigned=class_assigned,
+            enrollments__academic_year=academic_year,
+            enrollments__status='active',
+        )
+        .only('id', 'username', 'first_name', 'last_name')
+        .order_by('last_name', 'first_name', 'username')
+        .distinct()
+    )
+
+    marks = list(
+        Attendance.objects
+        .filter(
+            class_assigned=class_assigned,
+            academic_year=academic_year,
+            date__gte=first,
+            date__lte=last,
+        )
+        .values_list('student_id', 'date', 'status')
+    )
+
+    recorded_days = {d for _, d, _ in marks}
+    days = sorted(
+        {date(month.year, month.month, n) for n in range(1, last_day + 1)
+         if date(month.year, month.month, n).weekday() in SCHOOL_WEEKDAYS}
+        | recorded_days
+    )
+    column = {d: i for i, d in enumerate(days)}
+
+    present, absent = {}, {}
+    for student_id, d, status in marks:
+        target = present if status == Attendance.STATUS_PRESENT else absent
+        target[student_id] = target.get(student_id, 0) | (1 << column[d])
+
+    return AttendanceRegister(first, days, students, present, absent)
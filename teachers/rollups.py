@@ -0,0 +1,284 @@
+# teachers/rollups.py
+"""
+Maintenance of the daily attendance rollup tables and the per-enrollment
+attendance counters.
+
+Every write path calls refresh_* for the keys it touched. The refresh
+re-counts just that one class-day (or teacher-day), which is bounded by
+class size, and upserts the result. rebuild_* recomputes everything from
+the raw tables and is what the management command runs.
+
+Enrollment counters are moved by deltas on the bulk path
+(bump_enrollment_counters) and recounted from raw rows everywhere else
+(recount_enrollment_counters).
+
+On a partitioned table, a year whose partition has been detached has no
+raw rows left. Its counters and daily rollups are frozen: recounts,
+checks and rebuilds skip it (partitioning.archived_year_ids).
+"""
+from django.db import transaction
+from django.db.models import Count, Q, F, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Attendance,
+    TeacherAttendance,
+    AttendanceDailyRollup,
+    TeacherAttendanceDailyRollup,
+)
+from .partitioning import archived_year_ids
+from students.models import Enrollment
+
+
+def _counts(model):
+    """Present/absent aggregates shared by both attendance models."""
+    return dict(
+        present_count=Count('id', filter=Q(status=model.STATUS_PRESENT)),
+        absent_count=Count('id', filter=Q(status=model.STATUS_ABSENT)),
+    )
+
+
+def refresh_attendance_rollup(class_id, academic_year_id, date):
+    """
+    Re-counts one (date, class, year) and writes it to the rollup.
+    Two queries: one aggregate over the class-day, one upsert/delete.
+    """
+    result = (
+        Attendance.objects
+        .filter(
+            class_assigned_id=class_id,
+            academic_year_id=academic_year_id,
+            date=date,
+            student__is_student=True,
+        )
+        .aggregate(**_counts(Attendance))
+    )
+    key = dict(date=date, class_assigned_id=class_id, academic_year_id=academic_year_id)
+
+    # A class-day with no records left should disappear from the charts
+    if not (result['present_count'] or result['absent_count']):
+        AttendanceDailyRollup.objects.filter(**key).delete()
+        return None
+
+    AttendanceDailyRollup.objects.bulk_create(
+        [AttendanceDailyRollup(**key, **result)],
+        update_conflicts=True,
+        unique_fields=['date', 'class_assigned', 'academic_year'],
+        update_fields=['present_count', 'absent_count', 'updated_at'],
+    )
+    return result
+
+
+def refresh_teacher_attendance_rollup(date):
+    """Re-counts one day of TeacherAttendance into the rollup."""
+    result = (
+        TeacherAttendance.objects
+        .filter(date=date)
+        .aggregate(**_counts(TeacherAttendance))
+    )
+
+    if not (result['present_count'] or result['absent_count']):
+        TeacherAttendanceDailyRollup.objects.filter(date=date).delete()
+        return None
+
+    TeacherAttendanceDailyRollup.objects.bulk_create(
+        [TeacherAttendanceDailyRollup(date=date, **result)],
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=['present_count', 'absent_count', 'updated_at'],
+    )
+    return result
+
+
+def rebuild_attendance_rollups(date_from=None, date_to=None):
+    """
+    Recomputes the student rollup from raw Attendance in one grouped
+    query. Optional date bounds limit the rebuild to a window. Rollups
+    of archived years are kept.
+    Returns the number of rollup rows written.
+    """
+    raw = Attendance.objects.filter(student__is_student=True)
+    existing = AttendanceDailyRollup.objects.all()
+    archived = archived_year_ids()
+    if archived:
+        raw = raw.exclude(academic_year_id__in=archived)
+        existing = existing.exclude(academic_year_id__in=archived)
+    if date_from:
+        raw = raw.filter(date__gte=date_from)
+        existing = existing.filter(date__gte=date_from)
+    if date_to:
+        raw = raw.filter(date__lte=date_to)
+        existing = existing.filter(date__lte=date_to)
+
+    grouped = (
+        raw
+        .values('date', 'class_assigned_id', 'academic_year_id')
+        .annotate(**_counts(Attendance))
+        .order_by()
+    )
+    rows = [AttendanceDailyRollup(**row) for row in grouped.iterator(chunk_size=2000)]
+
+    with transaction.atomic():
+        existing.delete()
+        AttendanceDailyRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def rebuild_teacher_attendance_rollups(date_from=None, date_to=None):
+    """Teacher counterpart of rebuild_attendance_rollups()."""
+    raw = TeacherAttendance.objects.all()
+    existing = TeacherAttendanceDailyRollup.objects.all()
+    if date_from:
+        raw = raw.filter(date__gte=date_from)
+        existing = existing.filter(date__gte=date_from)
+    if date_to:
+        raw = raw.filter(date__lte=date_to)
+        existing = existing.filter(date__lte=date_to)
+
+    grouped = (
+        raw
+        .values('date')
+        .annotate(**_counts(TeacherAttendance))
+        .order_by()
+    )
+    rows = [TeacherAttendanceDailyRollup(**row) for row in grouped]
+
+    with transaction.atomic():
+        existing.delete()
+        TeacherAttendanceDailyRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+# ── Per-enrollment counters ──
+
+def bump_enrollment_counters(class_assigned_id, academic_year_id, date, previous, statuses):
+    """
+    Applies one class-day submit to the Enrollment counters in a single
+    UPDATE.
+
+    previous: {student_id: old_status} read (under lock) before the upsert
+    statuses: {student_id: new_status}
+
+    Each student moves by at most one in each counter, so students are
+    grouped by the kind of change and folded into CASE expressions —
+    the statement size does not depend on the number of students.
+    """
+    P, A = Attendance.STATUS_PRESENT, Attendance.STATUS_ABSENT
+    gain_present, lose_present = [], []
+    gain_absent, lose_absent = [], []
+    now_present, now_absent = [], []
+
+    for student_id, status in statuses.items():
+        old = previous.get(student_id)
+        (now_present if status == P else now_absent).append(student_id)
+        if old == status:
+            continue
+        if status == P:
+            gain_present.append(student_id)
+        else:
+            gain_absent.append(student_id)
+        if old == P:
+            lose_present.append(student_id)
+        elif old == A:
+            lose_absent.append(student_id)
+
+    # Only move "last marked" forward — editing an older day must not
+    # overwrite today's status.
+    is_latest = Q(last_attendance_date__isnull=True) | Q(last_attendance_date__lte=date)
+
+    return Enrollment.objects.filter(
+        class_assigned_id=class_assigned_id,
+        academic_year_id=academic_year_id,
+        student_id__in=now_present + now_absent,
+    ).update(
+        attendance_present=F('attendance_present') + Case(
+            When(student_id__in=gain_present, then=Value(1)),
+            When(student_id__in=lose_present, then=Value(-1)),
+            default=Value(0),
+        ),
+        attendance_absent=F('attendance_absent') + Case(
+            When(student_id__in=gain_absent, then=Value(1)),
+            When(student_id__in=lose_absent, then=Value(-1)),
+            default=Value(0),
+        ),
+        last_attendance_status=Case(
+            When(is_latest & Q(student_id__in=now_present), then=Value(P)),
+            When(is_latest & Q(student_id__in=now_absent), then=Value(A)),
+            default=F('last_attendance_status'),
+        ),
+        last_attendance_date=Case(
+            When(is_latest, then=Value(date)),
+            default=F('last_attendance_date'),
+        ),
+    )
+
+
+def _expected_counters():
+    """
+    Correlated subqueries computing each counter from raw Attendance
+    for the enrollment's own class and year.
+    """
+    scoped = Attendance.objects.filter(
+        student=OuterRef('student'),
+        class_assigned=OuterRef('class_assigned'),
+        academic_year=OuterRef('academic_year'),
+    )
+
+    def count(status):
+        return Coalesce(
+            Subquery(
+                scoped.filter(status=status)
+                .order_by()
+                .values('student')
+                .annotate(n=Count('id'))
+                .values('n')
+            ),
+            Value(0),
+        )
+
+    latest = scoped.order_by('-date')
+    return dict(
+        attendance_present=count(Attendance.STATUS_PRESENT),
+        attendance_absent=count(Attendance.STATUS_ABSENT),
+        last_attendance_date=Subquery(latest.values('date')[:1]),
+        last_attendance_status=Coalesce(Subquery(latest.values('status')[:1]), Value('')),
+    )
+
+
+def _live(enrollments):
+    """The enrollments whose year's attendance is still in the table."""
+    archived = archived_year_ids()
+    return enrollments.exclude(academic_year_id__in=archived) if archived else enrollments
+
+
+def recount_enrollment_counters(enrollments):
+    """
+    Recomputes the counters for the given Enrollment queryset from raw
+    Attendance in one UPDATE. Used for single-row edits, class changes
+    and repairs. Enrollments in archived years are left alone.
+    """
+    return _live(enrollments).update(**_expected_counters())
+
+
+def find_stale_enrollment_counters(enrollments=None):
+    """
+    Yields (enrollment_id, stored, expected) for every enrollment whose
+    counters disagree with raw Attendance. Streams in chunks so a full
+    school check stays flat in memory. Archived years are not checked.
+    """
+    if enrollments is None:
+        enrollments = Enrollment.objects.all()
+    enrollments = _live(enrollments)
+    fields = list(_expected_counters())
+    expected = {f'expected_{name}': expr for name, expr in _expected_counters().items()}
+    rows = (
+        enrollments
+        .annotate(**expected)
+        .values('id', *fields, *expected)
+        .order_by()
+    )
+    for row in rows.iterator(chunk_size=1000):
+        stored = {name: row[name] for name in fields}
+        wanted = {name: row[f'expected_{name}'] for name in fields}
+        if stored != wanted:
+            yield row['id'], stored, wanted
@@ -0,0 +1,424 @@
+# teachers/services.py
+"""
+Write paths for student and teacher attendance, and for grade sheets.
+
+Views parse the request and call into here. Everything in this module
+works on whole rosters at once so the number of queries per submit
+stays the same no matter how many students are in the class.
+"""
+from datetime import date as date_cls
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Attendance, TeacherAttendance
+from academics.models import Grade
+from academics.summaries import refresh_grade_summaries
+from .rollups import (
+    refresh_attendance_rollup,
+    refresh_teacher_attendance_rollup,
+    bump_enrollment_counters,
+)
+from students.models import Enrollment, ParentStudent
+from students.dashboard import invalidate_student_dashboards
+from students.report_cards import invalidate_report_cards
+from core.models import Notification
+
+
+VALID_STATUSES = (Attendance.STATUS_PRESENT, Attendance.STATUS_ABSENT)
+
+
+def parse_attendance_date(value):
+    """
+    Accepts a date or an ISO 'YYYY-MM-DD' string.
+    Raises ValueError for anything else so callers can reject the submit.
+    """
+    if isinstance(value, date_cls):
+        return value
+    if not isinstance(value, str):
+        # e.g. a number or list from a JSON sync entry
+        raise ValueError(f"Invalid date: {value!r}")
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value!r}")
+    return parsed
+
+
+def validate_roster(students, statuses):
+    """
+    Checks every student has a valid status before anything is written.
+
+    Why up front: the old loop wrote row by row and raised half way
+    through, leaving part of the class saved. Now either the whole
+    roster is valid or nothing is touched.
+
+    Returns a list of (student, status) pairs in roster order.
+    """
+    rows = []
+    for student in students:
+        status = statuses.get(student.id)
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status for {student}")
+        rows.append((student, status))
+    return rows
+
+
+def record_class_attendance(assignment, date, rows, marked_by):
+    """
+    Saves attendance for a whole class in one multi-row upsert and
+    queues the student and parent notifications as one bulk insert.
+
+    rows: output of validate_roster() — [(student, status), ...]
+
+    Query cost is fixed: one lock + read of the previous statuses, one
+    upsert, one counter update, one rollup refresh, one parent lookup,
+    one notification insert — regardless of class size.
+    """
+    date = parse_attendance_date(date)
+    class_assigned = assignment.class_assigned
+
+    records = [
+        Attendance(
+            student=student,
+            class_assigned=class_assigned,
+            academic_year=assignment.academic_year,
+            date=date,
+            status=status,
+            marked_by=marked_by,
+            updated_by=marked_by,
+        )
+        for student, status in rows
+    ]
+
+    student_ids = [student.id for student, _ in rows]
+
+    with transaction.atomic():
+        # Lock the class's enrollment rows so two concurrent submits of
+        # the same day cannot both apply their deltas to the counters,
+        # then read what was there before this submit.
+        list(
+            Enrollment.objects
+            .select_for_update()
+            .filter(
+                class_assigned=class_assigned,
+                academic_year_id=assignment.academic_year_id,
+                student_id__in=student_ids,
+            )
+            .values_list('id', flat=True)
+        )
+        previous = dict(
+            Attendance.objects
+            .filter(
+                class_assigned=class_assigned,
+                academic_year_id=assignment.academic_year_id,
+                date=date,
+                student_id__in=student_ids,
+            )
+            .values_list('student_id', 'status')
+        )
+
+        # Keyed on Attendance.Meta.unique_together — re-submits overwrite
+        # the existing row exactly like update_or_create did.
+        Attendance.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['student', 'class_assigned', 'academic_year', 'date'],
+            update_fields=['status', 'marked_by', 'updated_by', 'updated_at'],
+        )
+        # bulk_create skips post_save, so keep the counters and the
+        # class-day rollup in step here
+        bump_enrollment_counters(
+            class_assigned.id, assignment.academic_year_id, date, previous,
+            {student.id: status for student, status in rows},
+        )
+        refresh_attendance_rollup(class_assigned.id, assignment.academic_year_id, date)
+        invalidate_report_cards([student.id for student, _ in rows], assignment.academic_year_id)
+        invalidate_student_dashboards(student.id for student, _ in rows)
+        send_attendance_notifications(class_assigned, date, rows)
+
+    return len(records)
+
+
+def send_attendance_notifications(class_assigned, date, rows):
+    """
+    One notification per student plus one per linked parent,
+    written with a single bulk_create.
+    """
+    parents_map = get_parents_map(student.id for student, _ in rows)
+    notifications = attendance_notifications(class_assigned, date, rows, parents_map)
+    Notification.bulk_send(notifications)
+    return notifications
+
+
+def attendance_notifications(class_assigned, date, rows, parents_map):
+    """
+    Builds (without saving) the student and parent notifications for
+    one class-day. parents_map comes from get_parents_map().
+    """
+    notifications = []
+    for student, status in rows:
+        notifications.append(Notification(
+            recipient_id=student.id,
+            title="Attendance recorded",
+            body=(
+                f"Your attendance for "
+                f"{class_assigned.name} on {date} "
+                f"was marked as {status}."
+            ),
+            notif_type='attendance',
+        ))
+        for parent_id in parents_map.get(student.id, []):
+            notifications.append(Notification(
+                recipient_id=parent_id,
+                title="Child attendance recorded",
+                body=(
+                    f"{student.get_full_name() or student.username} "
+                    f"was marked {status} on {date} "
+                    f"in {class_assigned.name}."
+                ),
+                notif_type='attendance',
+            ))
+    return notifications
+
+
+def get_parents_map(student_ids):
+    """
+    student_id → [parent_id, ...] for every given student, in one query.
+    """
+    parents_map = {}
+    links = ParentStudent.objects.filter(
+        student_id__in=list(student_ids)
+    ).values_list('student_id', 'parent_id')
+    for student_id, parent_id in links:
+        parents_map.setdefault(student_id, []).append(parent_id)
+    return parents_map
+
+
+def record_teacher_attendance(date, teachers, statuses, marked_by):
+    """
+    Saves one day of teacher attendance in a single upsert.
+
+    teachers: the active teachers shown on the form
+    statuses: {teacher_id: raw posted value}
+
+    Teachers with no value are skipped, unknown values are reported as
+    invalid, and rows whose status is already stored are left alone —
+    so re-submitting the same form writes nothing.
+
+    Returns {'saved': n, 'unchanged': n, 'skipped': [...], 'invalid': [...]}
+    where skipped/invalid hold the teacher objects.
+    """
+    date = parse_attendance_date(date)
+    valid = (TeacherAttendance.STATUS_PRESENT, TeacherAttendance.STATUS_ABSENT)
+
+    wanted, skipped, invalid = {}, [], []
+    for teacher in teachers:
+        status = statuses.get(teacher.id)
+        if not status:
+            skipped.append(teacher)
+        elif status not in valid:
+            invalid.append(teacher)
+        else:
+            wanted[teacher.id] = status
+
+    with transaction.atomic():
+        existing = dict(
+            TeacherAttendance.objects
+            .filter(date=date, teacher_id__in=list(wanted))
+            .values_list('teacher_id', 'status')
+        )
+        changed = [
+            TeacherAttendance(
+                teacher_id=teacher_id,
+                date=date,
+                status=status,
+                marked_by=marked_by,
+            )
+            for teacher_id, status in wanted.items()
+            if existing.get(teacher_id) != status
+        ]
+        if changed:
+            TeacherAttendance.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['teacher', 'date'],
+                update_fields=['status', 'marked_by', 'updated_at'],
+            )
+            refresh_teacher_attendance_rollup(date)
+
+    return {
+        'saved': len(changed),
+        'unchanged': len(wanted) - len(changed),
+        'skipped': skipped,
+        'invalid': invalid,
+    }
+
+
+# ── Grades ──
+
+GRADE_KEY = ['student', 'subject', 'class_assigned', 'academic_year', 'exam_type', 'term']
+SCORE_PLACES = Decimal('0.01')
+MAX_SCORE_LIMIT = Decimal('999.99')   # Grade.score is max_digits=5, decimal_places=2
+
+
+def _parse_score(raw):
+    """'87.5' → Decimal('87.50'); raises ValueError for anything else."""
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError("not a number")
+    if not value.is_finite():
+        raise ValueError("not a number")
+    try:
+        return value.quantize(SCORE_PLACES, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        # Too many digits to hold two decimal places, e.g. '1e30'
+        raise ValueError("not a number")
+
+
+def parse_grade_sheet(students, raw_scores, raw_max_score):
+    """
+    Parses and validates a whole posted grade sheet before anything is
+    written, the same way validate_roster() does for attendance.
+
+    raw_scores: {student_id: posted string}. Blank means "skip this
+    student" and leaves any existing score alone.
+
+    Returns (rows, max_score, errors):
+      rows:   [(student, Decimal score), ...] for non-blank entries
+      errors: {student_id or 'max_score': message}. Empty when valid.
+    """
+    errors = {}
+    try:
+        max_score = _parse_score((raw_max_score or '100').strip())
+        if not Decimal('0') < max_score <= MAX_SCORE_LIMIT:
+            raise ValueError(f"must be between 0 and {MAX_SCORE_LIMIT}")
+    except ValueError as e:
+        errors['max_score'] = f"Max score {e}."
+        max_score = None
+
+    rows = []
+    for student in students:
+        raw = (raw_scores.get(student.id) or '').strip()
+        if not raw:
+            continue
+        try:
+            score = _parse_score(raw)
+        except ValueError as e:
+            errors[student.id] = f"{raw!r} is {e}."
+            continue
+        if score < 0 or (max_score is not None and score > max_score):
+            errors[student.id] = f"{score} is out of range."
+            continue
+        rows.append((student, score))
+    return rows, max_score, errors
+
+
+def record_grades(assignment, exam_type, term, rows, max_score, marked_by):
+    """
+    Saves a validated grade sheet in one write and notifies students and
+    parents of the scores that changed, in one bulk insert.
+
+    rows: the rows from parse_grade_sheet()
+
+    Scores identical to what is stored (score and max score) are
+    skipped: not rewritten and not notified.
+
+    Returns {'saved': n, 'unchanged': n}.
+    """
+    key = dict(
+        subject=assignment.subject,
+        class_assigned=assignment.class_assigned,
+        academic_year=assignment.academic_year,
+        exam_type=exam_type,
+        term=term,
+    )
+
+    with transaction.atomic():
+        existing = {
+            g.student_id: g for g in Grade.objects
+            .select_for_update()
+            .filter(**key, student_id__in=[student.id for student, _ in rows])
+        }
+        changed = [
+            (student, score) for student, score in rows
+            if student.id not in existing
+            or (existing[student.id].score, existing[student.id].max_score) != (score, max_score)
+        ]
+
+        if term is not None:
+            # Keyed on Grade.Meta.unique_together
+            Grade.objects.bulk_create(
+                [
+                    Grade(student=student, score=score, max_score=max_score,
+                          marked_by=marked_by, **key)
+                    for student, score in changed
+                ],
+                update_conflicts=True,
+                unique_fields=GRADE_KEY,
+                update_fields=['score', 'max_score', 'marked_by', 'updated_at'],
+            )
+        else:
+            # NULL never matches in a unique index, so ON CONFLICT cannot
+            # find term-less grades. Update the rows already loaded (under
+            # lock) and insert the rest.
+            now = timezone.now()
+            to_update, to_create = [], []
+            for student, score in changed:
+                grade = existing.get(student.id)
+                if grade is None:
+                    to_create.append(Grade(student=student, score=score, max_score=max_score,
+                                           marked_by=marked_by, **key))
+                    continue
+                grade.score, grade.max_score = score, max_score
+                grade.marked_by, grade.updated_at = marked_by, now
+                to_update.append(grade)
+            Grade.objects.bulk_update(to_update, ['score', 'max_score', 'marked_by', 'updated_at'])
+            Grade.objects.bulk_create(to_create)
+
+        if changed:
+            # Bulk writes skip the Grade signals, so refresh here
+            refresh_grade_summaries(
+                assignment.subject_id, assignment.academic_year_id,
+                term.id if term else None,
+                [student.id for student, _ in changed],
+            )
+            invalidate_report_cards([student.id for student, _ in changed], assignment.academic_year_id)
+            invalidate_student_dashboards(student.id for student, _ in changed)
+            parents_map = get_parents_map(student.id for student, _ in changed)
+            Notification.bulk_send(
+                grade_notifications(assignment, exam_type, changed, max_score, parents_map)
+            )
+
+    return {'saved': len(changed), 'unchanged': len(rows) - len(changed)}
+
+
+def grade_notifications(assignment, exam_type, rows, max_score, parents_map):
+    """Builds (without saving) the student and parent notifications for a grade sheet."""
+    exam_label = dict(Grade.EXAM_TYPE_CHOICES).get(exam_type, exam_type)
+    subject = assignment.subject.name
+    notifications = []
+    for student, score in rows:
+        result = f"{float(score)}/{float(max_score)}"
+        notifications.append(Notification(
+            recipient_id=student.id,
+            title="Grade recorded",
+            body=(
+                f"Your {exam_label} score for {subject} "
+                f"has been recorded: {result}."
+            ),
+            notif_type='grade',
+        ))
+        for parent_id in parents_map.get(student.id, []):
+            notifications.append(Notification(
+                recipient_id=parent_id,
+                title="Child grade recorded",
+                body=(
+                    f"{student.get_full_name() or student.username} "
+                    f"received {result} in {subject} ({exam_label})."
+                ),
+                notif_type='grade',
+            ))
+    return notifications
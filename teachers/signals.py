@@ -0,0 +1,66 @@
+# teachers/signals.py
+"""
+Keeps the attendance rollups and enrollment counters in step with
+single-row writes (Django admin edits, shell fixes, deletes, class moves).
+
+Bulk writes in teachers/services.py do not fire these signals — they
+update the rollups and counters themselves once per batch.
+
+Also adds the attendance partition for each new AcademicYear when
+partitioning is on.
+"""
+import logging
+
+from django.db import DatabaseError
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, TeacherAttendance
+from .rollups import (
+    refresh_attendance_rollup,
+    refresh_teacher_attendance_rollup,
+    recount_enrollment_counters,
+)
+from .partitioning import partitioning_enabled, is_partitioned, create_year_partition
+from academics.models import AcademicYear
+from students.models import Enrollment
+
+logger = logging.getLogger(__name__)
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def attendance_changed(sender, instance, **kwargs):
+    refresh_attendance_rollup(
+        instance.class_assigned_id,
+        instance.academic_year_id,
+        instance.date,
+    )
+    recount_enrollment_counters(Enrollment.objects.filter(
+        student_id=instance.student_id,
+        class_assigned_id=instance.class_assigned_id,
+        academic_year_id=instance.academic_year_id,
+    ))
+
+
+@receiver([post_save, post_delete], sender=TeacherAttendance)
+def teacher_attendance_changed(sender, instance, **kwargs):
+    refresh_teacher_attendance_rollup(instance.date)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, **kwargs):
+    # A class move changes which Attendance rows the counters cover
+    recount_enrollment_counters(Enrollment.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=AcademicYear)
+def academic_year_created(sender, instance, created, **kwargs):
+    if not (created and partitioning_enabled() and is_partitioned()):
+        return
+    try:
+        create_year_partition(instance)
+    except DatabaseError as e:
+        # Usually a date range overlapping another year. Attendance for
+        # the year still lands in the default partition, so the save
+        # goes through.
+        logger.warning(f"Could not create attendance partition for {instance}: {e}")
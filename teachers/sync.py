@@ -0,0 +1,299 @@
+# teachers/sync.py
+"""
+Batch attendance sync for clients that work offline.
+
+A client sends many (assignment, date, student, status) entries in one
+request, each carrying its own idempotency key, together with the sync
+token from its last response. The server:
+
+  1. drops entries whose key it has already seen (retries),
+  2. writes only the entries whose status actually changes,
+  3. notifies students and parents about those changes only,
+  4. returns what changed in the teacher's classes since the client's
+     token, plus a new token.
+
+Changes are ordered by (updated_at, id), but a row is stamped before its
+transaction commits, so it can become visible after a newer row was
+already served. The token therefore never moves past SYNC_SAFETY_WINDOW
+ago: the last window of changes is sent again on the next sync, and a
+late commit inside it is not skipped. Each change is an absolute status,
+so clients apply repeats idempotently.
+
+Idempotency keys are kept for SYNC_KEY_RETENTION and then pruned
+(`python manage.py prune_attendance_sync_keys`). A batch retried after
+that is applied again.
+
+Query count depends on the number of distinct class-days in the batch
+(counters and rollups are kept per class-day), never on the number of
+entries.
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core import signing
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Attendance, AttendanceSyncKey
+from .rollups import refresh_attendance_rollup, bump_enrollment_counters
+from .services import VALID_STATUSES, parse_attendance_date, attendance_notifications, get_parents_map
+from students.dashboard import invalidate_student_dashboards
+from students.models import Enrollment
+from students.report_cards import invalidate_report_cards
+from core.models import Notification
+
+
+MAX_SYNC_ENTRIES = 500
+SYNC_CHANGES_LIMIT = 1000
+SYNC_SAFETY_WINDOW = timedelta(minutes=2)   # longer than any attendance write transaction
+SYNC_KEY_RETENTION = timedelta(days=30)
+
+RESULT_APPLIED = 'applied'
+RESULT_UNCHANGED = 'unchanged'
+RESULT_DUPLICATE = 'duplicate'
+RESULT_INVALID = 'invalid'
+
+_TOKEN_SALT = 'teachers.attendance-sync'
+
+
+class SyncTokenError(ValueError):
+    pass
+
+
+def encode_sync_token(updated_at, record_id):
+    """Signed, opaque position in the (updated_at, id) change order."""
+    return signing.dumps([updated_at.isoformat(), str(record_id)], salt=_TOKEN_SALT)
+
+
+def decode_sync_token(token):
+    """(updated_at, id) from a token. Raises SyncTokenError if it was tampered with."""
+    try:
+        stamp, record_id = signing.loads(token, salt=_TOKEN_SALT)
+        updated_at = parse_datetime(stamp)
+        record_id = uuid.UUID(record_id)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise SyncTokenError("Invalid sync token")
+    if updated_at is None:
+        raise SyncTokenError("Invalid sync token")
+    return updated_at, record_id
+
+
+def _clean_entry(entry):
+    """
+    Checks the shape of one raw entry.
+    Returns (key, assignment_id, date, student_id, status) or raises ValueError.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("Entry must be an object")
+    key = entry.get('key')
+    if not isinstance(key, str) or not key or len(key) > 64:
+        raise ValueError("Missing or invalid key")
+    status = entry.get('status')
+    if status not in VALID_STATUSES:
+        raise ValueError(f"Invalid status: {status!r}")
+    try:
+        assignment_id = uuid.UUID(str(entry.get('assignment')))
+        student_id = uuid.UUID(str(entry.get('student')))
+    except ValueError:
+        raise ValueError("Invalid assignment or student id")
+    date = parse_attendance_date(entry.get('date'))
+    return key, assignment_id, date, student_id, status
+
+
+def apply_attendance_entries(teacher, entries):
+    """
+    Applies a batch of sync entries for one teacher.
+
+    Returns one result per entry, in order:
+    {'key': ..., 'result': 'applied'|'unchanged'|'duplicate'|'invalid', 'error'?: ...}
+
+    Keys of applied and unchanged entries are stored, so a retry of the
+    same batch reports them as duplicates. Invalid entries store nothing
+    and can be corrected and resent under the same key.
+    """
+    results = [None] * len(entries)
+    cleaned = []
+    for i, entry in enumerate(entries):
+        try:
+            cleaned.append((i, *_clean_entry(entry)))
+        except ValueError as e:
+            key = entry.get('key') if isinstance(entry, dict) else None
+            results[i] = {'key': key, 'result': RESULT_INVALID, 'error': str(e)}
+
+    def reject(i, key, error):
+        results[i] = {'key': key, 'result': RESULT_INVALID, 'error': error}
+
+    with transaction.atomic():
+        assignments = {
+            a.id: a for a in teacher.teaching_assignments
+            .filter(id__in={c[2] for c in cleaned})
+            .select_related('class_assigned')
+        }
+        seen_keys = set(
+            AttendanceSyncKey.objects
+            .filter(teacher=teacher, key__in=[c[1] for c in cleaned])
+            .values_list('key', flat=True)
+        )
+
+        # The last entry for an attendance row wins. Earlier entries for
+        # the same row (a batch that marks a student twice) are
+        # superseded and share its result.
+        latest, superseded = {}, defaultdict(list)
+        for i, key, assignment_id, date, student_id, status in cleaned:
+            if key in seen_keys:
+                results[i] = {'key': key, 'result': RESULT_DUPLICATE}
+                continue
+            seen_keys.add(key)
+            assignment = assignments.get(assignment_id)
+            if assignment is None:
+                reject(i, key, "Not one of your teaching assignments")
+                continue
+            row = (student_id, assignment.class_assigned_id, assignment.academic_year_id, date)
+            if row in latest:
+                superseded[row].append(latest[row][:2])
+            latest[row] = (i, key, assignment, status)
+
+        # Roster check and counter lock in one query. Locks the
+        # enrollment rows the counters will move, like record_class_attendance.
+        enrolled = {
+            (e.student_id, e.class_assigned_id, e.academic_year_id): e.student
+            for e in Enrollment.objects
+            .select_for_update(of=('self',))
+            .select_related('student')
+            .filter(
+                status='active',
+                student_id__in={row[0] for row in latest},
+                class_assigned_id__in={row[1] for row in latest},
+            )
+        }
+        for row, (i, key, _, _) in list(latest.items()):
+            if row[:3] not in enrolled:
+                for j, earlier_key in [(i, key), *superseded.pop(row, [])]:
+                    reject(j, earlier_key, "Student is not enrolled in this class")
+                del latest[row]
+
+        previous = {}
+        if latest:
+            for student_id, class_id, year_id, date, status in (
+                Attendance.objects
+                .filter(
+                    student_id__in={row[0] for row in latest},
+                    class_assigned_id__in={row[1] for row in latest},
+                    date__in={row[3] for row in latest},
+                )
+                .values_list('student_id', 'class_assigned_id', 'academic_year_id', 'date', 'status')
+            ):
+                previous[(student_id, class_id, year_id, date)] = status
+
+        changed = defaultdict(dict)   # (class, year, date) → {student_id: status}
+        records, keys = [], []
+        for row, (i, key, assignment, status) in latest.items():
+            result = RESULT_UNCHANGED if previous.get(row) == status else RESULT_APPLIED
+            for j, handled_key in [(i, key), *superseded.get(row, [])]:
+                results[j] = {'key': handled_key, 'result': result}
+                keys.append(AttendanceSyncKey(teacher=teacher, key=handled_key))
+            if result == RESULT_UNCHANGED:
+                continue
+            student_id, class_id, year_id, date = row
+            changed[(class_id, year_id, date)][student_id] = status
+            records.append(Attendance(
+                student_id=student_id,
+                class_assigned_id=class_id,
+                academic_year_id=year_id,
+                date=date,
+                status=status,
+                marked_by=teacher,
+                updated_by=teacher,
+            ))
+
+        if records:
+            Attendance.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'class_assigned', 'academic_year', 'date'],
+                update_fields=['status', 'marked_by', 'updated_by', 'updated_at'],
+            )
+        if keys:
+            AttendanceSyncKey.objects.bulk_create(keys, ignore_conflicts=True)
+
+        classes = {a.class_assigned_id: a.class_assigned for a in assignments.values()}
+        parents_map = get_parents_map({sid for statuses in changed.values() for sid in statuses})
+        notifications = []
+        for (class_id, year_id, date), statuses in changed.items():
+            old = {
+                student_id: previous[(student_id, class_id, year_id, date)]
+                for student_id in statuses
+                if (student_id, class_id, year_id, date) in previous
+            }
+            bump_enrollment_counters(class_id, year_id, date, old, statuses)
+            refresh_attendance_rollup(class_id, year_id, date)
+            invalidate_report_cards(list(statuses), year_id)
+            invalidate_student_dashboards(statuses)
+            notifications.extend(attendance_notifications(
+                classes[class_id], date,
+                [(enrolled[(sid, class_id, year_id)], status) for sid, status in statuses.items()],
+                parents_map,
+            ))
+        if notifications:
+            Notification.bulk_send(notifications)
+
+    return results
+
+
+def attendance_changes(teacher, since=None, limit=SYNC_CHANGES_LIMIT):
+    """
+    Attendance in the teacher's classes written after the `since` token,
+    oldest first. With no token everything is returned, one page at a
+    time.
+
+    Returns (changes, next_token, has_more). When nothing changed,
+    next_token is the `since` token passed in. Changes from the last
+    SYNC_SAFETY_WINDOW are sent again on the next call (see above).
+    """
+    qs = Attendance.objects.filter(Exists(
+        teacher.teaching_assignments.filter(
+            class_assigned=OuterRef('class_assigned'),
+            academic_year=OuterRef('academic_year'),
+        )
+    ))
+    if since:
+        updated_at, record_id = decode_sync_token(since)
+        qs = qs.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=record_id))
+
+    rows = list(
+        qs.order_by('updated_at', 'id')
+        .values('id', 'student_id', 'class_assigned_id', 'academic_year_id', 'date', 'status', 'updated_at')
+        [:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_token = encode_sync_token(rows[-1]['updated_at'], rows[-1]['id']) if rows else since
+    if not has_more:
+        # Hold the token back to the safety window, so rows still being
+        # committed behind it are picked up next time. Pages before the
+        # last always advance, so paging cannot stall.
+        horizon = timezone.now() - SYNC_SAFETY_WINDOW
+        if rows and rows[-1]['updated_at'] > horizon:
+            next_token = encode_sync_token(horizon, uuid.UUID(int=0))
+    changes = [
+        {
+            'student': str(row['student_id']),
+            'class': str(row['class_assigned_id']),
+            'academic_year': str(row['academic_year_id']),
+            'date': row['date'].isoformat(),
+            'status': row['status'],
+            'updated_at': row['updated_at'].isoformat(),
+        }
+        for row in rows
+    ]
+    return changes, next_token, has_more
+
+
+def prune_sync_keys(older_than=SYNC_KEY_RETENTION):
+    """Deletes idempotency keys older than `older_than`. Returns the number deleted."""
+    deleted, _ = AttendanceSyncKey.objects.filter(created_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -4,18 +4,27 @@ teachers/tests.py
 Tests for the Teachers app — covering:
   - Teacher dashboard access and data correctness
   - Attendance marking (create and edit mode)
-  - Grade entry (create and update)
+  - Batch idempotent attendance sync endpoint
+  - Grade entry (create and update), the gradebook matrix and grade summaries
   - Teacher attendance (admin-only)
   - Attendance report role scoping
+  - Streaming attendance and grade exports
+  - Monthly class attendance register (HTML and CSV)
+  - Daily attendance rollups and per-enrollment attendance counters
+  - Optional PostgreSQL attendance partitioning (no-op on SQLite)
   - Schedule, grades list, and student list access guards
 
 Run with:
     python manage.py test teachers
 """
 
+import json
 from datetime import date
+from decimal import Decimal
+from io import StringIO
 
-from django.test import TestCase
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from itertools import count as _count
@@ -28,10 +37,31 @@ from academics.models import (
     Subject,
     TeachingAssignment,
     Grade,
+    GradeSummary,
+    GradeWeightScheme,
+    FinalMark,
+    Term,
     TimetableSlot,
 )
+from academics.ranking import compute_rankings, get_rankings
+from academics.final_marks import compute_final_marks
+from teachers.grade_analytics import get_grade_distribution, get_subject_comparison
 from students.models import Enrollment, ParentStudent
-from teachers.models import Attendance, TeacherAttendance
+from teachers.models import Attendance, TeacherAttendance, AttendanceDailyRollup
+from teachers.analytics import (
+    get_last_7_days_attendance,
+    get_today_attendance_summary,
+    get_last_7_days_teacher_attendance,
+    get_today_teacher_attendance_summary,
+)
+from teachers.partitioning import (
+    partitioning_enabled,
+    is_partitioned,
+    partition_name,
+    partition_bounds,
+    year_partition_sql,
+)
+from core.models import Notification
 
 
 # ─────────────────────────────────────────────────────────────
@@ -167,6 +197,44 @@ class TeacherDashboardTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsNone(response.context["current_year"])
 
+    def test_query_count_does_not_grow_with_assignments(self):
+        """
+        WHY: Each assignment row shows its class size. Those counts come
+        annotated on the assignment query, not one COUNT per row.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        year = make_year()
+        self.client.force_login(self.teacher)
+
+        def add_assignment(i):
+            cls = make_class(year, name=f"Grade 9-{i}")
+            subj = make_subject(f"Subject {i}", f"SUB{i:02d}")
+            cls.subjects.add(subj)
+            make_assignment(self.teacher, subj, cls, year)
+            for j in range(i + 1):
+                make_enrollment(make_user(f"roster{i}_{j}", "student"), cls, year)
+
+        def page_queries(url_name):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response
+
+        add_assignment(0)
+        small = {name: page_queries(name)[0] for name in ("teacher_dashboard", "teacher_all_students", "teacher_grades")}
+        add_assignment(1)
+        add_assignment(2)
+        for name, queries in small.items():
+            self.assertEqual(page_queries(name)[0], queries, name)
+
+        _, response = page_queries("teacher_grades")
+        self.assertEqual(
+            sorted(a.student_count for a in response.context["assignments"]),
+            [1, 2, 3],
+        )
+
 
 # ─────────────────────────────────────────────────────────────
 # 2. MARK ATTENDANCE
@@ -350,6 +418,254 @@ class MarkAttendanceTests(TestCase):
             parent.notifications.filter(notif_type="attendance").exists()
         )
 
+    def test_invalid_status_saves_nothing(self):
+        """
+        WHY: The roster is validated before writing. One bad row must
+        reject the whole submit instead of saving half the class.
+        """
+        second = make_user("student_att2", "student")
+        make_enrollment(second, self.cls, self.year)
+
+        self.client.force_login(self.teacher)
+        self.client.post(
+            reverse("mark_attendance", args=[self.assignment.id]),
+            {
+                "date": timezone.localdate().isoformat(),
+                f"student_{self.student.id}": "present",
+                f"student_{second.id}": "late",
+            },
+        )
+        self.assertEqual(Attendance.objects.count(), 0)
+        self.assertFalse(self.student.notifications.exists())
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        """
+        WHY: Every teacher submits at 8am. The write path must cost the
+        same number of queries for 1 student as for a full class.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = reverse("mark_attendance", args=[self.assignment.id])
+        today = timezone.localdate().isoformat()
+        self.client.force_login(self.teacher)
+
+        def submit():
+            data = {"date": today}
+            for enrollment in Enrollment.objects.filter(class_assigned=self.cls):
+                data[f"student_{enrollment.student_id}"] = "present"
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(url, data)
+            return len(ctx.captured_queries)
+
+        small = submit()
+        for i in range(5):
+            s = make_user(f"bulk_att{i}", "student")
+            make_enrollment(s, self.cls, self.year)
+            parent = make_user(f"bulk_parent{i}", "parent")
+            ParentStudent.objects.create(parent=parent, student=s)
+        large = submit()
+
+        self.assertEqual(small, large)
+        self.assertEqual(Attendance.objects.filter(date=today).count(), 6)
+        self.assertEqual(
+            Notification.objects.filter(notif_type="attendance").count(),
+            1 + 6 + 5,   # first submit + second submit (students + parents)
+        )
+
+
+class AttendanceSyncTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+        self.teacher = make_user("teacher_sync", "teacher")
+        self.other_teacher = make_user("teacher_sync_other", "teacher")
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.students = [make_user(f"student_sync_{n}", "student") for n in range(3)]
+        for student in self.students:
+            make_enrollment(student, self.cls, self.year)
+        self.parent = make_user("parent_sync", "parent")
+        ParentStudent.objects.create(parent=self.parent, student=self.students[0])
+        self.outsider = make_user("student_sync_outsider", "student")
+        self.day = date(2024, 10, 1)
+        self.client.force_login(self.teacher)
+
+    def entry(self, key, student, status, day=None):
+        return {
+            "key": key,
+            "assignment": str(self.assignment.id),
+            "student": str(student.id),
+            "date": (day or self.day).isoformat(),
+            "status": status,
+        }
+
+    def sync(self, entries, since=None):
+        response = self.client.post(
+            reverse("attendance_sync"),
+            data=json.dumps({"entries": entries, "since": since}),
+            content_type="application/json",
+        )
+        return response.status_code, response.json()
+
+    def test_batch_applies_changes_and_notifies_once(self):
+        entries = [self.entry(f"k{n}", s, "present") for n, s in enumerate(self.students)]
+        status, body = self.sync(entries)
+        self.assertEqual(status, 200)
+        self.assertEqual([r["result"] for r in body["results"]], ["applied"] * 3)
+        self.assertEqual(Attendance.objects.filter(date=self.day).count(), 3)
+        # 3 students + 1 parent
+        self.assertEqual(Notification.objects.count(), 4)
+        enrollment = Enrollment.objects.get(student=self.students[0])
+        self.assertEqual(enrollment.attendance_present, 1)
+        self.assertEqual(AttendanceDailyRollup.objects.get(date=self.day).present_count, 3)
+
+        # Retry of the same batch: nothing written, nothing sent
+        status, body = self.sync(entries)
+        self.assertEqual([r["result"] for r in body["results"]], ["duplicate"] * 3)
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_unchanged_status_is_not_rewritten_or_notified(self):
+        self.sync([self.entry("a", self.students[0], "present")])
+        status, body = self.sync([
+            self.entry("b", self.students[0], "present"),
+            self.entry("c", self.students[1], "absent"),
+        ])
+        self.assertEqual([r["result"] for r in body["results"]], ["unchanged", "applied"])
+        # 2 from the first sync (student + parent), 1 for the second student
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_stale_retry_does_not_overwrite_newer_edit(self):
+        self.sync([self.entry("old", self.students[0], "present")])
+        self.sync([self.entry("new", self.students[0], "absent")])
+        self.sync([self.entry("old", self.students[0], "present")])
+        record = Attendance.objects.get(student=self.students[0], date=self.day)
+        self.assertEqual(record.status, "absent")
+
+    def test_last_entry_for_same_student_wins(self):
+        status, body = self.sync([
+            self.entry("x1", self.students[0], "present"),
+            self.entry("x2", self.students[0], "absent"),
+        ])
+        self.assertEqual([r["result"] for r in body["results"]], ["applied", "applied"])
+        record = Attendance.objects.get(student=self.students[0], date=self.day)
+        self.assertEqual(record.status, "absent")
+        self.assertEqual(Enrollment.objects.get(student=self.students[0]).attendance_absent, 1)
+
+    def test_invalid_entries_are_reported_and_skipped(self):
+        physics = make_subject("Physics", "PHY01")
+        self.cls.subjects.add(physics)
+        other_assignment = make_assignment(self.other_teacher, physics, self.cls, self.year)
+        foreign = self.entry("f", self.students[0], "present")
+        foreign["assignment"] = str(other_assignment.id)
+        status, body = self.sync([
+            self.entry("bad", self.students[0], "late"),
+            self.entry("out", self.outsider, "present"),
+            foreign,
+            self.entry("ok", self.students[1], "present"),
+        ])
+        results = body["results"]
+        self.assertEqual([r["result"] for r in results], ["invalid", "invalid", "invalid", "applied"])
+        self.assertIn("not enrolled", results[1]["error"])
+        self.assertEqual(Attendance.objects.count(), 1)
+
+        # An invalid key was not burned and can be resent corrected
+        status, body = self.sync([self.entry("bad", self.students[0], "present")])
+        self.assertEqual(body["results"][0]["result"], "applied")
+
+    def test_non_string_date_is_an_invalid_entry(self):
+        entries = []
+        for i, bad_date in enumerate((123, [], {}, None)):
+            entry = self.entry(f"d{i}", self.students[0], "present")
+            entry["date"] = bad_date
+            entries.append(entry)
+        status, body = self.sync(entries + [self.entry("ok", self.students[1], "present")])
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [r["result"] for r in body["results"]],
+            ["invalid", "invalid", "invalid", "invalid", "applied"],
+        )
+        self.assertIn("Invalid date", body["results"][0]["error"])
+
+    def test_delta_token_returns_only_newer_changes(self):
+        from datetime import timedelta
+
+        self.sync([self.entry("a", self.students[0], "present")])
+        # Older than the safety window: settled, never sent again
+        Attendance.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        status, body = self.sync([])
+        self.assertEqual(len(body["changes"]), 1)
+        token = body["sync_token"]
+
+        status, body = self.sync([], since=token)
+        self.assertEqual(body["changes"], [])
+        self.assertEqual(body["sync_token"], token)
+
+        self.sync([self.entry("b", self.students[1], "absent")], since=token)
+        status, body = self.sync([], since=token)
+        self.assertEqual([c["student"] for c in body["changes"]], [str(self.students[1].id)])
+        self.assertFalse(body["has_more"])
+
+    def test_late_commit_inside_the_safety_window_is_not_skipped(self):
+        from datetime import timedelta
+
+        self.sync([self.entry("a", self.students[0], "present")])
+        status, body = self.sync([])
+        token = body["sync_token"]
+        # A row stamped a moment before the one already served, but
+        # committed only now
+        Attendance.objects.create(
+            student=self.students[1], class_assigned=self.cls, academic_year=self.year,
+            date=self.day, status="absent", marked_by=self.teacher,
+        )
+        Attendance.objects.filter(student=self.students[1]).update(
+            updated_at=Attendance.objects.get(student=self.students[0]).updated_at - timedelta(seconds=1),
+        )
+        status, body = self.sync([], since=token)
+        self.assertIn(str(self.students[1].id), [c["student"] for c in body["changes"]])
+
+    def test_old_sync_keys_are_pruned(self):
+        from datetime import timedelta
+        from teachers.models import AttendanceSyncKey
+        from teachers.sync import SYNC_KEY_RETENTION
+
+        self.sync([self.entry("old", self.students[0], "present"), self.entry("new", self.students[1], "present")])
+        AttendanceSyncKey.objects.filter(key="old").update(
+            created_at=timezone.now() - SYNC_KEY_RETENTION - timedelta(days=1),
+        )
+        out = StringIO()
+        call_command("prune_attendance_sync_keys", stdout=out)
+        self.assertIn("Deleted 1", out.getvalue())
+        self.assertEqual(list(AttendanceSyncKey.objects.values_list("key", flat=True)), ["new"])
+
+    def test_tampered_token_is_rejected_before_writing(self):
+        status, body = self.sync([self.entry("a", self.students[0], "present")], since="nope")
+        self.assertEqual(status, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries(students, prefix):
+            with CaptureQueriesContext(connection) as ctx:
+                self.sync([self.entry(f"{prefix}{n}", s, "present") for n, s in enumerate(students)])
+            return len(ctx)
+
+        small = count_queries(self.students[:1], "s")
+        extra = [make_user(f"student_sync_extra_{n}", "student") for n in range(5)]
+        for student in extra:
+            make_enrollment(student, self.cls, self.year)
+        self.assertEqual(count_queries(self.students[1:] + extra, "l"), small)
+
+    def test_only_teachers_and_post(self):
+        self.assertEqual(self.client.get(reverse("attendance_sync")).status_code, 405)
+        self.client.force_login(self.students[0])
+        status, _ = self.sync([])
+        self.assertEqual(status, 403)
+
 
 # ─────────────────────────────────────────────────────────────
 # 3. ENTER GRADES
@@ -510,6 +826,86 @@ class EnterGradesTests(TestCase):
             parent.notifications.filter(notif_type="grade").exists()
         )
 
+    def post_sheet(self, scores, max_score="100", term_id=""):
+        data = {
+            "exam_type": "quiz",
+            "term_id": term_id,
+            "max_score": max_score,
+            "save_grades": "1",
+        }
+        data.update({f"score_{student.id}": score for student, score in scores})
+        return self.client.post(reverse("enter_grades", args=[self.assignment.id]), data)
+
+    def test_invalid_score_saves_nothing(self):
+        """
+        WHY: The sheet is validated as a whole. A typo in one row
+        re-renders the form with the typed values instead of saving
+        half of the class.
+        """
+        other = make_user("student_grade_2", "student")
+        make_enrollment(other, self.cls, self.year)
+        self.client.force_login(self.teacher)
+        response = self.post_sheet([(self.student, "80"), (other, "120")])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(other.id, response.context["sheet_errors"])
+        self.assertEqual(response.context["posted_scores"][self.student.id], "80")
+        self.assertFalse(Grade.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_oversized_score_is_a_row_error(self):
+        """
+        WHY: '1e30' is a finite Decimal but has too many digits for the
+        score column. It must be reported on its row, not crash the POST.
+        """
+        self.client.force_login(self.teacher)
+        for raw in ("1e30", "1" * 30):
+            response = self.post_sheet([(self.student, raw)])
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("not a number", response.context["sheet_errors"][self.student.id])
+        self.assertFalse(Grade.objects.exists())
+
+    def test_unchanged_scores_are_not_rewritten_or_notified(self):
+        self.client.force_login(self.teacher)
+        self.post_sheet([(self.student, "80")])
+        grade = Grade.objects.get()
+        self.post_sheet([(self.student, "80.00")])
+        self.assertEqual(Grade.objects.get().updated_at, grade.updated_at)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_term_scoped_sheet_upserts_on_unique_key(self):
+        term = Term.objects.create(
+            academic_year=self.year, name="Term 1",
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 15),
+        )
+        self.client.force_login(self.teacher)
+        self.post_sheet([(self.student, "70")], term_id=str(term.id))
+        self.post_sheet([(self.student, "75")], term_id=str(term.id))
+        grade = Grade.objects.get(term=term)
+        self.assertEqual(float(grade.score), 75.0)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        parent = make_user("parent_grade_q", "parent")
+        ParentStudent.objects.create(parent=parent, student=self.student)
+        self.client.force_login(self.teacher)
+
+        def count_queries(score):
+            students = Enrollment.objects.filter(class_assigned=self.cls).values_list("student", flat=True)
+            scores = [(CustomUser(id=sid), score) for sid in students]
+            with CaptureQueriesContext(connection) as ctx:
+                self.post_sheet(scores)
+            return len(ctx)
+
+        baseline = count_queries("50")
+        for n in range(5):
+            student = make_user(f"student_grade_q{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+        # Existing rows get updated, new ones inserted
+        self.assertEqual(count_queries("60"), baseline + 1)
+
     def test_letter_grade_property_on_saved_grade(self):
         """
         WHY: The letter grade is a computed property used on dashboards
@@ -536,6 +932,497 @@ class EnterGradesTests(TestCase):
         self.assertEqual(grade.letter_grade, "F")
 
 
+class GradeImportTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+        self.teacher = make_user("teacher_import", "teacher")
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.alice = make_user("alice_import", "student")
+        self.bob = make_user("bob_import", "student")
+        for student in (self.alice, self.bob):
+            make_enrollment(student, self.cls, self.year)
+        self.url = reverse("enter_grades", args=[self.assignment.id])
+        self.client.force_login(self.teacher)
+
+    def upload(self, text, max_score="50", name="grades.csv"):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return self.client.post(self.url, {
+            "exam_type": "midterm",
+            "term_id": "",
+            "max_score": max_score,
+            "grades_file": SimpleUploadedFile(name, text.encode("utf-8"), content_type="text/csv"),
+            "import_csv": "1",
+        })
+
+    def scores(self):
+        return dict(Grade.objects.filter(exam_type="midterm").values_list("student__username", "score"))
+
+    def test_rows_matched_by_username_or_email(self):
+        response = self.upload(
+            "\ufeffUsername,Email,Score\n"
+            "ALICE_IMPORT,,41.5\n"
+            ",bob_import@example.com,38\n"
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.scores(), {"alice_import": Decimal("41.50"), "bob_import": Decimal("38.00")})
+        self.assertEqual(Grade.objects.get(student=self.alice).max_score, Decimal("50.00"))
+
+    def test_valid_rows_saved_and_bad_rows_reported(self):
+        stranger = make_user("stranger_import", "student")
+        carol = make_user("carol_import", "student")
+        make_enrollment(carol, self.cls, self.year)
+        response = self.upload(
+            "username,score\n"
+            "alice_import,45\n"
+            "bob_import,51\n"              # above max score
+            "stranger_import,30\n"         # not in this class
+            "alice_import,20\n"            # duplicate
+            "\n"
+            "carol_import,\n"              # blank: skipped
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.scores(), {"alice_import": Decimal("45.00")})
+        errors = response.context["import_errors"]
+        self.assertEqual([e["line"] for e in errors], [3, 4, 5])
+        self.assertIn("out of range", errors[0]["error"])
+        self.assertEqual(errors[1]["student"], stranger.username)
+        self.assertIn("line 2", errors[2]["error"])
+
+    def test_oversized_score_is_reported_not_raised(self):
+        response = self.upload(
+            "username,score\n"
+            "alice_import,1e30\n"
+            f"bob_import,{'9' * 30}\n"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Grade.objects.exists())
+        errors = response.context["import_errors"]
+        self.assertEqual([e["line"] for e in errors], [2, 3])
+        self.assertTrue(all("not a number" in e["error"] for e in errors))
+
+    def test_unusable_file_imports_nothing(self):
+        for text, max_score in (
+            ("name,marks\nalice_import,40\n", "50"),    # no usable columns
+            ("username,score\nalice_import,40\n", "0"),  # bad max score
+        ):
+            response = self.upload(text, max_score=max_score)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(Grade.objects.exists())
+            self.assertContains(response, "Nothing was imported")
+
+    def test_query_count_does_not_grow_with_file_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries(students):
+            Grade.objects.all().delete()
+            text = "username,score\n" + "".join(f"{s.username},40\n" for s in students)
+            with CaptureQueriesContext(connection) as ctx:
+                self.upload(text)
+            return len(ctx)
+
+        baseline = count_queries([self.alice, self.bob])
+        students = [self.alice, self.bob]
+        for n in range(20):
+            student = make_user(f"student_import_{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+            students.append(student)
+        self.assertEqual(count_queries(students), baseline)
+
+    def test_template_lists_the_roster(self):
+        response = self.client.get(self.url, {"format": "template"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "username,email,name,score")
+        self.assertEqual(len(lines), 3)
+
+
+class GradebookTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+        self.teacher = make_user("teacher_book", "teacher")
+        self.other_teacher = make_user("teacher_book_other", "teacher")
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.term1 = Term.objects.create(
+            academic_year=self.year, name="Term 1",
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 15),
+        )
+        self.term2 = Term.objects.create(
+            academic_year=self.year, name="Term 2",
+            start_date=date(2025, 1, 6), end_date=date(2025, 4, 4),
+        )
+        self.alice = make_user("alice_book", "student", first_name="Alice", last_name="Adams")
+        self.bob = make_user("bob_book", "student", first_name="Bob", last_name="Brown")
+        for student in (self.alice, self.bob):
+            make_enrollment(student, self.cls, self.year)
+
+        self.grade(self.alice, "midterm", self.term1, 45, 50)   # 90.0 A
+        self.grade(self.alice, "quiz", self.term1, 7, 10)       # 70.0 C
+        self.grade(self.bob, "quiz", self.term1, 8, 10)         # 80.0 B
+        self.grade(self.bob, "final", self.term2, 60, 100)      # 60.0 D
+        self.client.force_login(self.teacher)
+        self.url = reverse("gradebook", args=[self.assignment.id])
+
+    def grade(self, student, exam_type, term, score, max_score):
+        Grade.objects.create(
+            student=student, subject=self.subject, class_assigned=self.cls,
+            academic_year=self.year, term=term, exam_type=exam_type,
+            score=score, max_score=max_score,
+        )
+
+    def test_matrix_columns_cells_and_averages(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        book = response.context["gradebook"]
+        self.assertEqual(
+            [c["label"] for c in book.columns],
+            ["Term 1 · Quiz", "Term 1 · Midterm", "Term 2 · Final Exam"],
+        )
+        alice, bob = response.context["rows"]
+        self.assertEqual([c and c["letter"] for c in alice["cells"]], ["C", "A", None])
+        self.assertEqual((alice["average"], alice["letter"]), (80.0, "B"))
+        self.assertEqual((bob["average"], bob["letter"]), (70.0, "C"))
+        self.assertEqual(book.column_averages, [75.0, 90.0, 60.0])
+        self.assertEqual(book.average, 75.0)
+
+    def test_query_count_does_not_grow_with_sheet_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(self.url)
+            return len(ctx)
+
+        baseline = count_queries()
+        for n in range(5):
+            student = make_user(f"student_book_{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+            self.grade(student, "assignment", self.term2, 9, 10)
+        self.assertEqual(count_queries(), baseline)
+
+    def test_csv_download(self):
+        response = self.client.get(self.url, {"format": "csv"})
+        lines = b"".join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(
+            lines[0],
+            "username,name,Term 1 · Quiz,Term 1 · Midterm,Term 2 · Final Exam,average,letter_grade,rank,percentile",
+        )
+        self.assertEqual(lines[1], "alice_book,Alice Adams,70.0,90.0,,80.0,B,1,100.0")
+
+    def test_other_teacher_gets_404(self):
+        self.client.force_login(self.other_teacher)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class GradeSummaryTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+        self.teacher = make_user("teacher_sum", "teacher")
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.student = make_user("student_sum", "student")
+        make_enrollment(self.student, self.cls, self.year)
+        self.client.force_login(self.teacher)
+
+    def post_sheet(self, exam_type, score, max_score="100"):
+        self.client.post(reverse("enter_grades", args=[self.assignment.id]), {
+            "exam_type": exam_type,
+            "term_id": "",
+            "max_score": max_score,
+            f"score_{self.student.id}": score,
+            "save_grades": "1",
+        })
+
+    def summary(self):
+        return GradeSummary.objects.get(student=self.student, subject=self.subject)
+
+    def test_grade_sheet_updates_summary(self):
+        self.post_sheet("quiz", "8", max_score="10")      # 80.0
+        self.post_sheet("midterm", "65")                  # 65.0
+        summary = self.summary()
+        self.assertEqual(summary.grade_count, 2)
+        self.assertEqual(summary.average, 72.5)
+        self.assertEqual((float(summary.min_percentage), float(summary.max_percentage)), (65.0, 80.0))
+        self.assertEqual((summary.latest_exam_type, float(summary.latest_score)), ("midterm", 65.0))
+
+        self.post_sheet("midterm", "95")
+        self.assertEqual(self.summary().average, 87.5)
+
+    def test_single_row_edits_and_deletes_are_followed(self):
+        grade = Grade.objects.create(
+            student=self.student, subject=self.subject, class_assigned=self.cls,
+            academic_year=self.year, exam_type="quiz", score=50, max_score=100,
+        )
+        self.assertEqual(self.summary().average, 50.0)
+
+        term = Term.objects.create(
+            academic_year=self.year, name="Term 1",
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 15),
+        )
+        grade.term = term
+        grade.save()
+        # Moved out of the term-less summary into the term's
+        self.assertEqual(GradeSummary.objects.get(term=term).grade_count, 1)
+        self.assertFalse(GradeSummary.objects.filter(term__isnull=True).exists())
+
+        grade.delete()
+        self.assertFalse(GradeSummary.objects.exists())
+
+    def test_rebuild_command_matches_incremental_summaries(self):
+        self.post_sheet("quiz", "70")
+        self.post_sheet("final", "88")
+        before = list(GradeSummary.objects.values_list("grade_count", "percentage_sum", "latest_exam_type"))
+        GradeSummary.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_grade_summaries", stdout=out)
+        self.assertIn("Wrote 1", out.getvalue())
+        after = list(GradeSummary.objects.values_list("grade_count", "percentage_sum", "latest_exam_type"))
+        self.assertEqual(after, before)
+
+
+class ClassRankingTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.maths = make_subject()
+        self.english = make_subject("English", "ENG101")
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.maths, self.english)
+        self.teacher = make_user("teacher_rank", "teacher")
+        self.assignment = make_assignment(self.teacher, self.maths, self.cls, self.year)
+        self.students = []
+        for n, (maths, english) in enumerate([(90, 60), (70, 80), (90, 50), (40, 100)]):
+            student = make_user(f"student_rank{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+            self.grade(student, self.maths, maths)
+            self.grade(student, self.english, english)
+            self.students.append(student)
+
+    def grade(self, student, subject, score):
+        return Grade.objects.create(
+            student=student, subject=subject, class_assigned=self.cls,
+            academic_year=self.year, exam_type="midterm", score=score, max_score=100,
+        )
+
+    def test_dense_ranks_and_percentiles(self):
+        rankings = compute_rankings(self.year.id, self.cls.id)
+        maths = rankings["subjects"][self.maths.id]
+        s0, s1, s2, s3 = (s.id for s in self.students)
+        # 90, 70, 90, 40: the tie shares rank 1 and the next rank is 2
+        self.assertEqual([maths[s]["rank"] for s in (s0, s1, s2, s3)], [1, 2, 1, 3])
+        self.assertEqual([maths[s]["percentile"] for s in (s0, s1, s2, s3)], [100.0, 50.0, 100.0, 25.0])
+        # Overall: 75, 75, 70, 70
+        self.assertEqual(rankings["size"], 4)
+        self.assertEqual([rankings["overall"][s]["rank"] for s in (s0, s1, s2, s3)], [1, 1, 2, 2])
+
+    def test_python_fallback_matches_window_functions(self):
+        self.assertEqual(
+            compute_rankings(self.year.id, self.cls.id, use_window=False),
+            compute_rankings(self.year.id, self.cls.id, use_window=True),
+        )
+
+    def test_class_scope_only_ranks_enrolled_students(self):
+        other_cls = make_class(self.year, name="Grade 10-B")
+        other_cls.subjects.add(self.maths)
+        outsider = make_user("student_rank_other", "student")
+        make_enrollment(outsider, other_cls, self.year)
+        Grade.objects.create(
+            student=outsider, subject=self.maths, class_assigned=other_cls,
+            academic_year=self.year, exam_type="midterm", score=100, max_score=100,
+        )
+        self.assertNotIn(outsider.id, compute_rankings(self.year.id, self.cls.id)["overall"])
+        self.assertEqual(compute_rankings(self.year.id)["overall"][outsider.id]["rank"], 1)
+
+    def test_cached_rankings_follow_grade_writes(self):
+        first = get_rankings(self.year.id, self.cls.id)
+        self.assertEqual(first["subjects"][self.maths.id][self.students[3].id]["rank"], 3)
+        self.grade(self.students[3], self.maths, 100)   # maths average 70 → 2nd
+        second = get_rankings(self.year.id, self.cls.id)
+        self.assertEqual(second["subjects"][self.maths.id][self.students[3].id]["rank"], 2)
+
+    def test_gradebook_shows_class_rank(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("gradebook", args=[self.assignment.id]))
+        ranks = {row["student"].id: row["rank"]["rank"] for row in response.context["rows"]}
+        self.assertEqual(ranks[self.students[3].id], 3)
+        response = self.client.get(reverse("gradebook", args=[self.assignment.id]), {"format": "csv"})
+        header = b"".join(response.streaming_content).decode().splitlines()[0]
+        self.assertTrue(header.endswith("rank,percentile"))
+
+
+class FinalMarkTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.other_cls = make_class(self.year, name="Grade 10-B")
+        self.student = make_user("student_final", "student")
+        make_enrollment(self.student, self.cls, self.year)
+        GradeWeightScheme.objects.create(
+            subject=self.subject, academic_year=self.year,
+            quiz_weight=20, midterm_weight=30, final_weight=50,
+        )
+
+    def grade(self, student, exam_type, score, cls=None, term=None):
+        Grade.objects.create(
+            student=student, subject=self.subject, class_assigned=cls or self.cls,
+            academic_year=self.year, term=term, exam_type=exam_type, score=score, max_score=100,
+        )
+
+    def final_mark(self, student=None):
+        return FinalMark.objects.get(student=student or self.student, subject=self.subject)
+
+    def test_weighted_over_exam_type_averages(self):
+        term = Term.objects.create(
+            academic_year=self.year, name="Term 1",
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 15),
+        )
+        self.grade(self.student, "quiz", 60)
+        self.grade(self.student, "quiz", 80, term=term)   # quiz average 70
+        self.grade(self.student, "midterm", 50)
+        self.grade(self.student, "final", 90)
+        self.grade(self.student, "assignment", 10)        # weight 0: ignored
+        self.assertEqual(compute_final_marks(self.year.id), 1)
+        mark = self.final_mark()
+        # 0.2·70 + 0.3·50 + 0.5·90
+        self.assertEqual(float(mark.final_percentage), 74.0)
+        self.assertEqual((mark.weight_covered, mark.is_provisional, mark.letter_grade), (100, False, "C"))
+
+    def test_missing_exam_types_are_rescaled_and_marked_provisional(self):
+        self.grade(self.student, "quiz", 60)
+        self.grade(self.student, "midterm", 80)
+        compute_final_marks(self.year.id)
+        mark = self.final_mark()
+        # (20·60 + 30·80) / 50
+        self.assertEqual((float(mark.final_percentage), mark.weight_covered), (72.0, 50))
+        self.assertTrue(mark.is_provisional)
+
+    def test_class_scheme_overrides_subject_default(self):
+        GradeWeightScheme.objects.create(
+            subject=self.subject, academic_year=self.year, class_assigned=self.other_cls,
+            final_weight=100,
+        )
+        other = make_user("student_final_b", "student")
+        make_enrollment(other, self.other_cls, self.year)
+        for student, cls in ((self.student, self.cls), (other, self.other_cls)):
+            self.grade(student, "quiz", 40, cls=cls)
+            self.grade(student, "final", 80, cls=cls)
+        compute_final_marks(self.year.id)
+        self.assertEqual(float(self.final_mark().final_percentage), 68.6)   # (20·40 + 50·80) / 70
+        self.assertEqual(float(self.final_mark(other).final_percentage), 80.0)
+
+    def test_recompute_replaces_stale_marks(self):
+        self.grade(self.student, "final", 90)
+        compute_final_marks(self.year.id)
+        Grade.objects.filter(student=self.student).delete()
+        self.assertEqual(compute_final_marks(self.year.id), 0)
+        self.assertFalse(FinalMark.objects.exists())
+
+    def test_query_count_does_not_grow_with_students(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.grade(self.student, "final", 90)
+        with CaptureQueriesContext(connection) as small:
+            compute_final_marks(self.year.id)
+        for n in range(5):
+            student = make_user(f"student_final_{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+            self.grade(student, "quiz", 50 + n)
+            self.grade(student, "final", 70 + n)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(compute_final_marks(self.year.id), 6)
+        self.assertEqual(len(large), len(small))
+
+    def test_weights_must_add_up_to_100(self):
+        from django.core.exceptions import ValidationError
+
+        scheme = GradeWeightScheme(
+            subject=self.subject, academic_year=self.year, class_assigned=self.cls,
+            quiz_weight=50, final_weight=40,
+        )
+        with self.assertRaises(ValidationError):
+            scheme.clean()
+        scheme.final_weight = 50
+        scheme.clean()
+
+    def test_command_defaults_to_current_year(self):
+        self.grade(self.student, "final", 90)
+        out = StringIO()
+        call_command("compute_final_marks", stdout=out)
+        self.assertIn("Wrote 1 final mark(s)", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("compute_final_marks", year="1999-2000")
+
+
+class GradeAnalyticsTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.class_a = make_class(self.year)
+        self.class_b = make_class(self.year, name="Grade 10-B")
+        self.student = make_user("student_dist", "student")
+        # Class A: 45%, 85%, 100% (out of 20) · Class B: 70%
+        for n, (cls, exam_type, score) in enumerate([
+            (self.class_a, "quiz", 9), (self.class_a, "midterm", 17),
+            (self.class_a, "final", 20), (self.class_b, "quiz", 14),
+        ]):
+            Grade.objects.create(
+                student=self.student, subject=self.subject, class_assigned=cls,
+                academic_year=self.year, exam_type=exam_type, score=score, max_score=20,
+            )
+
+    def test_distribution_buckets_mean_and_stddev(self):
+        chart = get_grade_distribution(self.year.id)
+        self.assertEqual(chart["labels"][0], "0–9")
+        self.assertEqual(chart["labels"][-1], "90–100")
+        # 100% joins the top bucket
+        self.assertEqual(chart["counts"], [0, 0, 0, 0, 1, 0, 0, 1, 1, 1])
+        self.assertEqual((chart["count"], chart["mean"], chart["stddev"]), (4, 75.0, 20.3))
+
+    def test_subject_comparison_across_classes(self):
+        chart = get_subject_comparison(self.year.id, self.subject.id)
+        self.assertEqual(chart["labels"], ["Grade 10-A", "Grade 10-B"])
+        self.assertEqual(chart["count"], [3, 1])
+        self.assertEqual(chart["mean"], [76.7, 70.0])
+        self.assertEqual(chart["stddev"][1], 0.0)
+        self.assertEqual(chart["distributions"][1][7], 1)
+
+    def test_cached_distribution_follows_grade_writes(self):
+        self.assertEqual(get_grade_distribution(self.year.id, class_id=self.class_b.id)["count"], 1)
+        Grade.objects.create(
+            student=self.student, subject=self.subject, class_assigned=self.class_b,
+            academic_year=self.year, exam_type="final", score=5, max_score=20,
+        )
+        chart = get_grade_distribution(self.year.id, class_id=self.class_b.id)
+        self.assertEqual((chart["count"], chart["counts"][2]), (2, 1))
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse("grade_analytics")
+        self.client.force_login(make_user("teacher_dist", "teacher"))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(make_user("admin_dist", "staff"))
+        data = self.client.get(url, {"subject": str(self.subject.id)}).json()
+        self.assertEqual(data["distribution"]["count"], 4)
+        self.assertEqual(data["comparison"]["labels"], ["Grade 10-A", "Grade 10-B"])
+        self.assertEqual(self.client.get(url, {"class": "nope"}).status_code, 400)
+
+
 # ─────────────────────────────────────────────────────────────
 # 4. MARK TEACHER ATTENDANCE (admin only)
 # ─────────────────────────────────────────────────────────────
@@ -614,6 +1501,61 @@ class MarkTeacherAttendanceTests(TestCase):
         self.assertEqual(records.first().status, "absent")
 
 
+    def test_missing_and_invalid_rows_are_reported_not_saved(self):
+        other = make_user("teacher_ta2", "teacher")
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("mark_teacher_attendance"),
+            {
+                "date": timezone.localdate().isoformat(),
+                f"teacher_{self.teacher.id}": "sick",
+            },
+            follow=True,
+        )
+        self.assertFalse(TeacherAttendance.objects.exists())
+        text = " ".join(str(m) for m in response.context["messages"])
+        self.assertIn("teacher_ta", text)
+        self.assertIn("1 teacher(s) had missing data", text)
+        self.assertFalse(TeacherAttendance.objects.filter(teacher=other).exists())
+
+    def test_identical_resubmit_writes_nothing(self):
+        """
+        WHY: Re-submitting the same day must be idempotent — the stored
+        row (and its updated_at) stays untouched.
+        """
+        today = timezone.localdate().isoformat()
+        data = {"date": today, f"teacher_{self.teacher.id}": "present"}
+        self.client.force_login(self.admin)
+        self.client.post(reverse("mark_teacher_attendance"), data)
+        first = TeacherAttendance.objects.get(teacher=self.teacher)
+
+        self.client.post(reverse("mark_teacher_attendance"), data)
+        again = TeacherAttendance.objects.get(teacher=self.teacher)
+        self.assertEqual(first.updated_at, again.updated_at)
+
+    def test_query_count_does_not_grow_with_staff_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.force_login(self.admin)
+        url = reverse("mark_teacher_attendance")
+
+        def submit(status):
+            data = {"date": timezone.localdate().isoformat()}
+            for t in CustomUser.objects.filter(is_teacher=True):
+                data[f"teacher_{t.id}"] = status
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(url, data)
+            return len(ctx.captured_queries)
+
+        small = submit("present")
+        for i in range(6):
+            make_user(f"teacher_bulk{i}", "teacher")
+        large = submit("absent")
+        self.assertEqual(small, large)
+        self.assertEqual(TeacherAttendance.objects.filter(status="absent").count(), 7)
+
+
 # ─────────────────────────────────────────────────────────────
 # 5. ATTENDANCE REPORT — ROLE SCOPING
 # ─────────────────────────────────────────────────────────────
@@ -712,11 +1654,416 @@ class AttendanceReportTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertIsNotNone(response.context["page_obj"])
-        self.assertEqual(response.context["page_obj"].paginator.count, 1)
+        self.assertEqual(len(response.context["page_obj"]), 1)
+        self.assertEqual(response.context["summary"]["total"], 1)
+
+    def test_keyset_pages_cover_every_record_once(self):
+        """
+        WHY: Cursor pagination must walk the whole result without
+        skipping or repeating rows, in both directions, and each page
+        must cost the same two report queries.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        enrolled_student = make_user("keyset_rep", "student")
+        make_enrollment(enrolled_student, self.cls_a, self.year)
+        today = timezone.localdate()
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=enrolled_student,
+                class_assigned=self.cls_a,
+                academic_year=self.year,
+                date=today - timezone.timedelta(days=i),
+                status="present" if i % 3 else "absent",
+            )
+            for i in range(120)
+        ])
+
+        self.client.force_login(self.teacher)
+        url = reverse("attendance_report")
+        params = {"class_id": str(self.cls_a.id)}
+        seen, query_counts, cursors = [], [], []
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+            query_counts.append(len(ctx.captured_queries))
+            page = response.context["page_obj"]
+            seen.extend(r.id for r in page)
+            if not page.has_next:
+                break
+            cursors.append(page.next_cursor)
+            params = {"class_id": str(self.cls_a.id), "after": page.next_cursor}
+
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len(set(seen)), 120)
+        self.assertEqual(len(set(query_counts)), 1)
+        summary = response.context["summary"]
+        self.assertEqual(summary["total"], 120)
+        self.assertEqual(summary["absent"], 40)
+
+        # Walking back from the last page returns the middle page again
+        last_page_first = response.context["page_obj"].previous_cursor
+        response = self.client.get(url, {"class_id": str(self.cls_a.id), "before": last_page_first})
+        self.assertEqual(len(response.context["page_obj"]), 50)
+        self.assertEqual(response.context["page_obj"].next_cursor, cursors[-1])
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls_a = make_class(self.year, name="Class A")
+        self.cls_b = make_class(self.year, name="Class B")
+        self.cls_a.subjects.add(self.subject)
+        self.cls_b.subjects.add(self.subject)
+
+        self.teacher = make_user("teacher_exp", "teacher")
+        self.admin = make_user("admin_exp", "staff")
+        self.student_a = make_user("student_exp_a", "student")
+        self.student_b = make_user("student_exp_b", "student")
+        make_enrollment(self.student_a, self.cls_a, self.year)
+        make_enrollment(self.student_b, self.cls_b, self.year)
+        make_assignment(self.teacher, self.subject, self.cls_a, self.year)
+
+        today = timezone.localdate()
+        for student, cls in ((self.student_a, self.cls_a), (self.student_b, self.cls_b)):
+            Attendance.objects.create(
+                student=student, class_assigned=cls, academic_year=self.year,
+                date=today, status="present", marked_by=self.teacher,
+            )
+            Grade.objects.create(
+                student=student, subject=self.subject, class_assigned=cls,
+                academic_year=self.year, exam_type="quiz", score=45, max_score=50,
+            )
+
+    def _body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_attendance_csv_is_streamed_and_scoped_to_teacher(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("attendance_report_export"))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = self._body(response).strip().splitlines()
+        self.assertTrue(lines[0].startswith("date,username"))
+        self.assertEqual(len(lines), 2)
+        self.assertIn("student_exp_a", lines[1])
+
+    def test_attendance_ndjson_for_admin_covers_all_classes(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("attendance_report_export"), {"format": "ndjson"})
+        rows = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual({r["username"] for r in rows}, {"student_exp_a", "student_exp_b"})
+        self.assertEqual(rows[0]["status"], "present")
+
+    def test_grades_export_includes_percentage_and_letter(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("grades_export"), {"format": "ndjson"})
+        rows = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual(len(rows), 1)   # Class B is not the teacher's
+        self.assertEqual(rows[0]["percentage"], 90.0)
+        self.assertEqual(rows[0]["letter_grade"], "A")
+
+    def test_malformed_filters_are_rejected_with_400(self):
+        self.client.force_login(self.admin)
+        for url_name, params in (
+            ("grades_export", {"class_id": "not-a-uuid"}),
+            ("grades_export", {"subject_id": "1"}),
+            ("grades_export", {"term_id": "x"}),
+            ("attendance_report_export", {"class_id": "nope"}),
+            ("attendance_report_export", {"student_id": "123"}),
+            ("attendance_report_export", {"date_from": "2024-13-45"}),
+            ("attendance_report", {"date_to": "yesterday"}),
+        ):
+            response = self.client.get(reverse(url_name), params)
+            self.assertEqual(response.status_code, 400, (url_name, params))
+
+    def test_student_cannot_export(self):
+        self.client.force_login(self.student_a)
+        response = self.client.get(reverse("attendance_report_export"))
+        self.assertEqual(response.status_code, 302)
+
+
+class AttendanceRegisterTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+        self.teacher = make_user("teacher_reg", "teacher")
+        self.other_teacher = make_user("teacher_reg_other", "teacher")
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.alice = make_user("alice_reg", "student", first_name="Alice", last_name="Adams")
+        self.bob = make_user("bob_reg", "student", first_name="Bob", last_name="Brown")
+        for student in (self.alice, self.bob):
+            make_enrollment(student, self.cls, self.year)
+
+        # 1 Oct 2024 is a Tuesday
+        self.mark(self.alice, date(2024, 10, 1), "present")
+        self.mark(self.alice, date(2024, 10, 2), "absent")
+        self.mark(self.bob, date(2024, 10, 1), "present")
+        self.mark(self.bob, date(2024, 9, 30), "absent")   # previous month
+
+        self.client.force_login(self.teacher)
+        self.url = reverse("attendance_register", args=[self.assignment.id])
+
+    def mark(self, student, day, status):
+        Attendance.objects.create(
+            student=student, class_assigned=self.cls, academic_year=self.year,
+            date=day, status=status, marked_by=self.teacher,
+        )
+
+    def test_matrix_marks_and_totals(self):
+        response = self.client.get(self.url, {"month": "2024-10"})
+        self.assertEqual(response.status_code, 200)
+        register = response.context["register"]
+        # October 2024 has 27 days once the four Sundays are dropped
+        self.assertEqual(len(register.days), 27)
+        self.assertEqual(register.days[0], date(2024, 10, 1))
+
+        alice, bob = response.context["rows"]
+        self.assertEqual(alice["student"], self.alice)
+        self.assertEqual(alice["marks"][:3], ["P", "A", ""])
+        self.assertEqual((alice["present"], alice["absent"], alice["percentage"]), (1, 1, 50.0))
+        self.assertEqual(bob["marks"][:2], ["P", ""])
+        self.assertEqual((bob["present"], bob["absent"]), (1, 0))
+        self.assertEqual(response.context["day_totals"][:2], [2, 0])
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(self.url, {"month": "2024-10"})
+            return len(ctx)
+
+        baseline = count_queries()
+        for n in range(5):
+            student = make_user(f"extra_reg_{n}", "student")
+            make_enrollment(student, self.cls, self.year)
+            self.mark(student, date(2024, 10, 3), "present")
+        self.assertEqual(count_queries(), baseline)
+
+    def test_csv_download(self):
+        response = self.client.get(self.url, {"month": "2024-10", "format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().strip().splitlines()
+        self.assertTrue(lines[0].startswith("username,name,2024-10-01,2024-10-02"))
+        self.assertTrue(lines[0].endswith("present,absent,percentage"))
+        self.assertTrue(lines[1].startswith("alice_reg,Alice Adams,P,A,"))
+        self.assertTrue(lines[1].endswith(",1,1,50.0"))
+
+    def test_other_teacher_gets_404(self):
+        self.client.force_login(self.other_teacher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+
+# ─────────────────────────────────────────────────────────────
+# 6. DAILY ATTENDANCE ROLLUPS AND ENROLLMENT COUNTERS
+# ─────────────────────────────────────────────────────────────
+
+class AttendanceRollupTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+
+        self.teacher = make_user("teacher_roll", "teacher")
+        self.admin = make_user("admin_roll", "staff")
+        self.students = [make_user(f"student_roll{i}", "student") for i in range(3)]
+        for s in self.students:
+            make_enrollment(s, self.cls, self.year)
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+        self.today = timezone.localdate()
+
+    def _submit(self, statuses):
+        self.client.force_login(self.teacher)
+        data = {"date": self.today.isoformat()}
+        for student, status in zip(self.students, statuses):
+            data[f"student_{student.id}"] = status
+        self.client.post(reverse("mark_attendance", args=[self.assignment.id]), data)
+
+    def test_marking_attendance_updates_rollup(self):
+        self._submit(["present", "present", "absent"])
+        rollup = AttendanceDailyRollup.objects.get(date=self.today, class_assigned=self.cls)
+        self.assertEqual((rollup.present_count, rollup.absent_count), (2, 1))
+
+        summary = get_today_attendance_summary()
+        self.assertEqual(summary["present"], 2)
+        self.assertEqual(summary["absent"], 1)
+        self.assertEqual(summary["total"], 3)
+
+    def test_resubmit_replaces_counts_instead_of_adding(self):
+        """
+        WHY: Editing a day must move counts between present and absent,
+        not double them.
+        """
+        self._submit(["present", "present", "present"])
+        self._submit(["absent", "absent", "present"])
+        rollup = AttendanceDailyRollup.objects.get(date=self.today, class_assigned=self.cls)
+        self.assertEqual((rollup.present_count, rollup.absent_count), (1, 2))
+
+    def test_deleting_last_record_removes_rollup_row(self):
+        record = Attendance.objects.create(
+            student=self.students[0],
+            class_assigned=self.cls,
+            academic_year=self.year,
+            date=self.today,
+            status="present",
+        )
+        self.assertTrue(AttendanceDailyRollup.objects.filter(date=self.today).exists())
+        record.delete()
+        self.assertFalse(AttendanceDailyRollup.objects.filter(date=self.today).exists())
+        self.assertEqual(get_last_7_days_attendance()["labels"], [])
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        self._submit(["present", "absent", "absent"])
+        AttendanceDailyRollup.objects.all().delete()
+
+        call_command("rebuild_attendance_rollups", stdout=StringIO())
+
+        chart = get_last_7_days_attendance()
+        self.assertEqual(chart["present"], [1])
+        self.assertEqual(chart["absent"], [2])
+
+    def test_teacher_attendance_updates_teacher_rollup(self):
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse("mark_teacher_attendance"),
+            {"date": self.today.isoformat(), f"teacher_{self.teacher.id}": "present"},
+        )
+        chart = get_last_7_days_teacher_attendance()
+        self.assertEqual(chart["present"], [1])
+        self.assertEqual(get_today_teacher_attendance_summary()["present"], 1)
+
+
+class EnrollmentAttendanceCounterTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+        self.subject = make_subject()
+        self.cls = make_class(self.year)
+        self.cls.subjects.add(self.subject)
+
+        self.teacher = make_user("teacher_cnt", "teacher")
+        self.student = make_user("student_cnt", "student")
+        self.enrollment = make_enrollment(self.student, self.cls, self.year)
+        self.assignment = make_assignment(self.teacher, self.subject, self.cls, self.year)
+
+    def _submit(self, day, status):
+        self.client.force_login(self.teacher)
+        self.client.post(
+            reverse("mark_attendance", args=[self.assignment.id]),
+            {"date": day.isoformat(), f"student_{self.student.id}": status},
+        )
+        self.enrollment.refresh_from_db()
+
+    def test_counters_follow_submits_and_edits(self):
+        today = timezone.localdate()
+        yesterday = today - timezone.timedelta(days=1)
+
+        self._submit(yesterday, "present")
+        self._submit(today, "absent")
+        self.assertEqual(self.enrollment.attendance_summary["present"], 1)
+        self.assertEqual(self.enrollment.attendance_summary["absent"], 1)
+        self.assertEqual(self.enrollment.today_attendance_status, "absent")
+
+        # Editing today flips the counters instead of adding a third day
+        self._submit(today, "present")
+        self.assertEqual(self.enrollment.attendance_summary["present"], 2)
+        self.assertEqual(self.enrollment.attendance_summary["absent"], 0)
+        self.assertEqual(self.enrollment.today_attendance_status, "present")
+
+        # Editing an older day must not overwrite today's status
+        self._submit(yesterday, "absent")
+        self.assertEqual(self.enrollment.today_attendance_status, "present")
+        self.assertEqual(self.enrollment.last_attendance_date, today)
+
+    def test_deleting_record_recounts(self):
+        record = Attendance.objects.create(
+            student=self.student,
+            class_assigned=self.cls,
+            academic_year=self.year,
+            date=timezone.localdate(),
+            status="present",
+        )
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.attendance_present, 1)
+
+        record.delete()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.attendance_present, 0)
+        self.assertIsNone(self.enrollment.today_attendance_status)
+
+    def test_verify_command_repairs_drift(self):
+        self._submit(timezone.localdate(), "present")
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(attendance_present=7)
+
+        out = StringIO()
+        call_command("verify_attendance_counters", stdout=out)
+        self.assertIn("out of step", out.getvalue())
+
+        call_command("verify_attendance_counters", "--repair", stdout=StringIO())
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.attendance_present, 1)
+
+    def test_archived_years_keep_their_counters(self):
+        from unittest import mock
+
+        self._submit(timezone.localdate(), "present")
+        with mock.patch("teachers.rollups.archived_year_ids", return_value=[self.year.id]):
+            # What detaching the year's partition leaves: counters, no raw rows
+            Attendance.objects.filter(academic_year=self.year).delete()
+            out = StringIO()
+            call_command("verify_attendance_counters", "--repair", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.attendance_present, 1)
+
+
+# ─────────────────────────────────────────────────────────────
+# 7. ATTENDANCE PARTITIONING (PostgreSQL only)
+# ─────────────────────────────────────────────────────────────
+
+@override_settings(ATTENDANCE_PARTITIONING=True)
+class AttendancePartitioningTests(TestCase):
+
+    def setUp(self):
+        self.year = make_year()
+
+    def test_partition_covers_the_whole_academic_year(self):
+        self.assertEqual(partition_name(self.year), "teachers_attendance_y20240701")
+        # Upper bound is exclusive, so it is the day after end_date
+        self.assertEqual(partition_bounds(self.year), (date(2024, 7, 1), date(2025, 7, 1)))
+
+    def test_new_partition_takes_its_rows_from_the_default_partition(self):
+        create, move, attach = year_partition_sql(self.year)
+        self.assertIn('"teachers_attendance_y20240701"', create)
+        self.assertIn('DELETE FROM "teachers_attendance_default"', move)
+        self.assertIn("date >= '2024-07-01' AND date < '2025-07-01'", move)
+        self.assertIn("FOR VALUES FROM ('2024-07-01') TO ('2025-07-01')", attach)
+
+    def test_sqlite_stays_unpartitioned(self):
+        self.assertFalse(partitioning_enabled())
+        self.assertFalse(is_partitioned())
+        make_year(name="2025-2026", is_current=False)   # signal is a no-op
+
+        out = StringIO()
+        call_command("ensure_attendance_partitions", stdout=out)
+        self.assertIn("partitioning is off", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("archive_attendance_partition", "2024-2025")
 
 
 # ─────────────────────────────────────────────────────────────
-# 6. REMAINING VIEW ACCESS GUARDS
+# 8. REMAINING VIEW ACCESS GUARDS
 # ─────────────────────────────────────────────────────────────
 
 class TeacherViewAccessTests(TestCase):
@@ -7,10 +7,16 @@ urlpatterns = [
     path('students/', teacher_all_students, name='teacher_all_students'),
     path('attendance/', teacher_attendance, name='teacher_attendance'),
     path('attendance/report/', attendance_report, name='attendance_report'),
+    path('attendance/report/export/', attendance_report_export, name='attendance_report_export'),
+    path('attendance/sync/', attendance_sync, name='attendance_sync'),
     path('attendance/<uuid:assignment_id>/', mark_attendance, name='mark_attendance'),
+    path('attendance/<uuid:assignment_id>/register/', attendance_register, name='attendance_register'),
     # Admin-only: mark daily attendance for all teachers
     path('teacher-attendance/', mark_teacher_attendance, name='mark_teacher_attendance'),
     path('grades/', teacher_grades, name='teacher_grades'),
+    path('grades/export/', grades_export, name='grades_export'),
+    path('grades/analytics/', grade_analytics, name='grade_analytics'),
     path('grades/<uuid:assignment_id>/enter/', enter_grades, name='enter_grades'),
+    path('grades/<uuid:assignment_id>/gradebook/', gradebook, name='gradebook'),
     path('schedule/', teacher_schedule, name='teacher_schedule'),
 ]
\ No newline at end of file
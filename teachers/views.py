@@ -1,14 +1,45 @@
+import json
+import uuid
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.contrib import messages
+from django.utils.dateparse import parse_date
 from django.utils.timezone import now
-from django.db.models import Q
-from django.core.paginator import Paginator
+from datetime import timedelta
+from django.db.models import Q, Count, Exists, OuterRef
 
 from .models import *
 from academics.models import *
 from accounts.models import CustomUser
 from teachers.analytics import get_filtered_attendance
+from teachers.services import (
+    validate_roster,
+    record_class_attendance,
+    record_teacher_attendance,
+    parse_grade_sheet,
+    record_grades,
+)
+from teachers.pagination import keyset_paginate
+from teachers.register import build_class_register, parse_month
+from teachers.gradebook import build_gradebook
+from teachers.grade_analytics import get_grade_distribution, get_subject_comparison
+from teachers.grade_import import GradeImportError, read_grade_csv, template_rows, TEMPLATE_HEADER
+from teachers.sync import (
+    MAX_SYNC_ENTRIES,
+    SyncTokenError,
+    decode_sync_token,
+    apply_attendance_entries,
+    attendance_changes,
+)
+from teachers.exports import (
+    streaming_export,
+    attendance_export_header,
+    attendance_export_rows,
+    grade_export_header,
+    grade_export_rows,
+)
 from students.models import Enrollment, ParentStudent
 from core.models import Announcement, Notification
 
@@ -39,7 +70,7 @@ def teacher_dashboard(request):
             'class_assigned',
             'class_assigned__department',
             'academic_year'
-        ).order_by('class_assigned__name', 'subject__name')
+        ).with_student_counts().order_by('class_assigned__name', 'subject__name')
     else:
         assignments = request.user.teaching_assignments.none()
     
@@ -129,7 +160,7 @@ def teacher_all_students(request):
         ).select_related(
             'class_assigned',
             'subject'
-        )
+        ).with_student_counts()
     else:
         assignments = request.user.teaching_assignments.none()
 
@@ -176,47 +207,12 @@ def mark_attendance(request, assignment_id):
             return redirect('mark_attendance', assignment_id=assignment.id)
 
         try:
-            for student in students:
-                status = request.POST.get(f'student_{student.id}')
-
-                if status not in ['present', 'absent']:
-                    raise ValueError(f"Invalid status for {student}")
-
-                Attendance.objects.update_or_create(
-                    student=student,
-                    class_assigned=assignment.class_assigned,
-                    academic_year=assignment.academic_year,
-                    date=date,
-                    defaults={
-                        'status': status,
-                        'marked_by': request.user,
-                        'updated_by': request.user,
-                    }
-                )
-
-                Notification.send(
-                    recipient=student,
-                    title="Attendance recorded",
-                    body=(
-                        f"Your attendance for "
-                        f"{assignment.class_assigned.name} on {date} "
-                        f"was marked as {status}."
-                    ),
-                    notif_type='attendance',
-                )
-                # Notify parents too
-                for link in ParentStudent.objects.filter(student=student).select_related('parent'):
-                    Notification.send(
-                        recipient=link.parent,
-                        title="Child attendance recorded",
-                        body=(
-                            f"{student.get_full_name() or student.username} "
-                            f"was marked {status} on {date} "
-                            f"in {assignment.class_assigned.name}."
-                        ),
-                        notif_type='attendance',
-                    )
-
+            # Validate the whole roster first, then write it in one go
+            rows = validate_roster(students, {
+                student.id: request.POST.get(f'student_{student.id}')
+                for student in students
+            })
+            record_class_attendance(assignment, date, rows, marked_by=request.user)
 
             messages.success(request, "Attendance saved successfully!")
             return redirect('teacher_attendance')
@@ -243,20 +239,138 @@ def mark_attendance(request, assignment_id):
         'is_edit_mode': is_edit_mode,
     })
 
+@login_required(login_url='login')
+def attendance_register(request, assignment_id):
+    """
+    Monthly register for one class: students × school days.
+    ?month=YYYY-MM picks the month, ?format=csv downloads the same matrix.
+    """
+    if not request.user.is_teacher:
+        messages.error(request, "Access denied. Teachers only.")
+        return redirect('home')
+    assignment = get_object_or_404(
+        request.user.teaching_assignments.select_related(
+            'class_assigned', 'subject', 'academic_year'
+        ),
+        id=assignment_id
+    )
+    month = parse_month(request.GET.get('month'))
+    register = build_class_register(
+        assignment.class_assigned, assignment.academic_year, month
+    )
+
+    if request.GET.get('format') == 'csv':
+        return streaming_export(
+            f"register_{assignment.class_assigned.name}_{month:%Y-%m}",
+            register.csv_header(),
+            register.csv_rows(),
+        )
+
+    previous_month = (month - timedelta(days=1)).replace(day=1)
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    return render(request, 'teachers/attendance_register.html', {
+        'assignment':     assignment,
+        'register':       register,
+        'rows':           list(register.rows()),
+        'day_totals':     register.day_totals(),
+        'month':          month,
+        'previous_month': previous_month,
+        'next_month':     next_month,
+    })
+
+@login_required(login_url='login')
+def attendance_sync(request):
+    """
+    JSON batch sync for teachers on patchy connections.
+
+    Expected JSON payload:
+    {
+        "entries": [
+            {
+                "key": "client-generated idempotency key",
+                "assignment": "uuid",
+                "student": "uuid",
+                "date": "YYYY-MM-DD",
+                "status": "present" | "absent"
+            }
+        ],
+        "since": "sync_token from the previous response" | null
+    }
+
+    Responds with one result per entry, the attendance changed in the
+    teacher's classes since `since`, and the next sync_token. An empty
+    entries list just pulls changes.
+    """
+    if request.method != 'POST':
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid request method'
+        }, status=405)
+
+    if not request.user.is_teacher:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Unauthorized access'
+        }, status=403)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid JSON format'
+        }, status=400)
+
+    entries = (data.get('entries') or []) if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'entries must be a list'
+        }, status=400)
+    if len(entries) > MAX_SYNC_ENTRIES:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'At most {MAX_SYNC_ENTRIES} entries per request'
+        }, status=400)
+
+    # Check the token before writing anything, so a bad token never
+    # leaves a half-acknowledged batch behind
+    since = data.get('since')
+    try:
+        if since:
+            decode_sync_token(since)
+    except SyncTokenError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
+    results = apply_attendance_entries(request.user, entries)
+    changes, sync_token, has_more = attendance_changes(request.user, since)
+
+    return JsonResponse({
+        'status': 'ok',
+        'results': results,
+        'changes': changes,
+        'sync_token': sync_token,
+        'has_more': has_more,
+    })
+
 # TEACHER ATTENDANCE — Admin only
 @login_required(login_url='login')
 def mark_teacher_attendance(request):
     if not (request.user.is_staff or request.user.is_superuser):
         messages.error(request, 'You do not have permission to access the admin dashboard.')
         return redirect('home')
-    # Only teachers who are fully approved and active in the school
-    teachers = CustomUser.objects.filter(
+    # Only teachers who are fully approved and active in the school.
+    # Evaluated once — the emptiness check and the POST both reuse it.
+    teachers = list(CustomUser.objects.filter(
         is_teacher=True,
         is_member_of_this_school=True,
         is_active=True,
-    ).order_by('username')
+    ).order_by('username'))
 
-    if not teachers.exists():
+    if not teachers:
         messages.warning(request, "No active teachers found.")
         return redirect('admin_dashboard')
     
@@ -265,32 +379,28 @@ def mark_teacher_attendance(request):
         if not date:
             messages.error(request, "Please select a date.")
             return redirect('mark_teacher_attendance')
-        
-        saved_count = 0
-        error_count = 0
-
-        for teacher in teachers:
-            status = request.POST.get(f'teacher_{teacher.id}')
-
-            if status not in [TeacherAttendance.STATUS_PRESENT, TeacherAttendance.STATUS_ABSENT]:
-                error_count += 1
-                continue
-            TeacherAttendance.objects.update_or_create(
-                teacher=teacher,
-                date=date,
-                defaults={
-                    'status': status,
-                    'marked_by': request.user,
-                },
+
+        try:
+            result = record_teacher_attendance(
+                date,
+                teachers,
+                {teacher.id: request.POST.get(f'teacher_{teacher.id}') for teacher in teachers},
+                marked_by=request.user,
             )
-            saved_count += 1
+        except ValueError:
+            messages.error(request, "Please select a valid date.")
+            return redirect('mark_teacher_attendance')
 
-        if error_count:
+        saved_count = result['saved'] + result['unchanged']
+        if result['invalid']:
+            names = ', '.join(t.username for t in result['invalid'])
+            messages.error(request, f"Invalid status for: {names}. These were not saved.")
+        if result['skipped']:
             messages.warning(
                 request,
-                f"Saved {saved_count} record(s). {error_count} teacher(s) had missing data and were skipped."
+                f"Saved {saved_count} record(s). {len(result['skipped'])} teacher(s) had missing data and were skipped."
             )
-        else:
+        elif not result['invalid']:
             messages.success(request, f"Attendance saved for {saved_count} teacher(s).")
         # Redirect back to same date so admin can confirm the saved state
         return redirect(f"{request.path}?date={date}")
@@ -302,7 +412,7 @@ def mark_teacher_attendance(request):
     # Dict keyed by teacher PK → record; used in template to pre-fill radios
     attendance_dict = {record.teacher_id: record for record in existing_records}
 
-    is_edit_mode = existing_records.exists()
+    is_edit_mode = bool(attendance_dict)
 
     return render(request, 'teachers/mark_teacher_attendance.html', {
         'teachers': teachers,
@@ -325,6 +435,7 @@ def teacher_grades(request):
         request.user.teaching_assignments
         .filter(academic_year=current_year)
         .select_related('subject', 'class_assigned')
+        .with_student_counts()
         .order_by('class_assigned__name', 'subject__name')
     ) if current_year else []
     return render(request, 'teachers/grades.html', {
@@ -362,6 +473,65 @@ def enter_grades(request, assignment_id):
             selected_term = terms.get(id=selected_term_id)
         except Term.DoesNotExist:
             pass
+    if request.GET.get('format') == 'template':
+        return streaming_export(
+            f"grades_{assignment.class_assigned.name}_{assignment.subject.code}",
+            TEMPLATE_HEADER,
+            template_rows(students),
+        )
+    posted_scores, sheet_errors, max_score = {}, {}, None
+    import_errors = []
+    sheet_url = (
+        f"{request.path}?exam_type={exam_type}"
+        + (f"&term_id={selected_term_id}" if selected_term_id else "")
+    )
+    if request.method == 'POST' and 'save_grades' in request.POST:
+        students = list(students)
+        posted_scores = {
+            student.id: request.POST.get(f'score_{student.id}', '')
+            for student in students
+        }
+        max_score = request.POST.get('max_score', '100')
+        # Validate the whole sheet first; a single bad score saves nothing
+        rows, parsed_max, sheet_errors = parse_grade_sheet(students, posted_scores, max_score)
+        if not sheet_errors:
+            result = record_grades(
+                assignment, exam_type, selected_term, rows, parsed_max,
+                marked_by=request.user,
+            )
+            messages.success(
+                request,
+                f"Saved {result['saved']} grade(s)"
+                + (f", {result['unchanged']} unchanged." if result['unchanged'] else ".")
+            )
+            return redirect(sheet_url)
+        messages.error(request, 'Nothing was saved. Fix the highlighted scores and submit again.')
+    elif request.method == 'POST' and 'import_csv' in request.POST:
+        students = list(students)
+        upload = request.FILES.get('grades_file')
+        try:
+            if upload is None:
+                raise GradeImportError("Choose a CSV file to import.")
+            report = read_grade_csv(upload, students, request.POST.get('max_score', '100'))
+        except GradeImportError as e:
+            messages.error(request, f"Nothing was imported. {e}")
+        else:
+            import_errors = report['errors']
+            result = {'saved': 0, 'unchanged': 0}
+            if report['rows']:
+                result = record_grades(
+                    assignment, exam_type, selected_term, report['rows'], report['max_score'],
+                    marked_by=request.user,
+                )
+            messages.success(
+                request,
+                f"Imported {result['saved']} grade(s)"
+                + (f", {result['unchanged']} unchanged" if result['unchanged'] else "")
+                + (f", {report['skipped']} blank row(s) skipped." if report['skipped'] else ".")
+            )
+            if not import_errors:
+                return redirect(sheet_url)
+            messages.warning(request, f"{len(import_errors)} row(s) were not imported. See the report below.")
     # Load existing grades for this combo so we can pre-fill
     existing_qs = Grade.objects.filter(
         subject=assignment.subject,
@@ -371,77 +541,6 @@ def enter_grades(request, assignment_id):
         term=selected_term,
     )
     existing_map = {g.student_id: g for g in existing_qs}
-    if request.method == 'POST' and 'save_grades' in request.POST:
-        max_score = request.POST.get('max_score', '100')
-        try:
-            max_score = float(max_score)
-            if max_score <= 0:
-                raise ValueError
-        except ValueError:
-            messages.error(request, 'Max score must be a positive number.')
-            max_score = 100
-        saved = 0
-        for student in students:
-            raw = request.POST.get(f'score_{student.id}', '').strip()
-            if raw == '':
-                continue   # skip blank — don't overwrite existing
-            try:
-                score = float(raw)
-                if score < 0 or score > max_score:
-                    messages.warning(
-                        request,
-                        f'{student.username}: score {score} out of range, skipped.'
-                    )
-                    continue
-            except ValueError:
-                continue
-            Grade.objects.update_or_create(
-                student=student,
-                subject=assignment.subject,
-                class_assigned=assignment.class_assigned,
-                academic_year=assignment.academic_year,
-                exam_type=exam_type,
-                term=selected_term,
-                defaults={
-                    'score':     score,
-                    'max_score': max_score,
-                    'marked_by': request.user,
-                },
-            )
-            # Notify student
-            Notification.send(
-                recipient=student,
-                title="Grade recorded",
-                body=(
-                    f"Your "
-                    f"{dict(Grade.EXAM_TYPE_CHOICES).get(exam_type, exam_type)} "
-                    f"score for {assignment.subject.name} "
-                    f"has been recorded: {score}/{max_score}."
-                ),
-                notif_type='grade',
-            )
-
-            # Notify parents
-            for link in ParentStudent.objects.filter(
-                student=student
-            ).select_related('parent'):
-                Notification.send(
-                    recipient=link.parent,
-                    title="Child grade recorded",
-                    body=(
-                        f"{student.get_full_name() or student.username} "
-                        f"received {score}/{max_score} "
-                        f"in {assignment.subject.name} "
-                        f"({dict(Grade.EXAM_TYPE_CHOICES).get(exam_type, exam_type)})."
-                    ),
-                    notif_type='grade',
-                )
-            saved += 1
-        messages.success(request, f'Saved {saved} grade(s).')
-        return redirect(
-            f"{request.path}?exam_type={exam_type}"
-            + (f"&term_id={selected_term_id}" if selected_term_id else "")
-        )
     EXAM_TYPES = Grade.EXAM_TYPE_CHOICES
     return render(request, 'teachers/enter_grades.html', {
         'assignment':      assignment,
@@ -452,8 +551,86 @@ def enter_grades(request, assignment_id):
         'selected_term':   selected_term,
         'selected_term_id': selected_term_id,
         'existing_map':    existing_map,
+        'posted_scores':   posted_scores,
+        'sheet_errors':    sheet_errors,
+        'max_score':       max_score,
+        'import_errors':   import_errors,
+    })
+
+@login_required(login_url='login')
+def gradebook(request, assignment_id):
+    """
+    Every exam type and term for one assignment on one sheet.
+    ?format=csv downloads the percentages.
+    """
+    if not request.user.is_teacher:
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    assignment = get_object_or_404(
+        request.user.teaching_assignments.select_related(
+            'class_assigned', 'subject', 'academic_year'
+        ),
+        id=assignment_id,
+    )
+    book = build_gradebook(assignment)
+
+    if request.GET.get('format') == 'csv':
+        return streaming_export(
+            f"gradebook_{assignment.class_assigned.name}_{assignment.subject.code}",
+            book.csv_header(),
+            book.csv_rows(),
+        )
+
+    return render(request, 'teachers/gradebook.html', {
+        'assignment': assignment,
+        'gradebook':  book,
+        'rows':       list(book.rows()),
+        'column_averages': book.column_averages,
     })
 
+@login_required(login_url='login')
+def grade_analytics(request):
+    """
+    Grade distribution charts as JSON, for staff.
+
+    GET parameters (all optional, ids): year (default: the current
+    year), subject, class, term. With a subject, the response also
+    compares that subject across the classes that take it.
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Access denied'
+        }, status=403)
+
+    try:
+        ids = {
+            name: uuid.UUID(request.GET[name]) if request.GET.get(name) else None
+            for name in ('year', 'subject', 'class', 'term')
+        }
+    except ValueError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid id'
+        }, status=400)
+
+    year_id = ids['year'] or (
+        AcademicYear.objects.filter(is_current=True).values_list('id', flat=True).first()
+    )
+    if year_id is None:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'No active academic year found'
+        }, status=404)
+
+    data = {
+        'status': 'success',
+        'distribution': get_grade_distribution(year_id, ids['subject'], ids['class'], ids['term']),
+    }
+    if ids['subject']:
+        data['comparison'] = get_subject_comparison(year_id, ids['subject'], ids['term'])
+    return JsonResponse(data)
+
 @login_required(login_url='login')
 def teacher_schedule(request):
     if not request.user.is_teacher:
@@ -488,6 +665,82 @@ def teacher_schedule(request):
         'total_slots':  len(slots),
     })
 
+def _report_classes(request, current_year):
+    """Classes shown in the report filter — teachers only get their own."""
+    if request.user.is_staff or request.user.is_superuser:
+        return (
+            Class.objects.filter(academic_year=current_year).order_by('name')
+            if current_year else []
+        )
+    assigned_class_ids = (
+        request.user.teaching_assignments
+        .filter(academic_year=current_year)
+        .values('class_assigned')
+        if current_year else []
+    )
+    return Class.objects.filter(
+        id__in=assigned_class_ids
+    ).order_by('name')
+
+
+def _report_filters(request):
+    return {
+        'class_id':   request.GET.get('class_id',   '').strip(),
+        'student_id': request.GET.get('student_id', '').strip(),
+        'date_from':  request.GET.get('date_from',  '').strip(),
+        'date_to':    request.GET.get('date_to',    '').strip(),
+    }
+
+
+def _invalid_filter(values, uuid_names=(), date_names=()):
+    """
+    The name of the first non-blank filter that is not a valid id or
+    ISO date, or None. Checked up front: a malformed value would
+    otherwise fail inside the query and return a 500.
+    """
+    for name in uuid_names:
+        if values.get(name):
+            try:
+                uuid.UUID(values[name])
+            except ValueError:
+                return name
+    for name in date_names:
+        if values.get(name):
+            try:
+                if parse_date(values[name]) is None:
+                    return name
+            except ValueError:
+                return name
+    return None
+
+
+def _invalid_report_filter(filters):
+    return _invalid_filter(filters, ('class_id', 'student_id'), ('date_from', 'date_to'))
+
+
+def _report_queryset(request, current_year, filters):
+    """
+    Attendance rows matching the report filters, scoped by role.
+    Shared by the report page and the export so both always agree.
+    """
+    qs = get_filtered_attendance(
+        class_id=filters['class_id']     or None,
+        student_id=filters['student_id'] or None,
+        date_from=filters['date_from']   or None,
+        date_to=filters['date_to']       or None,
+        academic_year=current_year,
+    )
+    # Teachers must not see records outside their assigned classes
+    if request.user.is_teacher and not request.user.is_staff:
+        teacher_class_ids = (
+            request.user.teaching_assignments
+            .filter(academic_year=current_year)
+            .values_list('class_assigned', flat=True)
+        )
+        qs = qs.filter(class_assigned__in=teacher_class_ids)
+    return qs
+
+
 @login_required(login_url='login')
 def attendance_report(request):
     """
@@ -504,26 +757,16 @@ def attendance_report(request):
         current_year = None
 
     # Build class list based on role
-    if request.user.is_staff or request.user.is_superuser:
-        classes = (
-            Class.objects.filter(academic_year=current_year).order_by('name')
-            if current_year else []
-        )
-    else:
-        assigned_class_ids = (
-            request.user.teaching_assignments
-            .filter(academic_year=current_year)
-            .values('class_assigned')
-            if current_year else []
-        )
-        classes = Class.objects.filter(
-            id__in=assigned_class_ids
-        ).order_by('name')
+    classes = _report_classes(request, current_year)
     # Read GET filters
-    class_id   = request.GET.get('class_id',   '').strip()
-    student_id = request.GET.get('student_id', '').strip()
-    date_from  = request.GET.get('date_from',  '').strip()
-    date_to    = request.GET.get('date_to',    '').strip()
+    filters    = _report_filters(request)
+    invalid    = _invalid_report_filter(filters)
+    if invalid:
+        return HttpResponseBadRequest(f"Invalid {invalid}")
+    class_id   = filters['class_id']
+    student_id = filters['student_id']
+    date_from  = filters['date_from']
+    date_to    = filters['date_to']
     # Student dropdown — only populated when a class is selected
     students = []
     if class_id and current_year:
@@ -541,23 +784,14 @@ def attendance_report(request):
     summary = None
     # Only query when at least one filter is active
     if class_id or student_id or date_from or date_to: 
-        qs = get_filtered_attendance(
-            class_id=class_id   or None,
-            student_id=student_id or None,
-            date_from=date_from  or None,
-            date_to=date_to      or None,
-            academic_year=current_year,
+        qs = _report_queryset(request, current_year, filters)
+        # Query 1 — summary card: both counts in one conditional aggregate
+        counts = qs.aggregate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status=Attendance.STATUS_PRESENT)),
         )
-        # Teachers must not see records outside their assigned classes
-        if request.user.is_teacher and not request.user.is_staff:
-            teacher_class_ids = (
-                request.user.teaching_assignments
-                .filter(academic_year=current_year)
-                .values_list('class_assigned', flat=True)
-            )
-            qs = qs.filter(class_assigned__in=teacher_class_ids)
-        total   = qs.count()
-        present = qs.filter(status=Attendance.STATUS_PRESENT).count()
+        total   = counts['total']
+        present = counts['present']
         absent  = total - present
         pct     = round((present / total) * 100, 1) if total > 0 else 0
         summary = {
@@ -566,9 +800,14 @@ def attendance_report(request):
             'absent':     absent,
             'percentage': pct,
         }
-        paginator = Paginator(qs, 50)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        # Query 2 — one page, continuing from the (date, id) cursor.
+        # No COUNT and no OFFSET, so deep pages cost the same as page 1.
+        page_obj = keyset_paginate(
+            qs,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=50,
+        )
     
     return render(request, 'teachers/attendance_report.html', {
         'current_year':       current_year,
@@ -580,4 +819,87 @@ def attendance_report(request):
         'selected_student_id':student_id,
         'date_from':          date_from,
         'date_to':            date_to,
-    })
\ No newline at end of file
+    })
+
+
+@login_required(login_url='login')
+def attendance_report_export(request):
+    """
+    Streams the attendance report as CSV (default) or NDJSON (?format=ndjson).
+    Same filters and role scoping as attendance_report; with no filters
+    it exports the whole current year the user is allowed to see.
+    """
+    if not (request.user.is_teacher or request.user.is_staff or request.user.is_superuser):
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    try:
+        current_year = AcademicYear.objects.get(is_current=True)
+    except AcademicYear.DoesNotExist:
+        messages.error(request, 'No current academic year is set.')
+        return redirect('attendance_report')
+
+    filters = _report_filters(request)
+    invalid = _invalid_report_filter(filters)
+    if invalid:
+        return HttpResponseBadRequest(f"Invalid {invalid}")
+    qs = _report_queryset(request, current_year, filters)
+    return streaming_export(
+        f"attendance_{current_year.name}",
+        attendance_export_header(),
+        attendance_export_rows(qs),
+        fmt=request.GET.get('format', 'csv'),
+    )
+
+
+@login_required(login_url='login')
+def grades_export(request):
+    """
+    Streams grades for the current year as CSV or NDJSON.
+    Optional filters: class_id, subject_id, term_id, exam_type.
+    Teachers only get grades for class/subject pairs they teach.
+    """
+    if not (request.user.is_teacher or request.user.is_staff or request.user.is_superuser):
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    try:
+        current_year = AcademicYear.objects.get(is_current=True)
+    except AcademicYear.DoesNotExist:
+        messages.error(request, 'No current academic year is set.')
+        return redirect('teacher_grades')
+
+    qs = Grade.objects.filter(academic_year=current_year)
+    class_id   = request.GET.get('class_id',   '').strip()
+    subject_id = request.GET.get('subject_id', '').strip()
+    term_id    = request.GET.get('term_id',    '').strip()
+    exam_type  = request.GET.get('exam_type',  '').strip()
+    invalid = _invalid_filter(
+        {'class_id': class_id, 'subject_id': subject_id, 'term_id': term_id},
+        ('class_id', 'subject_id', 'term_id'),
+    )
+    if invalid:
+        return HttpResponseBadRequest(f"Invalid {invalid}")
+    if class_id:
+        qs = qs.filter(class_assigned_id=class_id)
+    if subject_id:
+        qs = qs.filter(subject_id=subject_id)
+    if term_id:
+        qs = qs.filter(term_id=term_id)
+    if exam_type:
+        qs = qs.filter(exam_type=exam_type)
+
+    if request.user.is_teacher and not request.user.is_staff:
+        qs = qs.filter(Exists(
+            request.user.teaching_assignments.filter(
+                academic_year=current_year,
+                class_assigned=OuterRef('class_assigned'),
+                subject=OuterRef('subject'),
+            )
+        ))
+
+    qs = qs.order_by('class_assigned__name', 'subject__name', 'student__username', 'exam_type')
+    return streaming_export(
+        f"grades_{current_year.name}",
+        grade_export_header(),
+        grade_export_rows(qs),
+        fmt=request.GET.get('format', 'csv'),
+    )